@@ -1,4 +1,9 @@
 from django.contrib import admin
+from .models import FarmLease
 
-# Automation models can be added here if needed
 
+@admin.register(FarmLease)
+class FarmLeaseAdmin(admin.ModelAdmin):
+    list_display = ['farm', 'holder', 'leased_until', 'refresh_round', 'refreshed_at']
+    list_filter = ['refreshed_at']
+    search_fields = ['farm__name', 'holder']
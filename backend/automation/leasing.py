@@ -0,0 +1,124 @@
+"""
+Farm leasing for refresh workers sharing the fleet
+Workers claim farms in batches with SELECT ... FOR UPDATE SKIP LOCKED, so
+concurrent claims never block on or return the same rows, and mark them done
+for the current refresh round. Each lease is renewed right before its farm is
+refreshed, so a slow batch does not lose its later farms; a lease that is not
+renewed or completed in time (the worker crashed or stalled) expires and the
+farm is claimed again.
+"""
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from farms.models import Farm
+from .models import FarmLease
+
+logger = logging.getLogger(__name__)
+
+
+def worker_name():
+    """Lease holder name of this process"""
+    return f'{socket.gethostname()}:{os.getpid()}'[:100]
+
+
+def current_round(interval_minutes=None):
+    """
+    Refresh round the current time belongs to
+
+    Rounds are numbered by the nearest FLEET_REFRESH_MINUTES boundary, so
+    hosts started by the same cron entry agree on the round despite small
+    clock and start-up skew.
+    """
+    if interval_minutes is None:
+        interval_minutes = settings.FLEET_REFRESH_MINUTES
+    return round(time.time() / (interval_minutes * 60))
+
+
+def ensure_leases():
+    """Create the missing lease rows of active farms"""
+    missing = Farm.objects.filter(is_active=True, lease__isnull=True).values_list('id', flat=True)
+    FarmLease.objects.bulk_create(
+        [FarmLease(farm_id=farm_id) for farm_id in missing], ignore_conflicts=True
+    )
+
+
+def claim_farms(holder, refresh_round, batch_size=None, lease_seconds=None, farm_ids=None):
+    """
+    Lease up to batch_size farms not yet refreshed in refresh_round
+
+    Args:
+        farm_ids: Only claim among these farms (e.g. one forecast cell)
+
+    Returns:
+        Claimed farm ids; empty once the round has nothing left to claim
+    """
+    if batch_size is None:
+        batch_size = settings.FLEET_LEASE_BATCH
+    if lease_seconds is None:
+        lease_seconds = settings.FLEET_LEASE_SECONDS
+
+    now = timezone.now()
+    leases = FarmLease.objects.select_for_update(skip_locked=True, of=('self',))
+    if farm_ids is not None:
+        leases = leases.filter(farm_id__in=farm_ids)
+    with transaction.atomic():
+        # of=('self',) locks only the lease rows, not the joined farms
+        claimed = list(
+            leases.filter(farm__is_active=True, refresh_round__lt=refresh_round)
+            .filter(Q(leased_until__isnull=True) | Q(leased_until__lt=now))
+            .order_by('farm_id')
+            .values_list('farm_id', flat=True)[:batch_size]
+        )
+        if claimed:
+            FarmLease.objects.filter(farm_id__in=claimed).update(
+                holder=holder, leased_until=now + timedelta(seconds=lease_seconds)
+            )
+    return claimed
+
+
+def renew_lease(holder, farm_id, lease_seconds=None):
+    """
+    Extend holder's lease on farm_id before refreshing it
+
+    Returns:
+        False if the lease expired and another worker claimed the farm, which
+        must then be left to that worker
+    """
+    if lease_seconds is None:
+        lease_seconds = settings.FLEET_LEASE_SECONDS
+    return bool(
+        FarmLease.objects.filter(farm_id=farm_id, holder=holder).update(
+            leased_until=timezone.now() + timedelta(seconds=lease_seconds)
+        )
+    )
+
+
+def release_farms(holder, farm_ids):
+    """Give up holder's leases without completing them, so the farms can be claimed again now"""
+    return FarmLease.objects.filter(farm_id__in=farm_ids, holder=holder).update(holder='', leased_until=None)
+
+
+def complete_farms(holder, farm_ids, refresh_round):
+    """
+    Mark leased farms refreshed for refresh_round and release them
+
+    Farms whose lease expired and was claimed by another worker are left
+    alone. Failed farms should not be passed: their leases expire and the
+    farms are retried.
+    """
+    completed = FarmLease.objects.filter(farm_id__in=farm_ids, holder=holder).update(
+        holder='', leased_until=None, refresh_round=refresh_round, refreshed_at=timezone.now()
+    )
+    if completed < len(farm_ids):
+        logger.warning(
+            f"{len(farm_ids) - completed} leases held by {holder} expired before completion"
+        )
+    return completed
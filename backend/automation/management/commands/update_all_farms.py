@@ -1,43 +1,154 @@
 """
 Management command to update all farm statuses using Open Meteo
-Run with: python manage.py update_all_farms
+Run with: python manage.py update_all_farms [--workers 8 --mode thread|process]
 Or schedule with cron: */30 * * * * cd /path/to/project && python manage.py update_all_farms
+When the cron entry runs on several hosts, or alongside the Celery beat
+refresh (automation.tasks), add --shared so they split the fleet through farm
+leases (see automation.leasing) instead of each refreshing, and integrating
+the battery of, every farm.
 """
-from django.core.management.base import BaseCommand
+import multiprocessing
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+
 from farms.models import Farm
-from automation.services import update_farm_status
+from automation.leasing import claim_farms, complete_farms, current_round, ensure_leases, worker_name
+from automation.refresh_workers import init_process_worker, init_worker, update_farm, update_farm_in_thread
+from automation.services import get_fleet_soil_moisture
 
 
 class Command(BaseCommand):
     help = 'Update status for all active farms using Open Meteo data'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Farms refreshed concurrently (default: 1, no pool)',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['thread', 'process'],
+            default='thread',
+            help='Worker pool type (default: thread); process sidesteps the GIL for CPU-bound runs',
+        )
+        parser.add_argument(
+            '--shared',
+            action='store_true',
+            help='Claim farms in leased batches so several hosts can share the fleet',
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            help='Farms claimed per lease with --shared (default: FLEET_LEASE_BATCH)',
+        )
+
     def handle(self, *args, **options):
-        farms = Farm.objects.filter(is_active=True)
+        workers = options['workers']
+        if workers < 1:
+            raise CommandError('--workers must be at least 1.')
+
         updated_count = 0
         error_count = 0
-        
-        self.stdout.write(f'Updating {farms.count()} active farms...')
-        
-        for farm in farms:
-            try:
-                status = update_farm_status(farm)
-                updated_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'✓ {farm.name}: Battery {status.battery_level}%, '
-                        f'PV {status.pv_output_kw}kW, Irrigation: {"ON" if status.irrigation_on else "OFF"}'
-                    )
-                )
-            except Exception as e:
-                error_count += 1
-                self.stdout.write(
-                    self.style.ERROR(f'✗ {farm.name}: Error - {str(e)}')
-                )
-        
+        latencies = []
+
+        holder = None
+        if options['shared']:
+            holder = worker_name()
+            refresh_round = current_round()
+            ensure_leases()
+            batches = self._claimed_batches(holder, refresh_round, options['batch'])
+            self.stdout.write(f'Refreshing leased farms of round {refresh_round} as {holder}...')
+        else:
+            farm_ids = list(Farm.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+            batches = [farm_ids]
+            self.stdout.write(f'Updating {len(farm_ids)} active farms...')
+        if workers > 1:
+            self.stdout.write(f'Using {workers} {options["mode"]} workers')
+
+        # One query for every farm's soil moisture instead of one per sensor
+        soil_moisture = get_fleet_soil_moisture()
+
+        started = time.perf_counter()
+        with self._worker_pool(workers, options['mode'], soil_moisture, holder) as update_farms:
+            for batch in batches:
+                refreshed = []
+                for farm_id, name, status, error, seconds in update_farms(batch):
+                    latencies.append(seconds)
+                    if error is None:
+                        updated_count += 1
+                        refreshed.append(farm_id)
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f'✓ {name}: Battery {status.battery_level}%, '
+                                f'PV {status.pv_output_kw}kW, Irrigation: {"ON" if status.irrigation_on else "OFF"}'
+                            )
+                        )
+                    else:
+                        error_count += 1
+                        self.stdout.write(
+                            self.style.ERROR(f'✗ {name}: Error - {error}')
+                        )
+                if options['shared']:
+                    # Failed farms keep their lease until it expires, then are
+                    # retried; farms taken over are completed by their new holder
+                    complete_farms(holder, refreshed, refresh_round)
+        elapsed = time.perf_counter() - started
+
         self.stdout.write(
             self.style.SUCCESS(
                 f'\nCompleted: {updated_count} updated, {error_count} errors'
             )
         )
+        if latencies:
+            self.stdout.write(
+                f'{len(latencies)} farms in {elapsed:.1f}s ({len(latencies) / elapsed:.1f} farms/s); '
+                f'per farm p50 {self._percentile(latencies, 50) * 1000:.0f}ms, '
+                f'p95 {self._percentile(latencies, 95) * 1000:.0f}ms'
+            )
+
+    def _claimed_batches(self, holder, refresh_round, batch_size):
+        """Yield leased batches of farm ids until the round has none left"""
+        while True:
+            farm_ids = claim_farms(holder, refresh_round, batch_size)
+            if not farm_ids:
+                return
+            yield farm_ids
+
+    @contextmanager
+    def _worker_pool(self, workers, mode, soil_moisture, holder):
+        """Yield a function mapping farm ids to update_farm() results, in order"""
+        if workers == 1:
+            init_worker(soil_moisture, holder)
+            yield lambda farm_ids: map(update_farm, farm_ids)
+            return
+
+        if mode == 'process':
+            # Spawned rather than forked, so workers never inherit a database
+            # connection the parent opens while claiming farms
+            pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_process_worker, initargs=(soil_moisture, holder)
+            )
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(soil_moisture, holder))
+
+        def update_farms(farm_ids):
+            if mode == 'thread':
+                return pool.map(update_farm_in_thread, farm_ids)
+            # Batch farms per round trip to the worker processes
+            chunksize = max(1, min(50, len(farm_ids) // (workers * 4)))
+            return pool.map(update_farm, farm_ids, chunksize=chunksize)
 
+        with pool:
+            yield update_farms
 
+    def _percentile(self, values, percent):
+        if len(values) == 1:
+            return values[0]
+        return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
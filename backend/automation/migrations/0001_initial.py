@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('farms', '0005_fleetcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FarmLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('holder', models.CharField(blank=True, max_length=100)),
+                ('leased_until', models.DateTimeField(blank=True, null=True)),
+                ('refresh_round', models.BigIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('farm', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='lease', to='farms.farm')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['refresh_round', 'leased_until'], name='automation__refresh_8aa306_idx')],
+            },
+        ),
+    ]
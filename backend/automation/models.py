@@ -0,0 +1,21 @@
+from django.db import models
+from farms.models import Farm
+
+
+class FarmLease(models.Model):
+    """
+    Work lease on one farm for shared fleet refreshes (see automation.leasing)
+    A farm is claimable while it has not been refreshed in the current round
+    and nobody holds an unexpired lease on it.
+    """
+    farm = models.OneToOneField(Farm, on_delete=models.CASCADE, related_name='lease')
+    holder = models.CharField(max_length=100, blank=True)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    refresh_round = models.BigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [models.Index(fields=['refresh_round', 'leased_until'])]
+    
+    def __str__(self):
+        return f"Lease on {self.farm_id} held by {self.holder or 'nobody'}"
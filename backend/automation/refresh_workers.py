@@ -0,0 +1,66 @@
+"""
+Pool worker functions for update_all_farms
+Kept free of module-level model imports: spawned worker processes import this
+module to unpickle the functions before Django is set up.
+"""
+import time
+
+import django
+from django.db import connections
+
+# Soil moisture snapshot shared by the farms a worker refreshes
+_soil_moisture = None
+# Lease holder name when farms are leased (update_all_farms --shared)
+_lease_holder = None
+
+
+def init_worker(soil_moisture, lease_holder=None):
+    """Pool initializer for worker threads (and for refreshing in the calling thread)"""
+    global _soil_moisture, _lease_holder
+    _soil_moisture = soil_moisture
+    _lease_holder = lease_holder
+
+
+def init_process_worker(soil_moisture, lease_holder=None):
+    """Pool initializer for worker processes, which are spawned without Django configured"""
+    django.setup()
+    init_worker(soil_moisture, lease_holder)
+
+
+def update_farm(farm_id):
+    """
+    Refresh one farm inside a worker
+
+    Django keeps one database connection per thread and services one HTTP
+    session per thread, so each worker process reuses its own for every farm
+    it takes; thread pools use update_farm_in_thread.
+    With a lease holder, the farm's lease is renewed first and the farm is
+    skipped if another worker has taken it over.
+
+    Returns:
+        (farm id, farm name, status or None, error message or None, seconds)
+    """
+    from farms.models import Farm
+    from .leasing import renew_lease
+    from .services import update_farm_status
+
+    started = time.perf_counter()
+    name = f'Farm {farm_id}'
+    try:
+        if _lease_holder and not renew_lease(_lease_holder, farm_id):
+            return farm_id, name, None, 'Lease expired and taken over by another worker', time.perf_counter() - started
+        farm = Farm.objects.select_related('status').get(id=farm_id)
+        name = farm.name
+        status = update_farm_status(farm, soil_moisture_snapshot=_soil_moisture)
+        return farm_id, name, status, None, time.perf_counter() - started
+    except Exception as e:
+        return farm_id, name, None, str(e), time.perf_counter() - started
+
+
+def update_farm_in_thread(farm_id):
+    """update_farm() for thread pools, closing the thread's database connections afterwards"""
+    try:
+        return update_farm(farm_id)
+    finally:
+        # Pool threads open their own connections, which nothing else closes
+        connections.close_all()
@@ -0,0 +1,99 @@
+"""
+Compact columnar rendering for the weather forecast endpoint
+
+Layout (all integers little-endian):
+    4 bytes   magic b'CXFC'
+    uint8     format version (1)
+    3 bytes   padding
+    uint32    header length in bytes
+    header    UTF-8 JSON: every non-hourly field of the response plus
+              'start' (epoch seconds of the first hour), 'step' (seconds),
+              'count' (hours) and 'columns' (hourly variable names, in order)
+    padding   to a 4-byte boundary
+    columns   one float32 array of `count` values per name in 'columns';
+              missing values are NaN
+
+Hourly times are not sent when they are evenly spaced; they are start + i * step.
+Otherwise the header carries them as 'times' (epoch seconds).
+"""
+import json
+import struct
+import sys
+from array import array
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from rest_framework.renderers import BaseRenderer
+
+MAGIC = b'CXFC'
+VERSION = 1
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _epoch_seconds(local_times, utc_offset_seconds):
+    """Open-Meteo local ISO times ('YYYY-MM-DDTHH:MM') as UTC epoch seconds"""
+    return [
+        int(datetime.fromisoformat(moment).replace(tzinfo=dt_timezone.utc).timestamp()) - utc_offset_seconds
+        for moment in local_times
+    ]
+
+
+def encode_columnar(data):
+    """Encode a response dict whose 'forecast' holds Open-Meteo hourly data"""
+    header = {key: value for key, value in data.items() if key != 'forecast'}
+    forecast = data.get('forecast')
+    if not isinstance(forecast, dict):
+        # Errors and other non-forecast bodies travel as a header alone
+        return _pack(header, b'')
+    hourly = forecast.get('hourly') or {}
+    header.update({key: value for key, value in forecast.items() if key != 'hourly'})
+
+    epochs = _epoch_seconds(hourly.get('time') or [], int(forecast.get('utc_offset_seconds') or 0))
+    columns = [name for name, values in hourly.items() if name != 'time' and isinstance(values, list)]
+    header['count'] = len(epochs)
+    header['columns'] = columns
+    header['start'] = epochs[0] if epochs else None
+    header['step'] = epochs[1] - epochs[0] if len(epochs) > 1 else 3600
+    if any(later - earlier != header['step'] for earlier, later in zip(epochs, epochs[1:])):
+        header['times'] = epochs
+
+    nan = float('nan')
+    body = bytearray()
+    for name in columns:
+        values = hourly[name]
+        column = array('f', (nan if value is None else value for value in values[:len(epochs)]))
+        # Keep every column exactly `count` long
+        column.extend([nan] * (len(epochs) - len(column)))
+        if sys.byteorder == 'big':
+            column.byteswap()
+        body += column.tobytes()
+
+    return _pack(header, bytes(body))
+
+
+def _pack(header, body):
+    header_bytes = json.dumps(header, default=_json_default, separators=(',', ':')).encode()
+    # Pad the header with spaces so the float32 columns start 4-byte aligned
+    padding = -(12 + len(header_bytes)) % 4
+    return (
+        MAGIC + struct.pack('<B3xI', VERSION, len(header_bytes) + padding)
+        + header_bytes + b' ' * padding + body
+    )
+
+
+class ColumnarForecastRenderer(BaseRenderer):
+    """Selected with ?format=columnar or Accept: application/vnd.climexa.columnar"""
+    media_type = 'application/vnd.climexa.columnar'
+    format = 'columnar'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return encode_columnar(data)
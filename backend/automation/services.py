@@ -2,10 +2,11 @@
 Automation service for Climexa AI system
 Handles Open-Meteo API calls, PV calculations, and irrigation logic
 """
+import threading
 import requests
 from decimal import Decimal
 from django.utils import timezone
-from farms.models import Farm, SystemStatus
+from farms.models import Farm, get_farm_status
 
 
 # Configuration constants
@@ -27,8 +28,42 @@ LOAD_PRIORITY_ESSENTIAL = "essential"  # Domestic
 LOAD_PRIORITY_CRITICAL = "critical"  # Irrigation
 LOAD_PRIORITY_NON_ESSENTIAL = "non_essential"  # Water treatment, Grid
 
+# Open-Meteo variables requested by default
+HOURLY_VARIABLES = [
+    "temperature_2m", "precipitation", "cloud_cover",
+    "shortwave_radiation", "direct_radiation", "diffuse_radiation",
+    "direct_normal_irradiance", "global_tilted_irradiance", "relative_humidity_2m",
+    "soil_moisture_0_1cm", "soil_moisture_1_3cm", "soil_moisture_3_9cm",
+    "soil_temperature_6cm",
+]
+DAILY_VARIABLES = [
+    "temperature_2m_max", "temperature_2m_min", "temperature_2m_mean",
+    "precipitation_sum", "precipitation_probability_max", "weather_code",
+    "sunrise", "sunset", "wind_speed_10m_max", "wind_direction_10m_dominant",
+]
+# Hourly variables the current and tomorrow summaries are read from
+CURRENT_VARIABLES = ["global_tilted_irradiance", "cloud_cover", "precipitation", "temperature_2m"]
+# Sections of the weather forecast response (?fields=)
+WEATHER_SECTIONS = ["current", "forecast_tomorrow", "hourly", "daily"]
 
-def fetch_weather_data(farm, forecast_days=7):
+_http = threading.local()
+
+
+def http_session():
+    """
+    Open-Meteo HTTP session of the calling thread
+    
+    Reusing a session keeps the connection to Open-Meteo alive between
+    requests; sessions are not thread-safe, so each thread (and each worker
+    process) gets its own.
+    """
+    session = getattr(_http, "session", None)
+    if session is None:
+        session = _http.session = requests.Session()
+    return session
+
+
+def fetch_weather_data(farm, forecast_days=7, hourly_vars=HOURLY_VARIABLES, daily_vars=DAILY_VARIABLES):
     """Fetch current and forecast weather data from Open-Meteo"""
     # Open Meteo API documentation: https://open-meteo.com/en/docs
     # Use /v1/forecast endpoint with solar parameters
@@ -38,11 +73,7 @@ def fetch_weather_data(farm, forecast_days=7):
     hourly_url = (
         "https://api.open-meteo.com/v1/forecast?"
         f"latitude={farm.latitude}&longitude={farm.longitude}"
-        "&hourly=temperature_2m,precipitation,cloud_cover,"
-        "shortwave_radiation,direct_radiation,diffuse_radiation,"
-        "direct_normal_irradiance,global_tilted_irradiance,relative_humidity_2m,"
-        "soil_moisture_0_1cm,soil_moisture_1_3cm,soil_moisture_3_9cm,"
-        "soil_temperature_6cm"
+        f"&hourly={','.join(hourly_vars)}"
         f"&tilt={farm.tilt}&azimuth={farm.azimuth}"
         f"&timezone={farm.timezone}"
         f"&forecast_days={forecast_days}"
@@ -52,9 +83,7 @@ def fetch_weather_data(farm, forecast_days=7):
     daily_url = (
         "https://api.open-meteo.com/v1/forecast?"
         f"latitude={farm.latitude}&longitude={farm.longitude}"
-        "&daily=temperature_2m_max,temperature_2m_min,temperature_2m_mean,"
-        "precipitation_sum,precipitation_probability_max,weather_code,"
-        "sunrise,sunset,wind_speed_10m_max,wind_direction_10m_dominant"
+        f"&daily={','.join(daily_vars)}"
         f"&timezone={farm.timezone}"
         f"&forecast_days={forecast_days}"
     )
@@ -62,19 +91,31 @@ def fetch_weather_data(farm, forecast_days=7):
     return hourly_url, daily_url
 
 
-def get_full_weather_forecast(farm, forecast_days=7):
-    """Get full 7-day weather forecast with hourly and daily data"""
-    hourly_url, daily_url = fetch_weather_data(farm, forecast_days)
+def get_full_weather_forecast(farm, forecast_days=7, hourly_vars=HOURLY_VARIABLES, daily_vars=DAILY_VARIABLES):
+    """
+    Get full 7-day weather forecast with hourly and daily data
+    
+    hourly_vars / daily_vars limit the Open-Meteo variables fetched; an empty
+    list skips that request (current conditions then read as 0 unless
+    hourly_vars includes CURRENT_VARIABLES).
+    """
+    hourly_url, daily_url = fetch_weather_data(farm, forecast_days, hourly_vars, daily_vars)
     
     try:
         # Get hourly and daily data
-        hourly_response = requests.get(hourly_url, timeout=10)
-        hourly_response.raise_for_status()
-        hourly_data = hourly_response.json()
+        hourly_data = {}
+        if hourly_vars:
+            hourly_response = http_session().get(hourly_url, timeout=10)
+            hourly_response.raise_for_status()
+            hourly_data = hourly_response.json()
         
-        daily_response = requests.get(daily_url, timeout=10)
-        daily_response.raise_for_status()
-        daily_data = daily_response.json()
+        daily_data = {}
+        if daily_vars:
+            daily_response = http_session().get(daily_url, timeout=10)
+            daily_response.raise_for_status()
+            daily_data = daily_response.json()
+        # Either response carries the location metadata
+        location = hourly_data or daily_data
         
         # Get current conditions from hourly data
         hourly = hourly_data.get("hourly", {})
@@ -102,9 +143,10 @@ def get_full_weather_forecast(farm, forecast_days=7):
         full_forecast = {
             "hourly": hourly,
             "daily": daily_data.get("daily", {}),
-            "timezone": hourly_data.get("timezone", farm.timezone),
-            "latitude": hourly_data.get("latitude", farm.latitude),
-            "longitude": hourly_data.get("longitude", farm.longitude),
+            "timezone": location.get("timezone", farm.timezone),
+            "utc_offset_seconds": location.get("utc_offset_seconds", 0),
+            "latitude": location.get("latitude", farm.latitude),
+            "longitude": location.get("longitude", farm.longitude),
         }
         
         return current_weather, forecast_tomorrow, full_forecast
@@ -132,6 +174,85 @@ def get_full_weather_forecast(farm, forecast_days=7):
         }
 
 
+def parse_weather_selection(fields=None, variables=None):
+    """
+    Sections and hourly variables for ?fields= / ?vars= values
+    
+    Returns:
+        (sections, variables); both default to everything
+    
+    Raises:
+        ValueError naming unknown sections or variables
+    """
+    from farms.projection import parse_fields
+    
+    sections = list(parse_fields(fields) or WEATHER_SECTIONS)
+    unknown = set(sections) - set(WEATHER_SECTIONS)
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+    variables = [name.strip() for name in (variables or '').split(',') if name.strip()]
+    unknown = set(variables) - set(HOURLY_VARIABLES)
+    if unknown:
+        raise ValueError(f'Unknown vars: {", ".join(sorted(unknown))}')
+    return sections, variables or list(HOURLY_VARIABLES)
+
+
+def weather_variables(sections, variables):
+    """(hourly_vars, daily_vars) to fetch from Open-Meteo for a selection"""
+    hourly_vars = list(variables) if "hourly" in sections else []
+    if "current" in sections or "forecast_tomorrow" in sections:
+        hourly_vars += [name for name in CURRENT_VARIABLES if name not in hourly_vars]
+    daily_vars = DAILY_VARIABLES if "daily" in sections else []
+    return hourly_vars, daily_vars
+
+
+def _decimal_to_float(obj):
+    if isinstance(obj, dict):
+        return {k: _decimal_to_float(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [_decimal_to_float(item) for item in obj]
+    elif isinstance(obj, Decimal):
+        return float(obj)
+    return obj
+
+
+def weather_payload(current, forecast, full_forecast, sections, variables, convert_decimals=True):
+    """
+    Weather forecast response body for a selection
+    
+    Args:
+        current, forecast, full_forecast: get_full_weather_forecast() results,
+            fetched with at least weather_variables(sections, variables)
+        convert_decimals: Turn Decimals into floats; binary renderers that
+            pack the raw lists themselves pass False
+    """
+    # Drop what was only fetched for other sections
+    keep = set(variables) | {"time"}
+    trimmed = {key: value for key, value in full_forecast.items() if key not in ("hourly", "daily")}
+    if "hourly" in sections:
+        trimmed["hourly"] = {
+            name: values for name, values in full_forecast.get("hourly", {}).items() if name in keep
+        }
+    if "daily" in sections:
+        trimmed["daily"] = full_forecast.get("daily", {})
+    
+    data = {}
+    if "current" in sections:
+        data["current"] = {
+            "gti": float(current["gti"]),
+            "clouds": float(current["clouds"]),
+            "rain": float(current["rain"]),
+            "temperature": float(current.get("temperature", 0))
+        }
+    if "forecast_tomorrow" in sections:
+        data["forecast_tomorrow"] = {
+            "clouds": float(forecast["clouds"]),
+            "rain": float(forecast["rain"])
+        }
+    data["forecast"] = _decimal_to_float(trimmed) if convert_decimals else trimmed
+    return data
+
+
 def calculate_pv_power(gti, panel_efficiency, system_size_kw):
     """
     Calculate PV output from GTI (Global Tilted Irradiance)
@@ -155,42 +276,62 @@ def calculate_pv_power(gti, panel_efficiency, system_size_kw):
     return round(pv_output_kw, 2)
 
 
-def get_current_soil_moisture(farm):
+def latest_reading_per_sensor(readings):
+    """
+    The newest reading of each sensor in a SensorReading queryset
+    
+    DISTINCT ON on PostgreSQL, a ROW_NUMBER() window elsewhere.
+    """
+    from django.db import connection
+    from django.db.models import F, Window
+    from django.db.models.functions import RowNumber
+    
+    if connection.vendor == 'postgresql':
+        return readings.order_by('sensor_id', '-timestamp').distinct('sensor_id')
+    return readings.annotate(
+        position=Window(
+            expression=RowNumber(),
+            partition_by=[F('sensor_id')],
+            order_by=F('timestamp').desc(),
+        )
+    ).filter(position=1)
+
+
+def get_current_soil_moisture(farm, exclude_flagged=True):
     """
     Get the most recent soil moisture reading from sensors
     Returns average soil moisture percentage, or None if no sensors
+    
+    Sensors flagged by anomaly detection (stuck, spiking, out of range) are
+    left out of the average unless exclude_flagged is False.
     """
-    from sensors.models import Sensor, SensorReading, SensorType
+    from sensors.models import SensorReading, decode_value
+    from sensors.topology import find_sensor_type, get_farm_topology
     
     try:
-        # Get soil moisture sensor type
-        soil_moisture_type = SensorType.objects.filter(
-            name__icontains='Soil Moisture',
-            category='soil'
-        ).first()
+        # Get soil moisture sensor type (cached in-process)
+        soil_moisture_type = find_sensor_type('Soil Moisture', category='soil')
         
         if not soil_moisture_type:
             return None
         
-        # Get all active soil moisture sensors for this farm
-        sensors = Sensor.objects.filter(
-            farm=farm,
-            sensor_type=soil_moisture_type,
-            is_active=True
+        # Get all active soil moisture sensors for this farm (cached in-process)
+        sensors = get_farm_topology(farm.id).sensors_of_type(
+            soil_moisture_type.id, exclude_flagged=exclude_flagged
         )
         
-        if not sensors.exists():
+        if not sensors:
             return None
         
-        # Get most recent reading from each sensor and average them
-        moisture_values = []
-        for sensor in sensors:
-            latest_reading = SensorReading.objects.filter(
-                sensor=sensor
-            ).order_by('-timestamp').first()
-            
-            if latest_reading:
-                moisture_values.append(float(latest_reading.value))
+        # Get most recent reading from each sensor (one query) and average them
+        latest = latest_reading_per_sensor(
+            SensorReading.objects.filter(sensor_id__in=[sensor.id for sensor in sensors])
+        )
+        moisture_values = [
+            decode_value(value, value_scaled, soil_moisture_type.value_scale)
+            for value, value_scaled in latest.values_list('value', 'value_scaled')
+        ]
+        moisture_values = [value for value in moisture_values if value is not None]
         
         if moisture_values:
             return sum(moisture_values) / len(moisture_values)
@@ -203,6 +344,51 @@ def get_current_soil_moisture(farm):
         return None
 
 
+def get_fleet_soil_moisture(farm_ids=None, exclude_flagged=True):
+    """
+    Current average soil moisture for many farms from a single query
+    
+    Takes the latest reading of every active soil moisture sensor
+    (latest_reading_per_sensor) and averages per farm, so a
+    fleet refresh does not run get_current_soil_moisture once per farm.
+    
+    Args:
+        farm_ids: Farms to include (default: every active farm)
+        exclude_flagged: Skip sensors currently flagged as anomalous
+    
+    Returns:
+        Dict of farm_id -> average soil moisture; farms without readings are absent
+    """
+    from sensors.models import SensorReading, decode_value
+    from sensors.topology import find_sensor_type
+    
+    soil_moisture_type = find_sensor_type('Soil Moisture', category='soil')
+    if not soil_moisture_type:
+        return {}
+    
+    readings = SensorReading.objects.filter(
+        sensor__sensor_type_id=soil_moisture_type.id,
+        sensor__is_active=True,
+    )
+    if farm_ids is None:
+        readings = readings.filter(farm__is_active=True)
+    else:
+        readings = readings.filter(farm_id__in=list(farm_ids))
+    if exclude_flagged:
+        readings = readings.filter(sensor__anomaly='')
+    
+    totals = {}
+    for farm_id, value, value_scaled in latest_reading_per_sensor(readings).values_list('farm_id', 'value', 'value_scaled'):
+        moisture = decode_value(value, value_scaled, soil_moisture_type.value_scale)
+        if moisture is None:
+            continue
+        total = totals.setdefault(farm_id, [0.0, 0])
+        total[0] += moisture
+        total[1] += 1
+    
+    return {farm_id: total / count for farm_id, (total, count) in totals.items()}
+
+
 def forecast_battery_next_hour(current_pv, forecast_pv, current_battery_level, battery_capacity_kwh, current_load):
     """
     Forecast if battery can reach 20% in the next hour
@@ -218,7 +404,7 @@ def forecast_battery_next_hour(current_pv, forecast_pv, current_battery_level, b
         (can_reach_20: bool, forecasted_level: float)
     """
     # Calculate net power for next hour
-    net_power = forecast_pv - current_load
+    net_power = Decimal(str(forecast_pv)) - Decimal(str(current_load))
     
     # Calculate battery change
     battery_kwh = (battery_capacity_kwh * Decimal(str(current_battery_level))) / Decimal('100')
@@ -300,7 +486,10 @@ def automation_logic(current, forecast, battery_level, soil_moisture=None, hourl
                 # Check if we can charge to 20% in next hour
                 # This will be handled in update_farm_status with actual farm config
                 irrigation = False
-                reason = f"Battery low ({battery_level:.1f}%) and soil moisture ({soil_moisture:.1f}%) acceptable. Checking forecast..."
+                if soil_moisture is not None:
+                    reason = f"Battery low ({battery_level:.1f}%) and soil moisture ({soil_moisture:.1f}%) acceptable. Checking forecast..."
+                else:
+                    reason = f"Battery low ({battery_level:.1f}%) and no soil moisture data. Checking forecast..."
                 priority = "normal"
         else:
             # Battery is sufficient
@@ -321,8 +510,10 @@ def automation_logic(current, forecast, battery_level, soil_moisture=None, hourl
                 if irrigation_critical:
                     reason = f"Critical: Low soil moisture ({soil_moisture:.1f}%). Irrigation activated."
                     priority = "critical"
-                else:
+                elif soil_moisture is not None:
                     reason = f"Soil moisture ({soil_moisture:.1f}%) below optimal. Irrigation activated."
+                else:
+                    reason = "Dry conditions and no soil moisture data. Irrigation activated."
                     priority = "normal"
     else:
         # Irrigation not needed (soil moisture is adequate)
@@ -356,6 +547,8 @@ def calculate_hourly_load(irrigation, hour_of_day, domestic_base=DOMESTIC_LOAD_B
     - Critical (Irrigation): On when needed
     - Non-essential (Water treatment, Grid): Only when excess power available
     """
+    domestic_base = Decimal(str(domestic_base))
+    
     # Base domestic load varies by time of day (Essential - always on)
     if 22 <= hour_of_day or hour_of_day < 6:
         # Night: minimal usage
@@ -471,29 +664,46 @@ def simulate_energy_flow(pv_kw, irrigation, battery_level, battery_capacity_kwh,
     return new_level, float(battery_kwh), float(total_load), float(domestic_load), float(irrigation_load), float(water_treatment_load)
 
 
-def update_farm_status(farm):
-    """Update system status for a farm"""
+def fetch_status_weather(farm):
+    """Open-Meteo hourly response with the variables update_farm_status reads"""
     import logging
     logger = logging.getLogger(__name__)
     
-    # Get or create status
-    status, created = SystemStatus.objects.get_or_create(farm=farm)
-    
-    # Fetch weather data (returns current, tomorrow, and full forecast)
-    hourly_url, daily_url = fetch_weather_data(farm, forecast_days=7)
+    # Only the variables the decision reads; the daily summary is not used here
+    hourly_url, _ = fetch_weather_data(farm, forecast_days=7, hourly_vars=CURRENT_VARIABLES, daily_vars=[])
     
     logger.info(f"Fetching weather for {farm.name} from Open Meteo")
     logger.debug(f"Hourly URL: {hourly_url}")
     
+    hourly_response = http_session().get(hourly_url, timeout=10)
+    hourly_response.raise_for_status()
+    return hourly_response.json()
+
+
+def update_farm_status(farm, soil_moisture_snapshot=None, hourly_data=None):
+    """
+    Update system status for a farm
+    
+    Args:
+        farm: Farm to update
+        soil_moisture_snapshot: Optional {farm_id: soil moisture} from
+            get_fleet_soil_moisture; fleet refreshes pass it so sensors are not
+            queried per farm
+        hourly_data: Optional fetch_status_weather() response to use instead
+            of fetching one, so neighbouring farms can share a request
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+    
+    # Get or create status
+    status = get_farm_status(farm)
+    
+    # Fetch weather data (returns current, tomorrow, and full forecast)
+    hourly = {}
+    
     try:
-        # Get hourly and daily data
-        hourly_response = requests.get(hourly_url, timeout=10)
-        hourly_response.raise_for_status()
-        hourly_data = hourly_response.json()
-        
-        daily_response = requests.get(daily_url, timeout=10)
-        daily_response.raise_for_status()
-        daily_data = daily_response.json()
+        if hourly_data is None:
+            hourly_data = fetch_status_weather(farm)
         
         hourly = hourly_data.get("hourly", {})
         
@@ -586,14 +796,17 @@ def update_farm_status(farm):
     )
     
     # Get current soil moisture from sensors
-    soil_moisture = get_current_soil_moisture(farm)
+    if soil_moisture_snapshot is not None:
+        soil_moisture = soil_moisture_snapshot.get(farm.id)
+    else:
+        soil_moisture = get_current_soil_moisture(farm)
     
     # Get current hour for load calculation
     from datetime import datetime
     current_hour = datetime.utcnow().hour
     
     # Get hourly forecast for next hour prediction
-    hourly_forecast = full_forecast.get('hourly', {})
+    hourly_forecast = hourly
     # Find current hour index in forecast
     times = hourly_forecast.get('time', [])
     current_hour_index = None
@@ -680,7 +893,7 @@ def update_farm_status(farm):
     logger.info(
         f"Status updated: PV={pv_kw}kW, Battery={new_battery_level}%, "
         f"Irrigation={'ON' if irrigation else 'OFF'}, "
-        f"Soil Moisture={soil_moisture:.1f}% if available, "
+        f"Soil Moisture={f'{soil_moisture:.1f}%' if soil_moisture is not None else 'n/a'}, "
         f"Load={total_load:.2f}kW (Domestic:{domestic_load:.2f}, Irrigation:{irrigation_load:.2f}, Water:{water_treatment_load:.2f})"
     )
     
@@ -0,0 +1,137 @@
+"""
+Celery tasks for scheduled fleet refreshes
+Beat runs refresh_fleet, which groups active farms into grid cells and fans
+out one rate-limited refresh_cell task per cell (farms in a cell share one
+Open-Meteo request). A chord rebuilds the fleet summary once every cell has
+finished. update_all_farms remains the way to refresh without a worker.
+Cells claim their farms through the same leases as update_all_farms --shared
+(see automation.leasing), so a farm is refreshed, and its battery integrated,
+once per round even when beat and the cron command both run.
+"""
+import logging
+import math
+
+import requests
+from celery import chord, shared_task
+from django.conf import settings
+
+from farms.fleet import rebuild_fleet_summary
+from farms.models import Farm
+from .leasing import claim_farms, complete_farms, current_round, ensure_leases, release_farms, worker_name
+from .services import fetch_status_weather, get_fleet_soil_moisture, update_farm_status
+
+logger = logging.getLogger(__name__)
+
+
+def group_farms_by_cell(cell_degrees=None):
+    """
+    Active farm ids grouped by forecast cell
+
+    Farms share a cell when their coordinates round to the same
+    cell_degrees square and their panels face the same way, since the tilted
+    irradiance depends on tilt and azimuth. A cell size of 0 puts every farm
+    in its own cell.
+
+    Returns:
+        List of farm id lists, one per cell
+    """
+    if cell_degrees is None:
+        cell_degrees = settings.FLEET_REFRESH_CELL_DEGREES
+
+    cells = {}
+    farms = Farm.objects.filter(is_active=True).order_by('id').values_list(
+        'id', 'latitude', 'longitude', 'tilt', 'azimuth', 'timezone'
+    )
+    for farm_id, latitude, longitude, tilt, azimuth, timezone in farms:
+        if cell_degrees:
+            key = (
+                math.floor(float(latitude) / cell_degrees),
+                math.floor(float(longitude) / cell_degrees),
+                tilt, azimuth, timezone
+            )
+        else:
+            key = farm_id
+        cells.setdefault(key, []).append(farm_id)
+    return list(cells.values())
+
+
+@shared_task
+def refresh_fleet():
+    """Fan out one refresh_cell per forecast cell, then rebuild the fleet summary"""
+    cells = group_farms_by_cell()
+    if not cells:
+        return None
+    ensure_leases()
+    refresh_round = current_round()
+    logger.info(f"Refreshing {sum(len(cell) for cell in cells)} farms in {len(cells)} cells")
+    result = chord(refresh_cell.s(farm_ids, refresh_round) for farm_ids in cells)(finish_fleet_refresh.s())
+    return result.id
+
+
+@shared_task(
+    rate_limit=settings.OPEN_METEO_RATE_LIMIT,
+    autoretry_for=(requests.RequestException,),
+    retry_backoff=True,
+    max_retries=3,
+    bind=True,
+)
+def refresh_cell(self, farm_ids, refresh_round=None):
+    """
+    Refresh the farms of one forecast cell from a single Open-Meteo request
+
+    Only farms this task can lease for refresh_round are refreshed; farms
+    already refreshed in the round, or leased by another refresher, are
+    skipped. A failed request releases the leases and is retried with backoff;
+    once the retries run out every claimed farm is counted as an error, so the
+    chord still completes. Errors in individual farms are counted and logged
+    without failing the cell; those farms keep their lease until it expires.
+    """
+    if refresh_round is None:
+        refresh_round = current_round()
+    holder = worker_name()
+    claimed = claim_farms(holder, refresh_round, batch_size=len(farm_ids), farm_ids=farm_ids)
+    farms = list(Farm.objects.filter(id__in=claimed).select_related('status').order_by('id'))
+    if not farms:
+        return {'farms': 0, 'updated': 0, 'errors': 0}
+
+    try:
+        hourly_data = fetch_status_weather(farms[0])
+    except requests.RequestException as e:
+        # The retry, or another refresher, claims the farms again
+        release_farms(holder, claimed)
+        if self.request.retries < self.max_retries:
+            raise
+        logger.error(f"Giving up on cell of {farms[0].name} after {self.max_retries} retries: {str(e)}")
+        return {'farms': len(farms), 'updated': 0, 'errors': len(farms)}
+    soil_moisture = get_fleet_soil_moisture(farm_ids=[farm.id for farm in farms])
+
+    refreshed = []
+    errors = 0
+    for farm in farms:
+        try:
+            update_farm_status(farm, soil_moisture_snapshot=soil_moisture, hourly_data=hourly_data)
+            refreshed.append(farm.id)
+        except Exception as e:
+            errors += 1
+            logger.error(f"Error refreshing {farm.name}: {str(e)}")
+    complete_farms(holder, refreshed, refresh_round)
+    return {'farms': len(farms), 'updated': len(refreshed), 'errors': errors}
+
+
+@shared_task
+def finish_fleet_refresh(results):
+    """Chord callback: rebuild the fleet summary and total the cell results"""
+    # Statuses already update the summary incrementally; the rebuild corrects
+    # any drift once per refresh
+    rebuild_fleet_summary()
+    totals = {
+        'cells': len(results),
+        'farms': sum(result['farms'] for result in results),
+        'updated': sum(result['updated'] for result in results),
+        'errors': sum(result['errors'] for result in results),
+    }
+    logger.info(
+        f"Fleet refresh complete: {totals['updated']} updated, {totals['errors']} errors "
+        f"in {totals['cells']} cells"
+    )
+    return totals
@@ -0,0 +1,83 @@
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+import requests
+from django.test import TestCase
+
+from climexa import celery_app
+from farms.models import Farm, FleetCounter, SystemStatus, User
+from .leasing import claim_farms, current_round, ensure_leases
+from .models import FarmLease
+
+HOURLY = {'hourly': {'time': [], 'global_tilted_irradiance': [], 'cloud_cover': [], 'precipitation': []}}
+
+
+@skipUnless(celery_app, 'Celery is not installed')
+class FleetRefreshPipelineTests(TestCase):
+    """refresh_fleet end to end on the in-memory broker, with tasks run eagerly"""
+
+    @classmethod
+    def setUpTestData(cls):
+        farmer = User.objects.create_user(username='farmer', password='pass', role='farmer')
+        # Two neighbours sharing a forecast cell and one farm on its own
+        cls.farms = [
+            Farm.objects.create(name=name, farmer=farmer, latitude=Decimal(lat), longitude=Decimal(lon))
+            for name, lat, lon in [
+                ('Farm 1', '-1.281', '36.811'),
+                ('Farm 2', '-1.282', '36.812'),
+                ('Farm 3', '10.000', '10.000'),
+            ]
+        ]
+        for farm in cls.farms:
+            SystemStatus.objects.create(farm=farm)
+
+    def setUp(self):
+        # The app read CELERY_* settings when it was configured, and the
+        # namespaced key takes precedence, so it is the one switched here
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf['CELERY_TASK_ALWAYS_EAGER'] = True
+        self.addCleanup(celery_app.conf.__setitem__, 'CELERY_TASK_ALWAYS_EAGER', eager)
+
+    def refresh(self, fetch=None):
+        """Run refresh_fleet; returns the update_farm_status mock"""
+        from . import tasks
+
+        with mock.patch.object(tasks, 'fetch_status_weather', fetch or mock.Mock(return_value=HOURLY)), \
+                mock.patch.object(tasks, 'update_farm_status') as update:
+            tasks.refresh_fleet.delay()
+        return update
+
+    def refreshed_farm_ids(self, update):
+        return sorted(call.args[0].id for call in update.call_args_list)
+
+    def test_refreshes_every_farm_once_per_round(self):
+        fetch = mock.Mock(return_value=HOURLY)
+        update = self.refresh(fetch)
+        # One forecast request per cell
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(self.refreshed_farm_ids(update), [farm.id for farm in self.farms])
+        self.assertEqual(FleetCounter.objects.get(name='farms').value, 3)
+        self.assertFalse(FarmLease.objects.exclude(refresh_round=current_round()).exists())
+
+        # Nothing is left to claim in the same round
+        self.assertEqual(self.refresh().call_count, 0)
+
+    def test_skips_farms_leased_by_another_refresher(self):
+        ensure_leases()
+        claim_farms('cron-host:1', current_round(), farm_ids=[self.farms[0].id])
+        update = self.refresh()
+        self.assertEqual(self.refreshed_farm_ids(update), [farm.id for farm in self.farms[1:]])
+
+    def test_failed_cell_still_rebuilds_summary(self):
+        from .tasks import refresh_cell
+
+        fetch = mock.Mock(side_effect=requests.ConnectionError('Open-Meteo is down'))
+        # Eager tasks cannot retry inside a chord, so every attempt is the last
+        with mock.patch.object(refresh_cell, 'max_retries', 0):
+            update = self.refresh(fetch)
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(update.call_count, 0)
+        # The chord callback ran, and the farms are free for the next refresher
+        self.assertEqual(FleetCounter.objects.get(name='farms').value, 3)
+        self.assertFalse(FarmLease.objects.exclude(holder='').exists())
+        self.assertFalse(FarmLease.objects.filter(refresh_round=current_round()).exists())
@@ -1,12 +1,16 @@
-from decimal import Decimal
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from farms.models import Farm, SystemStatus
-from .services import update_farm_status, get_full_weather_forecast
+from .services import (
+    update_farm_status, get_full_weather_forecast, get_fleet_soil_moisture,
+    parse_weather_selection, weather_variables, weather_payload
+)
 from .ai_service import generate_farmer_suggestions
+from .renderers import ColumnarForecastRenderer
 
 
 @api_view(['POST'])
@@ -32,12 +36,13 @@ def update_all_statuses(request):
     if request.user.role not in ['climexa_staff', 'admin']:
         return Response({'error': 'Unauthorized'}, status=403)
     
-    farms = Farm.objects.filter(is_active=True)
+    farms = Farm.objects.filter(is_active=True).select_related('status')
     updated = []
+    soil_moisture = get_fleet_soil_moisture()
     
     for farm in farms:
         try:
-            status = update_farm_status(farm)
+            status = update_farm_status(farm, soil_moisture_snapshot=soil_moisture)
             updated.append({
                 'farm_id': farm.id,
                 'farm_name': farm.name,
@@ -59,8 +64,20 @@ def update_all_statuses(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarForecastRenderer])
 def weather_forecast(request, farm_id):
-    """Get 7-day weather forecast for a farm from Open Meteo"""
+    """
+    Get 7-day weather forecast for a farm from Open Meteo
+    
+    ?format=columnar (or Accept: application/vnd.climexa.columnar) returns the
+    hourly data as float32 columns instead of JSON lists (see automation.renderers)
+    
+    Optional query params:
+        fields: Comma-separated sections of WEATHER_SECTIONS (default: all)
+        vars: Comma-separated hourly variables of HOURLY_VARIABLES (default: all)
+    
+    Only the Open-Meteo variables the selection needs are requested.
+    """
     farm = get_object_or_404(Farm, id=farm_id)
     
     # Check permissions
@@ -68,31 +85,23 @@ def weather_forecast(request, farm_id):
         return Response({'error': 'Unauthorized'}, status=403)
     
     try:
-        current, forecast, full_forecast = get_full_weather_forecast(farm, forecast_days=7)
-        
-        # Convert Decimal to float for JSON serialization
-        def decimal_to_float(obj):
-            if isinstance(obj, dict):
-                return {k: decimal_to_float(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [decimal_to_float(item) for item in obj]
-            elif isinstance(obj, Decimal):
-                return float(obj)
-            return obj
+        sections, variables = parse_weather_selection(
+            request.query_params.get('fields'), request.query_params.get('vars')
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    hourly_vars, daily_vars = weather_variables(sections, variables)
+    
+    try:
+        current, forecast, full_forecast = get_full_weather_forecast(
+            farm, forecast_days=7, hourly_vars=hourly_vars, daily_vars=daily_vars
+        )
         
-        return Response({
-            'current': {
-                'gti': float(current['gti']),
-                'clouds': float(current['clouds']),
-                'rain': float(current['rain']),
-                'temperature': float(current.get('temperature', 0))
-            },
-            'forecast_tomorrow': {
-                'clouds': float(forecast['clouds']),
-                'rain': float(forecast['rain'])
-            },
-            'forecast': decimal_to_float(full_forecast)
-        })
+        # The columnar renderer packs the raw lists itself
+        columnar = request.accepted_renderer.format == ColumnarForecastRenderer.format
+        return Response(weather_payload(
+            current, forecast, full_forecast, sections, variables, convert_decimals=not columnar
+        ))
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
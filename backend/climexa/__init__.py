@@ -0,0 +1,8 @@
+# Load the Celery app with Django so @shared_task binds to it. Celery is only
+# needed by workers; without it, refreshes still run through update_all_farms.
+try:
+    from .celery import app as celery_app
+except ImportError:  # pragma: no cover - depends on the environment
+    celery_app = None
+
+__all__ = ('celery_app',)
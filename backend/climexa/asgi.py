@@ -0,0 +1,18 @@
+"""
+ASGI config for climexa project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serve with an ASGI server (e.g. uvicorn climexa.asgi:application) to use the
+Server-Sent Events stream at /api/stream/.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'climexa.settings')
+
+application = get_asgi_application()
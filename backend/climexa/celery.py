@@ -0,0 +1,15 @@
+"""
+Celery application for the climexa project
+Configured from Django settings (CELERY_* names); tasks are discovered in
+each app's tasks.py. Run a worker with beat with:
+    celery -A climexa worker -B -l info
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'climexa.settings')
+
+app = Celery('climexa')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
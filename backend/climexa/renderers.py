@@ -0,0 +1,73 @@
+"""
+Fast JSON rendering and parsing for the REST API
+Drop-in replacements for DRF's JSONRenderer and JSONParser backed by orjson.
+orjson is optional: without it both classes behave exactly like DRF's.
+"""
+import math
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer on orjson, producing the same output as DRF's
+
+    Dates and times go through DRF's encoder, so they are formatted exactly
+    as DRF formats them; NaN and Infinity are rejected under STRICT_JSON
+    (orjson would write null) and U+2028/U+2029 are escaped. The one
+    difference left is that any requested indent is two spaces.
+    Configurations orjson cannot produce (UNICODE_JSON or COMPACT_JSON off)
+    use DRF's renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        renderer_context = renderer_context or {}
+        # orjson only indents by two spaces; any requested indent gets that
+        if self.get_indent(accepted_media_type, renderer_context):
+            options |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=options)
+        # orjson writes non-finite floats as null, so only output with a null
+        # can hide one
+        if self.strict and b'null' in ret:
+            _check_finite(data)
+        # Same as DRF: these are valid JSON but not valid JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def _check_finite(data):
+    """Raise ValueError, like json.dumps(allow_nan=False), if data holds NaN or Infinity"""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                raise ValueError('Out of range float values are not JSON compliant')
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser on orjson; NaN and Infinity are rejected like strict DRF parsing"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
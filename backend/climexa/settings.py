@@ -138,6 +138,104 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20
 }
 
+# JSON through orjson (climexa.renderers); the classes fall back to the
+# stdlib encoder when orjson is not installed
+FAST_JSON = config('FAST_JSON', default=True, cast=bool)
+if FAST_JSON:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'climexa.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = [
+        'climexa.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ]
+
+# Sensor readings
+# Compact mode stores new readings as integers scaled per SensorType.value_scale
+# instead of numeric(10, 4). API values are unchanged either way.
+SENSOR_READINGS_COMPACT = config('SENSOR_READINGS_COMPACT', default=False, cast=bool)
+
+# Seconds a bucketed aggregate (readings/aggregate/) is served from cache
+SENSOR_AGGREGATE_CACHE_SECONDS = config('SENSOR_AGGREGATE_CACHE_SECONDS', default=60, cast=int)
+# Longest window (hours) readings/aggregate/ accepts
+SENSOR_AGGREGATE_MAX_HOURS = config('SENSOR_AGGREGATE_MAX_HOURS', default=24 * 365, cast=int)
+
+# Seconds the in-process sensor type / farm topology cache trusts an entry.
+# Signals and flag changes invalidate it immediately, in every process when the
+# cache is shared (REDIS_URL); the TTL bounds staleness otherwise.
+SENSOR_TOPOLOGY_TTL = config('SENSOR_TOPOLOGY_TTL', default=300, cast=int)
+
+# Seconds a process serves the fleet summary from cache before re-reading the
+# counters; saves in the same process invalidate it immediately
+FLEET_SUMMARY_CACHE_SECONDS = config('FLEET_SUMMARY_CACHE_SECONDS', default=30, cast=int)
+
+# Live event stream (/api/stream/, farms.events)
+LIVE_EVENTS_HISTORY = config('LIVE_EVENTS_HISTORY', default=5000, cast=int)  # Events kept for resume tokens
+LIVE_EVENTS_MAX_QUEUE = config('LIVE_EVENTS_MAX_QUEUE', default=1000, cast=int)  # Per connection
+LIVE_EVENTS_HEARTBEAT_SECONDS = config('LIVE_EVENTS_HEARTBEAT_SECONDS', default=15, cast=int)
+LIVE_EVENTS_RETRY_MS = config('LIVE_EVENTS_RETRY_MS', default=3000, cast=int)
+LIVE_EVENTS_MAX_CONNECTION_SECONDS = config('LIVE_EVENTS_MAX_CONNECTION_SECONDS', default=300, cast=int)
+
+# Cache invalidation (farm versions, fleet summary) only reaches other
+# processes through a shared cache; without REDIS_URL each process keeps its
+# own local-memory cache and relies on the TTLs above
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# Upper bound on how long a versioned per-farm response (farms.cache) is kept;
+# version bumps invalidate it earlier. Bumps from cron, Celery or gateway
+# processes only reach the web workers through a shared cache, so without
+# REDIS_URL responses are not cached (0) unless configured explicitly.
+FARM_RESPONSE_CACHE_SECONDS = config('FARM_RESPONSE_CACHE_SECONDS', default=300 if REDIS_URL else 0, cast=int)
+
+# Live events cross processes through a Redis stream when REDIS_URL is set;
+# the in-process broker only reaches streams served by the publishing process
+LIVE_EVENTS_BROKER = config(
+    'LIVE_EVENTS_BROKER',
+    default='farms.events.RedisBroker' if REDIS_URL else 'farms.events.InProcessBroker'
+)
+LIVE_EVENTS_STREAM = config('LIVE_EVENTS_STREAM', default='climexa:live-events')
+
+# Celery (scheduled fleet refreshes, see automation.tasks)
+# Without a broker URL tasks use the in-memory broker, which only reaches a
+# worker in the same process: set CELERY_TASK_ALWAYS_EAGER for tests and
+# local runs, or point CELERY_BROKER_URL / REDIS_URL at a real broker.
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default=REDIS_URL or 'memory://')
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default=REDIS_URL or 'cache+memory://')
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TIMEZONE = TIME_ZONE
+
+# Minutes between beat-scheduled fleet refreshes
+FLEET_REFRESH_MINUTES = config('FLEET_REFRESH_MINUTES', default=30, cast=int)
+# Farms whose coordinates fall in the same cell of this many degrees (and
+# share tilt, azimuth and timezone) share one forecast request; 0 refreshes
+# every farm separately
+FLEET_REFRESH_CELL_DEGREES = config('FLEET_REFRESH_CELL_DEGREES', default=0.1, cast=float)
+# Celery rate limit for Open-Meteo requests, per worker process
+OPEN_METEO_RATE_LIMIT = config('OPEN_METEO_RATE_LIMIT', default='60/m')
+# Shared refreshes (update_all_farms --shared) claim farms in batches of
+# FLEET_LEASE_BATCH; each lease is renewed as its farm starts, and one not
+# renewed or completed within FLEET_LEASE_SECONDS, e.g. because its worker
+# crashed, is reclaimed by the next worker
+FLEET_LEASE_BATCH = config('FLEET_LEASE_BATCH', default=50, cast=int)
+FLEET_LEASE_SECONDS = config('FLEET_LEASE_SECONDS', default=300, cast=int)
+
+CELERY_BEAT_SCHEDULE = {
+    'refresh-fleet': {
+        'task': 'automation.tasks.refresh_fleet',
+        'schedule': FLEET_REFRESH_MINUTES * 60,
+    },
+}
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
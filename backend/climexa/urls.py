@@ -4,6 +4,7 @@ URL configuration for climexa project.
 from django.contrib import admin
 from django.urls import path, include
 from farms.auth_views import login_view, logout_view, current_user, csrf_token
+from farms.stream_views import farm_events
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -11,6 +12,7 @@ urlpatterns = [
     path('api/auth/login/', login_view, name='login'),
     path('api/auth/logout/', logout_view, name='logout'),
     path('api/auth/user/', current_user, name='current-user'),
+    path('api/stream/', farm_events, name='farm-events'),
     path('api/farmer/', include('farms.urls')),
     path('api/climexa/', include('farms.climexa_urls')),
     path('api/sensors/', include('sensors.urls')),
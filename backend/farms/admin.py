@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Farm, SystemStatus
+from .models import User, Farm, SystemStatus, Alert
 
 
 @admin.register(User)
@@ -22,3 +22,10 @@ class SystemStatusAdmin(admin.ModelAdmin):
     list_filter = ['irrigation_on', 'last_updated']
     search_fields = ['farm__name']
 
+
+
+@admin.register(Alert)
+class AlertAdmin(admin.ModelAdmin):
+    list_display = ['farm', 'alert_type', 'severity', 'message', 'opened_at', 'resolved_at']
+    list_filter = ['alert_type', 'severity', 'resolved_at']
+    search_fields = ['farm__name']
@@ -0,0 +1,122 @@
+"""
+Incremental farm alert evaluation
+Each SystemStatus save re-checks only that farm's rules (see farms.signals), so
+the staff alerts endpoint reads open Alert rows instead of scanning the fleet.
+Rules open at one threshold and clear at a stricter one, so a value hovering
+around the limit does not open and resolve an alert on every update.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .events import publish
+from .models import Alert
+
+
+class AlertRule:
+    """
+    Args:
+        alert_type: Alert.alert_type this rule manages
+        severity: Severity recorded when the alert opens
+        triggered: status -> bool, opens the alert
+        cleared: status -> bool, resolves an open alert
+        message: status -> str, kept current while the alert is open
+    """
+
+    def __init__(self, alert_type, severity, triggered, cleared, message):
+        self.alert_type = alert_type
+        self.severity = severity
+        self.triggered = triggered
+        self.cleared = cleared
+        self.message = message
+
+
+def _value(number):
+    return Decimal(str(number)) if number is not None else Decimal('0')
+
+
+ALERT_RULES = [
+    AlertRule(
+        'low_battery', 'high',
+        triggered=lambda status: _value(status.battery_level) < 20,
+        cleared=lambda status: _value(status.battery_level) >= 25,
+        message=lambda status: f'Battery level is {status.battery_level}%',
+    ),
+    AlertRule(
+        'pv_issue', 'medium',
+        # No PV generation during the day
+        triggered=lambda status: _value(status.pv_output_kw) < Decimal('0.1') and _value(status.gti) > 100,
+        cleared=lambda status: _value(status.pv_output_kw) >= Decimal('0.2') or _value(status.gti) <= 50,
+        message=lambda status: 'Low PV output despite good irradiance',
+    ),
+]
+
+
+def _alert_payload(alert, state):
+    return {
+        'id': alert.id,
+        'state': state,
+        'type': alert.alert_type,
+        'severity': alert.severity,
+        'message': alert.message,
+        'opened_at': alert.opened_at,
+        'resolved_at': alert.resolved_at,
+    }
+
+
+def evaluate_status(status, open_alerts=None):
+    """
+    Open, update or resolve one farm's alerts for its current status
+
+    Args:
+        status: The farm's SystemStatus
+        open_alerts: Optional {alert_type: Alert} of the farm's open alerts,
+            for callers that already loaded them
+    """
+    if open_alerts is None:
+        open_alerts = {
+            alert.alert_type: alert
+            for alert in Alert.objects.filter(farm_id=status.farm_id, resolved_at__isnull=True)
+        }
+
+    for rule in ALERT_RULES:
+        alert = open_alerts.get(rule.alert_type)
+        if alert is None:
+            if rule.triggered(status):
+                try:
+                    with transaction.atomic():
+                        alert = Alert.objects.create(
+                            farm_id=status.farm_id,
+                            alert_type=rule.alert_type,
+                            severity=rule.severity,
+                            message=rule.message(status),
+                        )
+                except IntegrityError:
+                    # A concurrent save opened it first
+                    continue
+                publish(status.farm_id, 'alert', lambda: _alert_payload(alert, 'opened'))
+        elif rule.cleared(status):
+            alert.resolved_at = timezone.now()
+            alert.save(update_fields=['resolved_at', 'updated_at'])
+            publish(status.farm_id, 'alert', lambda: _alert_payload(alert, 'resolved'))
+        else:
+            message = rule.message(status)
+            if message != alert.message:
+                alert.message = message
+                alert.save(update_fields=['message', 'updated_at'])
+                publish(status.farm_id, 'alert', lambda: _alert_payload(alert, 'updated'))
+
+
+def evaluate_statuses(statuses):
+    """Evaluate many statuses, loading their open alerts in one query (for backfills)"""
+    statuses = list(statuses)
+    open_alerts = {}
+    for alert in Alert.objects.filter(
+        farm_id__in=[status.farm_id for status in statuses],
+        resolved_at__isnull=True
+    ):
+        open_alerts.setdefault(alert.farm_id, {})[alert.alert_type] = alert
+
+    for status in statuses:
+        evaluate_status(status, open_alerts.get(status.farm_id, {}))
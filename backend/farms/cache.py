@@ -0,0 +1,62 @@
+"""
+Versioned per-farm response cache
+Each farm has a version number in the cache that is bumped whenever data shown
+on its dashboard changes (status saves, new readings, sensor or farm edits).
+Responses are stored under (farm, version), so a bump makes every older entry
+unreachable without deleting it, and polls between bumps are served from the
+cache alone. FARM_RESPONSE_CACHE_SECONDS = 0 turns response caching off.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _version_key(farm_id):
+    return f'farm-version:{farm_id}'
+
+
+def _new_version():
+    # Starting from the clock keeps a re-created version key (after eviction or
+    # a restart of a local cache) from reusing numbers that older entries used
+    return int(time.time() * 1000)
+
+
+def get_farm_version(farm_id):
+    """Current cache version of a farm"""
+    key = _version_key(farm_id)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        # add() so two processes starting a version at once agree on it
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_farm_versions(farm_ids):
+    """Invalidate every cached response of these farms"""
+    for farm_id in set(farm_ids):
+        try:
+            cache.incr(_version_key(farm_id))
+        except ValueError:
+            cache.set(_version_key(farm_id), _new_version(), None)
+
+
+def get_farm_response(name, farm_id):
+    """Cached response for the farm's current version, or None"""
+    if not settings.FARM_RESPONSE_CACHE_SECONDS:
+        return None
+    return cache.get(f'farm-{name}:{farm_id}:{get_farm_version(farm_id)}')
+
+
+def set_farm_response(name, farm_id, version, value):
+    """
+    Cache a response built for a given version
+
+    Pass the version read before building, so a bump that lands mid-build
+    leaves the result under the old, already unreachable key.
+    """
+    if not settings.FARM_RESPONSE_CACHE_SECONDS:
+        return
+    cache.set(f'farm-{name}:{farm_id}:{version}', value, settings.FARM_RESPONSE_CACHE_SECONDS)
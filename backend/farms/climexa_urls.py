@@ -1,10 +1,15 @@
 from django.urls import path
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg
+from decimal import Decimal, InvalidOperation
+from django.db.models import Q
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import Farm, SystemStatus
+from .models import Farm, Alert, get_farm_status
+from .fleet import get_fleet_summary
+from .conditional import farm_validators
+from .projection import project_queryset, requested_fields
 from .serializers import FarmListSerializer, SystemStatusSerializer
 from sensors.models import SensorReading
 
@@ -12,43 +17,108 @@ from sensors.models import SensorReading
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def dashboard(request):
-    """Climexa company dashboard - overview of all farms"""
+    """Climexa company dashboard - fleet summary (farms are listed by farm_list)"""
     if request.user.role not in ['climexa_staff', 'admin']:
         return Response({'error': 'Unauthorized'}, status=403)
     
-    farms = Farm.objects.filter(is_active=True)
+    return Response({'summary': get_fleet_summary()})
+
+
+class FarmListPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+# ?ordering= values and the fields they sort on
+FARM_ORDERING = {
+    'name': 'name',
+    'farmer': 'farmer__username',
+    'battery_level': 'status__battery_level',
+    'pv_output_kw': 'status__pv_output_kw',
+    'created_at': 'created_at',
+}
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def farm_list(request):
+    """
+    Paginated farm list for the Climexa dashboard
     
-    # Get summary statistics
-    total_farms = farms.count()
-    active_irrigation = farms.filter(status__irrigation_on=True).count()
+    Optional query params:
+        search: Farm name or farmer username contains
+        is_active: 'true' (default), 'false' or 'all'
+        irrigation: 'on' or 'off'
+        battery_min / battery_max: Battery level bounds (%)
+        ordering: One of FARM_ORDERING, '-' prefix for descending (default: name)
+        fields: Comma-separated farm fields to return
+        page / page_size: Pagination
+    """
+    if request.user.role not in ['climexa_staff', 'admin']:
+        return Response({'error': 'Unauthorized'}, status=403)
     
-    # Average battery level
-    avg_battery = farms.aggregate(
-        avg_battery=Avg('status__battery_level')
-    )['avg_battery'] or 0
+    params = request.query_params
+    fields = requested_fields(request)
+    farms = project_queryset(
+        FarmListSerializer.setup_eager_loading(Farm.objects.all()), FarmListSerializer, fields
+    )
     
-    # Get all farms with status
-    farms_data = FarmListSerializer(farms, many=True).data
+    is_active = params.get('is_active', 'true')
+    if is_active in ('true', 'false'):
+        farms = farms.filter(is_active=is_active == 'true')
+    elif is_active != 'all':
+        return Response({'error': 'is_active must be true, false or all'}, status=400)
     
-    return Response({
-        'summary': {
-            'total_farms': total_farms,
-            'active_irrigation': active_irrigation,
-            'average_battery_level': round(float(avg_battery), 2) if avg_battery else 0
-        },
-        'farms': farms_data
-    })
+    search = params.get('search', '').strip()
+    if search:
+        farms = farms.filter(Q(name__icontains=search) | Q(farmer__username__icontains=search))
+    
+    irrigation = params.get('irrigation')
+    if irrigation in ('on', 'off'):
+        farms = farms.filter(status__irrigation_on=irrigation == 'on')
+    elif irrigation:
+        return Response({'error': 'irrigation must be on or off'}, status=400)
+    
+    try:
+        if params.get('battery_min'):
+            farms = farms.filter(status__battery_level__gte=Decimal(params['battery_min']))
+        if params.get('battery_max'):
+            farms = farms.filter(status__battery_level__lte=Decimal(params['battery_max']))
+    except InvalidOperation:
+        return Response({'error': 'battery_min and battery_max must be numbers'}, status=400)
+    
+    ordering = params.get('ordering', 'name')
+    field = FARM_ORDERING.get(ordering.lstrip('-'))
+    if field is None:
+        return Response(
+            {'error': f'ordering must be one of: {", ".join(FARM_ORDERING)} (prefix - for descending)'},
+            status=400
+        )
+    descending = ordering.startswith('-')
+    # id breaks ties so pages never overlap
+    farms = farms.order_by(f'-{field}' if descending else field, '-id' if descending else 'id')
+    
+    paginator = FarmListPagination()
+    page = paginator.paginate_queryset(farms, request)
+    return paginator.get_paginated_response(FarmListSerializer(page, many=True, fields=fields).data)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def farm_detail(request, farm_id):
-    """Get detailed information about a specific farm"""
+    """Get detailed information about a specific farm (supports ETag / If-Modified-Since)"""
     if request.user.role not in ['climexa_staff', 'admin']:
         return Response({'error': 'Unauthorized'}, status=403)
     
-    farm = get_object_or_404(Farm, id=farm_id)
-    status_obj, created = SystemStatus.objects.get_or_create(farm=farm)
+    validators = farm_validators('climexa-detail', farm_id)
+    if validators is not None:
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+    
+    farm = get_object_or_404(Farm.objects.select_related('farmer', 'status'), id=farm_id)
+    status_obj = get_farm_status(farm)
     
     from farms.serializers import FarmSerializer
     from sensors.models import SensorReading
@@ -56,14 +126,15 @@ def farm_detail(request, farm_id):
     
     # Get latest sensor readings
     latest_readings = SensorReading.objects.filter(
-        sensor__farm=farm
-    ).order_by('-timestamp')[:20]
+        farm=farm
+    ).select_related('sensor__sensor_type', 'farm').order_by('-timestamp')[:20]
     
-    return Response({
+    response = Response({
         'farm': FarmSerializer(farm).data,
         'status': SystemStatusSerializer(status_obj).data,
         'recent_sensor_readings': SensorReadingSerializer(latest_readings, many=True).data
     })
+    return validators.apply(response) if validators is not None else response
 
 
 @api_view(['GET'])
@@ -73,41 +144,36 @@ def alerts(request):
     if request.user.role not in ['climexa_staff', 'admin']:
         return Response({'error': 'Unauthorized'}, status=403)
     
-    farms = Farm.objects.filter(is_active=True)
-    alerts_list = []
-    
-    for farm in farms:
-        status_obj, created = SystemStatus.objects.get_or_create(farm=farm)
-        farm_alerts = []
-        
-        # Low battery alert
-        if status_obj.battery_level < 20:
-            farm_alerts.append({
-                'type': 'low_battery',
-                'message': f'Battery level is {status_obj.battery_level}%',
-                'severity': 'high'
-            })
-        
-        # No PV generation during day
-        if status_obj.pv_output_kw < 0.1 and status_obj.gti > 100:
-            farm_alerts.append({
-                'type': 'pv_issue',
-                'message': 'Low PV output despite good irradiance',
-                'severity': 'medium'
-            })
-        
-        if farm_alerts:
-            alerts_list.append({
-                'farm_id': farm.id,
-                'farm_name': farm.name,
-                'alerts': farm_alerts
-            })
+    # Alerts are maintained as statuses are saved (farms.alerts), so this is
+    # a single read of the open rows
+    open_alerts = Alert.objects.filter(
+        resolved_at__isnull=True,
+        farm__is_active=True
+    ).select_related('farm').order_by('farm_id', 'opened_at')
+    
+    alerts_by_farm = {}
+    for alert in open_alerts:
+        entry = alerts_by_farm.get(alert.farm_id)
+        if entry is None:
+            entry = alerts_by_farm[alert.farm_id] = {
+                'farm_id': alert.farm_id,
+                'farm_name': alert.farm.name,
+                'alerts': []
+            }
+        entry['alerts'].append({
+            'type': alert.alert_type,
+            'message': alert.message,
+            'severity': alert.severity,
+            'opened_at': alert.opened_at
+        })
+    alerts_list = list(alerts_by_farm.values())
     
     return Response({'alerts': alerts_list})
 
 
 urlpatterns = [
     path('dashboard/', dashboard, name='climexa-dashboard'),
+    path('farms/', farm_list, name='climexa-farm-list'),
     path('farms/<int:farm_id>/', farm_detail, name='climexa-farm-detail'),
     path('alerts/', alerts, name='climexa-alerts'),
 ]
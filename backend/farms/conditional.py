@@ -0,0 +1,74 @@
+"""
+Conditional GET support for per-farm endpoints
+Validators come from one indexed query (farm, status and latest reading
+timestamps) plus the farm's cache version, so a poll that has not changed
+is answered with 304 Not Modified before any payload is built.
+"""
+import hashlib
+
+from django.db.models import F, OuterRef, Subquery
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_farm_version
+from .models import Farm
+
+
+class FarmValidators:
+    """ETag and Last-Modified of one farm endpoint"""
+
+    def __init__(self, farmer_id, etag, last_modified):
+        self.farmer_id = farmer_id
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def not_modified(self, request):
+        """304 response if the client's copy is current, otherwise None"""
+        return get_conditional_response(
+            request,
+            etag=self.etag,
+            last_modified=int(self.last_modified.timestamp()) if self.last_modified else None,
+        )
+
+    def apply(self, response):
+        """Add the validators to a full response"""
+        response['ETag'] = self.etag
+        if self.last_modified:
+            response['Last-Modified'] = http_date(self.last_modified.timestamp())
+        # Let browsers keep the body but revalidate on every poll
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+def farm_validators(name, farm_id, include_readings=True, version=None):
+    """
+    Validators for a farm endpoint, or None if the farm does not exist
+
+    Args:
+        name: Endpoint name, so different payloads never share an ETag
+        farm_id: Farm id
+        include_readings: Whether the payload shows sensor readings, making a
+            new reading a change
+        version: The farm's cache version, if the caller already read it
+    """
+    fields = ['farmer_id', 'updated_at', 'status_updated']
+    farms = Farm.objects.filter(id=farm_id).annotate(status_updated=F('status__last_updated'))
+    if include_readings:
+        from sensors.models import SensorReading
+
+        latest = SensorReading.objects.filter(farm_id=OuterRef('pk')).order_by('-timestamp')
+        farms = farms.annotate(latest_reading=Subquery(latest.values('timestamp')[:1]))
+        fields.append('latest_reading')
+
+    row = farms.values_list(*fields).first()
+    if row is None:
+        return None
+
+    farmer_id, *timestamps = row
+    if version is None:
+        version = get_farm_version(farm_id)
+    tag = ':'.join([name, str(farm_id), str(version)] + [
+        moment.isoformat() if moment else '' for moment in timestamps
+    ])
+    last_modified = max((moment for moment in timestamps if moment), default=None)
+    return FarmValidators(farmer_id, quote_etag(hashlib.md5(tag.encode()).hexdigest()), last_modified)
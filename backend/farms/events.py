@@ -0,0 +1,340 @@
+"""
+Live farm events (status changes, new readings, alerts) for push clients
+Publishers call publish() from any thread, and events go out once the
+publishing transaction commits; the SSE view (farms.stream_views) subscribes
+per connection. The broker is chosen by settings.LIVE_EVENTS_BROKER:
+RedisBroker when REDIS_URL is set, so events published by cron, Celery and
+gateway processes reach every ASGI worker; otherwise InProcessBroker, which
+only reaches subscribers in the publishing process.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+try:
+    import redis
+except ImportError:  # Only needed for RedisBroker
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class Event:
+    """One published event; id is the resume token clients send back"""
+    __slots__ = ('id', 'seq', 'farm_id', 'type', 'data')
+
+    def __init__(self, epoch, seq, farm_id, event_type, data):
+        self.id = f'{epoch}-{seq}'
+        self.seq = seq
+        self.farm_id = farm_id
+        self.type = event_type
+        self.data = data
+
+    def encode(self):
+        """Event in text/event-stream framing"""
+        payload = json.dumps({'farm_id': self.farm_id, **self.data}, cls=DjangoJSONEncoder)
+        return f'id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n'
+
+
+class Subscription:
+    """
+    One client connection's view of the broker
+
+    Attributes:
+        farm_ids: Farms delivered to this subscriber (None for every farm)
+        backlog: Events replayed from history for a resume token
+        reset: True if the resume token could not be honoured and the client
+            must reload its state
+        queue: asyncio.Queue of live events, filled from any thread
+    """
+
+    def __init__(self, farm_ids, loop, max_queue):
+        self.farm_ids = farm_ids
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.backlog = []
+        self.reset = False
+
+    def wants(self, farm_id):
+        return self.farm_ids is None or farm_id in self.farm_ids
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client this far behind resynchronises from a fresh load
+            self.reset = True
+
+    def deliver(self, event):
+        """Hand an event to the subscriber's event loop (thread-safe)"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Loop already closed; the connection is going away
+            pass
+
+
+class BaseBroker:
+    """Interface every live event broker implements"""
+
+    def publish(self, farm_id, event_type, build_data):
+        """
+        Publish an event
+
+        Args:
+            farm_id: Farm the event belongs to
+            event_type: 'status', 'reading' or 'alert'
+            build_data: Callable returning the payload dict; brokers may skip
+                calling it when nobody is subscribed to the farm
+        """
+        raise NotImplementedError
+
+    def publish_many(self, events):
+        """Publish (farm_id, event_type, build_data) tuples; brokers may batch them"""
+        for farm_id, event_type, build_data in events:
+            self.publish(farm_id, event_type, build_data)
+
+    def subscribe(self, farm_ids=None, last_event_id=None, loop=None):
+        """
+        Subscription delivering to loop (default: the running event loop),
+        replaying events after last_event_id
+
+        May block on I/O, so async callers pass their loop and call it from a
+        worker thread.
+        """
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """
+    Fan-out to subscribers in this process, with a bounded replay history
+
+    Resume tokens are "<epoch>-<sequence>". The epoch changes every time the
+    process starts, so a token from an earlier process, or one older than the
+    history, produces a reset instead of a silent gap. Payloads are only built
+    while someone subscribes to the farm; events published without one are
+    kept as empty markers, so a client resuming across them is reset too.
+    """
+
+    def __init__(self, history=None, max_queue=None):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.history = deque(maxlen=history or settings.LIVE_EVENTS_HISTORY)
+        self.max_queue = max_queue or settings.LIVE_EVENTS_MAX_QUEUE
+        self.subscribers = set()
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, farm_id, event_type, build_data):
+        # Sequence and recipients are fixed together, so a concurrent
+        # subscriber either receives the event or finds it in the history
+        with self._lock:
+            event = Event(self.epoch, next(self._counter), farm_id, event_type, None)
+            self.history.append(event)
+            targets = [sub for sub in self.subscribers if sub.wants(farm_id)]
+        if not targets:
+            return event
+        event.data = build_data()
+        for subscription in targets:
+            subscription.deliver(event)
+        return event
+
+    def subscribe(self, farm_ids=None, last_event_id=None, loop=None):
+        subscription = Subscription(farm_ids, loop or asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            if last_event_id:
+                self._replay(subscription, last_event_id)
+            self.subscribers.add(subscription)
+        return subscription
+
+    def _replay(self, subscription, last_event_id):
+        epoch, _, seq = last_event_id.partition('-')
+        try:
+            seq = int(seq)
+        except ValueError:
+            subscription.reset = True
+            return
+        oldest = self.history[0].seq if self.history else None
+        # Anything between the token and the oldest kept event is lost
+        if epoch != self.epoch or (oldest is not None and seq < oldest - 1):
+            subscription.reset = True
+            return
+        backlog = [
+            event for event in self.history if event.seq > seq and subscription.wants(event.farm_id)
+        ]
+        if any(event.data is None for event in backlog):
+            subscription.reset = True
+        else:
+            subscription.backlog = backlog
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self.subscribers.discard(subscription)
+
+
+def _stream_id(event_id):
+    """Redis stream id 'ms-seq' as a comparable tuple, or None if malformed"""
+    ms, _, seq = event_id.partition('-')
+    try:
+        return int(ms), int(seq)
+    except ValueError:
+        return None
+
+
+class RedisBroker(BaseBroker):
+    """
+    Fan-out across processes through a Redis stream
+
+    publish() appends to a stream capped near LIVE_EVENTS_HISTORY entries, from
+    any process. Each process with subscribers runs one listener thread that
+    blocks on XREAD and hands new entries to its local subscriptions. Stream
+    ids are the resume tokens, so replay is an XRANGE after the token; a token
+    older than the kept history produces a reset. Publishers cannot see
+    subscribers in other processes, so payloads are always built. Live events
+    are best effort: a Redis outage is logged, never raised to publishers.
+    """
+
+    def __init__(self, url=None, stream=None, history=None, max_queue=None):
+        if redis is None:
+            raise ImproperlyConfigured('RedisBroker requires the redis package.')
+        self.client = redis.Redis.from_url(url or settings.REDIS_URL, decode_responses=True)
+        self.stream = stream or settings.LIVE_EVENTS_STREAM
+        self.history = history or settings.LIVE_EVENTS_HISTORY
+        self.max_queue = max_queue or settings.LIVE_EVENTS_MAX_QUEUE
+        self.subscribers = set()
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def _event(self, entry_id, fields):
+        ms, seq = _stream_id(entry_id)
+        return Event(ms, seq, int(fields['farm']), fields['type'], json.loads(fields['data']))
+
+    def publish(self, farm_id, event_type, build_data):
+        self.publish_many([(farm_id, event_type, build_data)])
+
+    def publish_many(self, events):
+        # One round trip for the whole batch
+        pipeline = self.client.pipeline(transaction=False)
+        for farm_id, event_type, build_data in events:
+            pipeline.xadd(
+                self.stream,
+                {
+                    'farm': farm_id,
+                    'type': event_type,
+                    'data': json.dumps(build_data(), cls=DjangoJSONEncoder),
+                },
+                maxlen=self.history,
+                approximate=True,
+            )
+        try:
+            pipeline.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Live event publish failed: {str(e)}")
+
+    def subscribe(self, farm_ids=None, last_event_id=None, loop=None):
+        subscription = Subscription(farm_ids, loop or asyncio.get_running_loop(), self.max_queue)
+        subscription.after = None
+        # The listener delivers under the same lock, so it cannot slip an
+        # event in between the replay and the registration
+        with self._lock:
+            if last_event_id:
+                try:
+                    self._replay(subscription, last_event_id)
+                except redis.RedisError as e:
+                    logger.warning(f"Live event replay failed: {str(e)}")
+                    subscription.reset = True
+            self.subscribers.add(subscription)
+            if self._listener is None:
+                # Continue where the replay stopped, or from the stream's end
+                start = '%d-%d' % subscription.after if subscription.after else self._last_id()
+                self._listener = threading.Thread(target=self._listen, args=(start,), daemon=True)
+                self._listener.start()
+        return subscription
+
+    def _last_id(self):
+        try:
+            entries = self.client.xrevrange(self.stream, count=1)
+        except redis.RedisError:
+            # Only entries added after the listener's first read
+            return '$'
+        return entries[0][0] if entries else '0-0'
+
+    def _replay(self, subscription, last_event_id):
+        after = _stream_id(last_event_id)
+        if after is None:
+            subscription.reset = True
+            return
+        oldest = self.client.xrange(self.stream, count=1)
+        if not oldest or _stream_id(oldest[0][0]) > after:
+            # Trimmed past the token (or the stream was dropped)
+            subscription.reset = True
+            return
+        entries = self.client.xrange(self.stream, min=f'({last_event_id}')
+        backlog = [self._event(entry_id, fields) for entry_id, fields in entries]
+        subscription.backlog = [event for event in backlog if subscription.wants(event.farm_id)]
+        # Anything up to here was replayed; the listener skips it
+        subscription.after = _stream_id(entries[-1][0]) if entries else after
+
+    def _listen(self, last_id):
+        while True:
+            try:
+                response = self.client.xread({self.stream: last_id}, count=500, block=5000)
+            except redis.RedisError as e:
+                logger.warning(f"Live event listener error: {str(e)}")
+                time.sleep(1)
+                continue
+            for _, entries in response:
+                with self._lock:
+                    for entry_id, fields in entries:
+                        last_id = entry_id
+                        event = self._event(entry_id, fields)
+                        position = _stream_id(entry_id)
+                        for subscription in self.subscribers:
+                            if subscription.wants(event.farm_id) and (
+                                subscription.after is None or position > subscription.after
+                            ):
+                                subscription.deliver(event)
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self.subscribers.discard(subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker configured by LIVE_EVENTS_BROKER"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.LIVE_EVENTS_BROKER)()
+    return _broker
+
+
+def publish(farm_id, event_type, build_data):
+    """
+    Publish an event through the configured broker (see BaseBroker.publish)
+    once the current transaction commits, so clients never see rolled back rows
+    """
+    transaction.on_commit(lambda: get_broker().publish(farm_id, event_type, build_data))
+
+
+def publish_many(events):
+    """Publish (farm_id, event_type, build_data) tuples on commit, batched where the broker can"""
+    transaction.on_commit(lambda: get_broker().publish_many(events))
@@ -0,0 +1,145 @@
+"""
+Materialized fleet summary for the Climexa dashboard
+Totals live in FleetCounter rows. Every SystemStatus save applies the
+difference between the status's old and new contribution in one UPDATE (see
+farms.signals), so reading the summary never scans the fleet. Events that
+cannot be expressed as a delta (farm activation changes, bulk loads) rebuild
+the counters with a single aggregate query. The counters cover the statuses
+of active farms; total_farms counts active farms, with or without a status.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, Exists, F, OuterRef, Q, Sum, Value, When
+
+from .models import Farm, FleetCounter, SystemStatus
+
+CACHE_KEY = 'fleet-summary'
+BATTERY_BUCKETS = 10
+BUCKET_WIDTH = 100 // BATTERY_BUCKETS
+
+# Statuses counted, the denominator of the average battery level
+FARMS = 'farms'
+IRRIGATING = 'irrigating'
+BATTERY_SUM = 'battery_level_sum'
+PV_SUM = 'pv_output_kw_sum'
+LOAD_SUM = 'load_kw_sum'
+BUCKET_NAMES = [f'battery_bucket_{i}' for i in range(BATTERY_BUCKETS)]
+COUNTER_NAMES = [FARMS, IRRIGATING, BATTERY_SUM, PV_SUM, LOAD_SUM] + BUCKET_NAMES
+
+
+def battery_bucket(level):
+    """Histogram bucket index of a battery level (0-100%)"""
+    return min(max(int(Decimal(str(level or 0)) // BUCKET_WIDTH), 0), BATTERY_BUCKETS - 1)
+
+
+def status_contribution(status):
+    """What one status adds to the fleet counters"""
+    return {
+        FARMS: Decimal('1'),
+        IRRIGATING: Decimal('1') if status.irrigation_on else Decimal('0'),
+        BATTERY_SUM: Decimal(str(status.battery_level or 0)),
+        PV_SUM: Decimal(str(status.pv_output_kw or 0)),
+        LOAD_SUM: Decimal(str(status.current_load_kw or 0)),
+        BUCKET_NAMES[battery_bucket(status.battery_level)]: Decimal('1'),
+    }
+
+
+def apply_status_change(farm_id, old, new):
+    """
+    Move the counters from one contribution of a farm's status to another
+
+    Args:
+        farm_id: Farm the status belongs to; inactive farms are not counted
+        old: Previous contribution (None for a new status)
+        new: Current contribution (None for a deleted status)
+    """
+    deltas = {}
+    for contribution, sign in ((old, -1), (new, 1)):
+        for name, amount in (contribution or {}).items():
+            deltas[name] = deltas.get(name, Decimal('0')) + sign * amount
+    deltas = {name: amount for name, amount in deltas.items() if amount}
+    if not deltas:
+        return
+
+    # One UPDATE for every changed counter, applied only while the farm is active
+    FleetCounter.objects.filter(
+        Exists(Farm.objects.filter(id=farm_id, is_active=True)),
+        name__in=list(deltas),
+    ).update(value=F('value') + Case(
+        *[When(name=name, then=Value(amount)) for name, amount in deltas.items()],
+        default=Value(Decimal('0')),
+        output_field=DecimalField(max_digits=20, decimal_places=4),
+    ))
+    cache.delete(CACHE_KEY)
+
+
+def rebuild_fleet_summary():
+    """
+    Recompute every counter from SystemStatus in one aggregate query
+
+    The counter rows are locked before the aggregate is read. A status save
+    that already updated them has then committed and is in the aggregate; one
+    that updates them later waits for the rebuild and applies its delta on top.
+    """
+    aggregates = {
+        FARMS: Count('id'),
+        IRRIGATING: Count('id', filter=Q(irrigation_on=True)),
+        BATTERY_SUM: Sum('battery_level'),
+        PV_SUM: Sum('pv_output_kw'),
+        LOAD_SUM: Sum('current_load_kw'),
+    }
+    for i, name in enumerate(BUCKET_NAMES):
+        low = i * BUCKET_WIDTH
+        in_bucket = Q(battery_level__gte=low) if i else Q()
+        if i < BATTERY_BUCKETS - 1:
+            in_bucket &= Q(battery_level__lt=low + BUCKET_WIDTH)
+        aggregates[name] = Count('id', filter=in_bucket)
+
+    with transaction.atomic():
+        list(FleetCounter.objects.select_for_update().filter(name__in=COUNTER_NAMES).values_list('id'))
+        totals = SystemStatus.objects.filter(farm__is_active=True).aggregate(**aggregates)
+        # Upsert rather than delete and recreate, so the locked rows survive
+        FleetCounter.objects.bulk_create(
+            [FleetCounter(name=name, value=totals[name] or 0) for name in COUNTER_NAMES],
+            update_conflicts=True, unique_fields=['name'], update_fields=['value'],
+        )
+    cache.delete(CACHE_KEY)
+
+
+def forget_fleet_summary():
+    """Drop the cached summary, e.g. after a farm was created or deleted"""
+    cache.delete(CACHE_KEY)
+
+
+def get_fleet_summary():
+    """Fleet totals, irrigation count, battery histogram and PV totals"""
+    summary = cache.get(CACHE_KEY)
+    if summary is not None:
+        return summary
+
+    counters = dict(FleetCounter.objects.values_list('name', 'value'))
+    if set(COUNTER_NAMES) - set(counters):
+        rebuild_fleet_summary()
+        counters = dict(FleetCounter.objects.values_list('name', 'value'))
+
+    statuses = int(counters[FARMS])
+    summary = {
+        'total_farms': Farm.objects.filter(is_active=True).count(),
+        'active_irrigation': int(counters[IRRIGATING]),
+        'average_battery_level': round(float(counters[BATTERY_SUM]) / statuses, 2) if statuses else 0,
+        'total_pv_output_kw': round(float(counters[PV_SUM]), 2),
+        'total_load_kw': round(float(counters[LOAD_SUM]), 2),
+        'battery_histogram': [
+            {
+                'min': i * BUCKET_WIDTH,
+                'max': (i + 1) * BUCKET_WIDTH,
+                'count': int(counters[name]),
+            }
+            for i, name in enumerate(BUCKET_NAMES)
+        ],
+    }
+    cache.set(CACHE_KEY, summary, settings.FLEET_SUMMARY_CACHE_SECONDS)
+    return summary
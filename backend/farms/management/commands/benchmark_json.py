@@ -0,0 +1,129 @@
+"""
+Management command to benchmark API JSON rendering and parsing
+Compares DRF's stdlib JSONRenderer/JSONParser with the orjson-backed classes
+in climexa.renderers on payloads built from the database.
+Run with: python manage.py benchmark_json --rows 500 --repeat 20
+"""
+import io
+import math
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from climexa.renderers import ORJSONParser, ORJSONRenderer, orjson
+from farms.models import Farm, SystemStatus
+from farms.serializers import FarmListSerializer, SystemStatusSerializer
+from sensors.models import SensorReading
+from sensors.serializers import SensorReadingSerializer
+
+HOURLY_VARIABLES = [
+    'temperature_2m', 'precipitation', 'cloud_cover', 'shortwave_radiation',
+    'direct_radiation', 'diffuse_radiation', 'direct_normal_irradiance',
+    'global_tilted_irradiance', 'relative_humidity_2m', 'soil_moisture_0_1cm',
+    'soil_moisture_1_3cm', 'soil_moisture_3_9cm', 'soil_temperature_6cm',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the stdlib and orjson JSON renderers and parsers on real API payloads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=500,
+            help='Rows per list payload (default: 500, the farm list maximum page size)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Timed runs per payload; the best run is reported (default: 20)',
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed; pip install orjson to compare renderers.')
+        rows = options['rows']
+        repeat = max(1, options['repeat'])
+
+        payloads = self._build_payloads(rows)
+        if not payloads:
+            raise CommandError('No data found. Please run: python manage.py provision_fleet')
+
+        self.stdout.write(
+            f'{"payload":<18}{"bytes":>10}{"render std":>12}{"orjson":>10}{"speedup":>9}'
+            f'{"parse std":>12}{"orjson":>10}{"speedup":>9}'
+        )
+        for name, data in payloads:
+            encoded = JSONRenderer().render(data)
+            render_std = self._best(lambda: JSONRenderer().render(data), repeat)
+            render_fast = self._best(lambda: ORJSONRenderer().render(data), repeat)
+            parse_std = self._best(lambda: JSONParser().parse(io.BytesIO(encoded)), repeat)
+            parse_fast = self._best(lambda: ORJSONParser().parse(io.BytesIO(encoded)), repeat)
+            self.stdout.write(
+                f'{name:<18}{len(encoded):>10}'
+                f'{render_std * 1000:>10.2f}ms{render_fast * 1000:>8.2f}ms{render_std / render_fast:>8.1f}x'
+                f'{parse_std * 1000:>10.2f}ms{parse_fast * 1000:>8.2f}ms{parse_std / parse_fast:>8.1f}x'
+            )
+        self.stdout.write(self.style.SUCCESS('\nBenchmark complete (best of %d runs)' % repeat))
+
+    def _best(self, func, repeat):
+        best = math.inf
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    def _build_payloads(self, rows):
+        """(name, data) pairs shaped exactly as the API views return them"""
+        payloads = []
+
+        farms = FarmListSerializer.setup_eager_loading(Farm.objects.order_by('id'))[:rows]
+        if farms:
+            payloads.append(('farm list', {
+                'count': Farm.objects.count(), 'next': None, 'previous': None,
+                'results': FarmListSerializer(farms, many=True).data,
+            }))
+
+        statuses = SystemStatusSerializer.setup_eager_loading(SystemStatus.objects.order_by('id'))[:rows]
+        if statuses:
+            payloads.append(('system statuses', SystemStatusSerializer(statuses, many=True).data))
+
+        readings = SensorReading.objects.select_related('sensor__sensor_type', 'farm').order_by('-timestamp')[:rows]
+        if readings:
+            payloads.append(('sensor readings', {
+                'next': None, 'previous': None,
+                'results': SensorReadingSerializer(readings, many=True).data,
+            }))
+
+        if payloads:
+            # Forecasts come from Open-Meteo, so only their shape is real here
+            payloads.append(('weather forecast', self._forecast_payload()))
+        return payloads
+
+    def _forecast_payload(self):
+        rng = random.Random(42)
+        start = timezone.now().replace(minute=0, second=0, microsecond=0)
+        hours = 7 * 24
+        hourly = {'time': [(start + timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M') for i in range(hours)]}
+        for name in HOURLY_VARIABLES:
+            hourly[name] = [round(rng.uniform(0, 900), 2) for _ in range(hours)]
+        return {
+            'current': {'gti': 512.0, 'clouds': 40.0, 'rain': 0.0, 'temperature': 24.5},
+            'forecast_tomorrow': {'clouds': 35.0, 'rain': 1.2},
+            'forecast': {
+                'hourly': hourly,
+                'daily': {'time': hourly['time'][::24], 'temperature_2m_max': [28.5] * 7},
+                'timezone': 'Africa/Nairobi',
+                'utc_offset_seconds': 10800,
+                'latitude': -1.29,
+                'longitude': 36.82,
+            },
+        }
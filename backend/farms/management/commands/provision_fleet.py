@@ -0,0 +1,192 @@
+"""
+Management command to provision a synthetic fleet for scale testing
+Creates farmers, spatially clustered farms with realistic system sizes,
+SystemStatus rows and the standard sensor set, all through bulk inserts.
+Run with: python manage.py provision_fleet --farms 10000 --seed 42
+"""
+import math
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from farms.models import User, Farm, SystemStatus
+from sensors.models import SensorType
+from sensors.management.commands.install_farm_sensors import install_sensors
+from farms.fleet import rebuild_fleet_summary
+
+
+# Regional centres farms cluster around (lat, lon)
+REGION_CENTRES = [
+    (-1.2921, 36.8219),   # Nairobi
+    (0.3476, 32.5825),    # Kampala
+    (-6.7924, 39.2083),   # Dar es Salaam
+    (9.0320, 38.7469),    # Addis Ababa
+    (-15.3875, 28.3228),  # Lusaka
+    (-17.8252, 31.0335),  # Harare
+    (12.6392, -8.0029),   # Bamako
+    (14.7167, -17.4677),  # Dakar
+]
+
+# (system size kW, battery hours of storage) tiers and their weights
+SYSTEM_TIERS = [
+    ((5, 20), (4, 8), 0.45),      # Smallholder
+    ((20, 80), (6, 10), 0.35),    # Co-operative
+    ((80, 250), (8, 12), 0.20),   # Commercial
+]
+
+
+class Command(BaseCommand):
+    help = 'Provision N synthetic farmers, farms, statuses and sensors with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--farms',
+            type=int,
+            default=1000,
+            help='Number of farms to create (default: 1000)',
+        )
+        parser.add_argument(
+            '--farms-per-farmer',
+            type=int,
+            default=1,
+            help='Farms owned by each synthetic farmer (default: 1)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed, so the same arguments build the same fleet (default: 42)',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='fleet',
+            help='Username prefix identifying the synthetic fleet (default: fleet)',
+        )
+        parser.add_argument(
+            '--cluster-km',
+            type=float,
+            default=60.0,
+            help='Standard deviation of farm scatter around a region centre in km (default: 60)',
+        )
+        parser.add_argument(
+            '--no-sensors',
+            action='store_true',
+            help='Skip installing the standard sensor set',
+        )
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help='Delete an existing fleet with the same prefix first',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows per INSERT (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        farm_count = options['farms']
+        per_farmer = max(1, options['farms_per_farmer'])
+        prefix = options['prefix']
+        batch_size = options['batch_size']
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+
+        existing = User.objects.filter(username__startswith=f'{prefix}-')
+        if existing.exists():
+            if not options['replace']:
+                raise CommandError(
+                    f'A fleet with prefix "{prefix}" already exists. Use --replace or another --prefix.'
+                )
+            deleted, _ = existing.delete()
+            self.stdout.write(self.style.WARNING(f'Removed existing fleet ({deleted} rows).'))
+
+        sensor_types = {}
+        if not options['no_sensors']:
+            sensor_types = {sensor_type.name: sensor_type for sensor_type in SensorType.objects.all()}
+            if not sensor_types:
+                raise CommandError('No sensor types found. Please run: python manage.py create_sensor_types')
+
+        with transaction.atomic():
+            farmers = self._create_farmers(prefix, math.ceil(farm_count / per_farmer), batch_size)
+            self._log_step('farmers', len(farmers), started)
+
+            farms = self._create_farms(rng, prefix, farmers, farm_count, per_farmer,
+                                       options['cluster_km'], batch_size)
+            self._log_step('farms', len(farms), started)
+
+            statuses = self._create_statuses(rng, farms, batch_size)
+            self._log_step('system statuses', len(statuses), started)
+
+            if sensor_types:
+                sensors, _, _ = install_sensors(farms, sensor_types, batch_size)
+                self._log_step('sensors', len(sensors), started)
+
+        # bulk_create sends no signals, so the fleet summary is rebuilt once
+        rebuild_fleet_summary()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(f'\nComplete! Provisioned {len(farms)} farms in {elapsed:.1f}s')
+        )
+
+    def _log_step(self, label, count, started):
+        self.stdout.write(f'  Created {count} {label} ({time.perf_counter() - started:.1f}s)')
+
+    def _create_farmers(self, prefix, count, batch_size):
+        # Hashing is deliberately slow, so every synthetic farmer shares one hash
+        password = make_password(f'{prefix}-password')
+        users = [
+            User(
+                username=f'{prefix}-{i:06d}',
+                email=f'{prefix}-{i:06d}@example.com',
+                role='farmer',
+                password=password,
+            )
+            for i in range(count)
+        ]
+        return User.objects.bulk_create(users, batch_size=batch_size)
+
+    def _create_farms(self, rng, prefix, farmers, count, per_farmer, cluster_km, batch_size):
+        weights = [tier[2] for tier in SYSTEM_TIERS]
+        # 1 degree of latitude is ~111 km
+        spread = cluster_km / 111.0
+        farms = []
+        for i in range(count):
+            centre_lat, centre_lon = rng.choice(REGION_CENTRES)
+            lat = centre_lat + rng.gauss(0, spread)
+            lon = centre_lon + rng.gauss(0, spread / max(math.cos(math.radians(centre_lat)), 0.1))
+            (size_low, size_high), (hours_low, hours_high), _ = rng.choices(SYSTEM_TIERS, weights)[0]
+            system_size = rng.uniform(size_low, size_high)
+            battery = system_size * rng.uniform(hours_low, hours_high)
+
+            farms.append(Farm(
+                name=f'{prefix.title()}{i:06d} Farm',
+                farmer=farmers[i // per_farmer],
+                latitude=Decimal(f'{max(-90.0, min(90.0, lat)):.6f}'),
+                longitude=Decimal(f'{max(-180.0, min(180.0, lon)):.6f}'),
+                panel_efficiency=Decimal(f'{rng.uniform(0.16, 0.22):.2f}'),
+                system_size_kw=Decimal(f'{system_size:.2f}'),
+                battery_capacity_kwh=Decimal(f'{min(battery, 9999.0):.2f}'),
+                load_kw=Decimal(f'{max(0.5, system_size * rng.uniform(0.01, 0.04)):.2f}'),
+                tilt=rng.randint(10, 30),
+            ))
+        return Farm.objects.bulk_create(farms, batch_size=batch_size)
+
+    def _create_statuses(self, rng, farms, batch_size):
+        statuses = []
+        for farm in farms:
+            level = rng.uniform(30, 90)
+            statuses.append(SystemStatus(
+                farm=farm,
+                battery_level=Decimal(f'{level:.2f}'),
+                battery_kwh=Decimal(f'{float(farm.battery_capacity_kwh) * level / 100:.2f}'),
+                current_soil_moisture=Decimal(f'{rng.uniform(25, 65):.2f}'),
+                current_temperature=Decimal(f'{rng.uniform(15, 32):.2f}'),
+                current_humidity=Decimal(f'{rng.uniform(35, 85):.2f}'),
+            ))
+        return SystemStatus.objects.bulk_create(statuses, batch_size=batch_size)
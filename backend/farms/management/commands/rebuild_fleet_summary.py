@@ -0,0 +1,23 @@
+"""
+Management command to recompute the materialized fleet summary
+The summary is kept current incrementally; run this after raw SQL or bulk
+changes to SystemStatus, or from cron as a backstop.
+Run with: python manage.py rebuild_fleet_summary
+"""
+from django.core.management.base import BaseCommand
+from farms.fleet import rebuild_fleet_summary, get_fleet_summary
+
+
+class Command(BaseCommand):
+    help = 'Recompute the Climexa dashboard fleet summary from SystemStatus'
+
+    def handle(self, *args, **options):
+        rebuild_fleet_summary()
+        summary = get_fleet_summary()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Fleet summary rebuilt: {summary["total_farms"]} farms, '
+                f'{summary["active_irrigation"]} irrigating, '
+                f'average battery {summary["average_battery_level"]}%'
+            )
+        )
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:23
+
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def open_current_alerts(apps, schema_editor):
+    """Open alerts for statuses already in breach, since no save will trigger them"""
+    # The trigger conditions and messages of farms.alerts.ALERT_RULES as of
+    # this migration, frozen here so later rule changes cannot alter it
+    Alert = apps.get_model('farms', 'Alert')
+    SystemStatus = apps.get_model('farms', 'SystemStatus')
+
+    alerts = []
+    for farm_id, battery_level in SystemStatus.objects.filter(
+        battery_level__lt=20
+    ).values_list('farm_id', 'battery_level').iterator(chunk_size=2000):
+        alerts.append(Alert(
+            farm_id=farm_id,
+            alert_type='low_battery',
+            severity='high',
+            message=f'Battery level is {battery_level}%',
+        ))
+    for farm_id in SystemStatus.objects.filter(
+        pv_output_kw__lt=Decimal('0.1'), gti__gt=100
+    ).values_list('farm_id', flat=True).iterator(chunk_size=2000):
+        alerts.append(Alert(
+            farm_id=farm_id,
+            alert_type='pv_issue',
+            severity='medium',
+            message='Low PV output despite good irradiance',
+        ))
+    Alert.objects.bulk_create(alerts, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0003_add_irrigation_priority_and_load'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Alert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alert_type', models.CharField(choices=[('low_battery', 'Low battery'), ('pv_issue', 'PV issue')], max_length=20)),
+                ('severity', models.CharField(choices=[('high', 'High'), ('medium', 'Medium'), ('low', 'Low')], max_length=10)),
+                ('message', models.CharField(max_length=255)),
+                ('opened_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='farms.farm')),
+            ],
+            options={
+                'ordering': ['-opened_at'],
+                'indexes': [models.Index(condition=models.Q(('resolved_at__isnull', True)), fields=['farm', 'opened_at'], name='farms_alert_open_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='alert',
+            constraint=models.UniqueConstraint(condition=models.Q(('resolved_at__isnull', True)), fields=('farm', 'alert_type'), name='unique_open_alert_per_farm_type'),
+        ),
+        migrations.RunPython(open_current_alerts, migrations.RunPython.noop),
+    ]
@@ -81,6 +81,85 @@ class SystemStatus(models.Model):
     # Timestamps
     last_updated = models.DateTimeField(auto_now=True)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Values as loaded; the fleet summary delta on save is computed from
+        # them only then (see farms.signals), not for every status loaded
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
     def __str__(self):
         return f"Status for {self.farm.name}"
 
+
+
+
+class Alert(models.Model):
+    """
+    Farm alert opened and resolved incrementally as SystemStatus is saved
+    (see farms.alerts); at most one open alert per farm and type
+    """
+    TYPE_CHOICES = [
+        ('low_battery', 'Low battery'),
+        ('pv_issue', 'PV issue'),
+    ]
+    SEVERITY_CHOICES = [
+        ('high', 'High'),
+        ('medium', 'Medium'),
+        ('low', 'Low'),
+    ]
+    
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='alerts')
+    alert_type = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES)
+    message = models.CharField(max_length=255)
+    opened_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-opened_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['farm', 'alert_type'],
+                condition=models.Q(resolved_at__isnull=True),
+                name='unique_open_alert_per_farm_type',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['farm', 'opened_at'],
+                condition=models.Q(resolved_at__isnull=True),
+                name='farms_alert_open_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_alert_type_display()} for {self.farm.name}"
+
+
+
+class FleetCounter(models.Model):
+    """
+    One named running total of the materialized fleet summary (see farms.fleet),
+    adjusted in place as SystemStatus rows change
+    """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DecimalField(max_digits=20, decimal_places=4, default=0)
+    
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+def get_farm_status(farm):
+    """
+    A farm's SystemStatus, created on first use
+    Reuses the status loaded by select_related('status') instead of querying.
+    """
+    try:
+        return farm.status
+    except SystemStatus.DoesNotExist:
+        status, created = SystemStatus.objects.get_or_create(farm=farm)
+        farm.status = status
+        return status
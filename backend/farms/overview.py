@@ -0,0 +1,130 @@
+"""
+Composite farm overview: dashboard, weather, AI suggestions and sensors
+The view loads and permission-checks the farm once; sections then run
+concurrently on a thread pool and share a single Open-Meteo fetch. The body
+is newline-delimited JSON with one line per section, in completion order.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.utils import timezone
+from rest_framework.settings import api_settings
+
+from .cache import get_farm_response
+from .models import get_farm_status
+
+logger = logging.getLogger(__name__)
+
+OVERVIEW_SECTIONS = ['dashboard', 'weather', 'suggestions', 'sensors']
+
+
+def dashboard_data(farm):
+    """Dashboard body for a farm (see FarmViewSet.dashboard)"""
+    # Import here to avoid circular imports
+    from sensors.models import SensorReading
+    from sensors.serializers import SensorReadingSerializer
+    from automation.services import get_current_soil_moisture
+    from .serializers import FarmSerializer, SystemStatusSerializer
+
+    status_obj = get_farm_status(farm)
+
+    # Get latest sensor readings
+    latest_readings = SensorReading.objects.filter(
+        farm=farm
+    ).select_related('sensor__sensor_type', 'farm').order_by('-timestamp')[:10]
+
+    # Calculate average soil moisture from all soil moisture sensors
+    avg_soil_moisture = get_current_soil_moisture(farm)
+
+    return {
+        'farm': FarmSerializer(farm).data,
+        'status': SystemStatusSerializer(status_obj).data,
+        'recent_sensor_readings': SensorReadingSerializer(latest_readings, many=True).data,
+        'average_soil_moisture': float(avg_soil_moisture) if avg_soil_moisture is not None else None
+    }
+
+
+def _run(section, build):
+    try:
+        return {'section': section, 'data': build()}
+    except Exception as e:
+        # Details stay in the log; clients only learn the section is missing
+        logger.error(f"Overview section {section} failed: {str(e)}", exc_info=True)
+        return {'section': section, 'error': 'unavailable'}
+    finally:
+        # Pool threads open their own database connections
+        connections.close_all()
+
+
+def stream_overview(farm, sections, weather_sections, weather_vars):
+    """
+    Yield one rendered JSON line per section as it completes
+
+    Args:
+        farm: Farm loaded with select_related('farmer', 'status'); call
+            get_farm_status() first so no section has to create the status
+        sections: Subset of OVERVIEW_SECTIONS
+        weather_sections, weather_vars: parse_weather_selection() result
+    """
+    from automation.ai_service import generate_farmer_suggestions
+    from automation.services import (
+        get_full_weather_forecast, weather_payload, weather_variables,
+        HOURLY_VARIABLES, DAILY_VARIABLES
+    )
+    from sensors.models import Sensor
+    from sensors.serializers import SensorSerializer
+
+    def dashboard():
+        cached = get_farm_response('dashboard', farm.id)
+        return cached['data'] if cached is not None else dashboard_data(farm)
+
+    def weather():
+        current, tomorrow, full_forecast = forecast.result()
+        return weather_payload(current, tomorrow, full_forecast, weather_sections, weather_vars)
+
+    def suggestions():
+        return {
+            'suggestions': generate_farmer_suggestions(farm, farm.status, forecast.result()[2]),
+            'generated_at': timezone.now().isoformat()
+        }
+
+    def sensors():
+        queryset = SensorSerializer.setup_eager_loading(Sensor.objects.filter(farm=farm, is_active=True))
+        return SensorSerializer(queryset, many=True).data
+
+    builders = {'dashboard': dashboard, 'weather': weather, 'suggestions': suggestions, 'sensors': sensors}
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+
+    # Suggestions read the whole forecast; otherwise fetch only the weather selection
+    if 'suggestions' in sections:
+        hourly_vars, daily_vars = HOURLY_VARIABLES, DAILY_VARIABLES
+    else:
+        hourly_vars, daily_vars = weather_variables(weather_sections, weather_vars)
+
+    # One worker per section plus the shared forecast, so a section waiting
+    # on the forecast never holds the thread the forecast needs
+    with ThreadPoolExecutor(max_workers=len(sections) + 1) as pool:
+        forecast = None
+        if 'weather' in sections or 'suggestions' in sections:
+            forecast = pool.submit(get_full_weather_forecast, farm, 7, hourly_vars, daily_vars)
+        futures = [pool.submit(_run, section, builders[section]) for section in sections]
+        for future in as_completed(futures):
+            yield renderer.render(future.result()) + b'\n'
+
+
+async def aiter_lines(lines):
+    """
+    Async iterator over a blocking line generator
+
+    Django 4.2 buffers synchronous streaming content to completion under
+    ASGI, so ASGI requests are streamed through this instead.
+    """
+    iterator = iter(lines)
+    next_line = sync_to_async(next)
+    while True:
+        line = await next_line(iterator, None)
+        if line is None:
+            return
+        yield line
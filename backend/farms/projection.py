@@ -0,0 +1,154 @@
+"""
+Sparse fieldsets for API responses
+?fields=id,name,status.battery_level selects serializer fields, with dotted
+names reaching into nested blocks. project_queryset() turns the same
+selection into select_related()/only(), so unselected columns are neither
+fetched, hydrated nor serialized.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def parse_fields(value):
+    """
+    Parse a ?fields= value
+
+    Returns:
+        {'id': None, 'status': {'battery_level': None}} for
+        'id,status.battery_level' (None selects a whole field or block), or
+        None when no selection was given
+    """
+    if not value:
+        return None
+    tree = {}
+    for item in value.split(','):
+        names = [name.strip() for name in item.split('.')]
+        if not all(names):
+            continue
+        node = tree
+        for name in names[:-1]:
+            if name in node and node[name] is None:
+                # The whole block is already selected
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = None
+    return tree or None
+
+
+def requested_fields(request, param='fields'):
+    """Parsed ?fields= of a GET request; writes always get full responses"""
+    if request.method != 'GET':
+        return None
+    return parse_fields(request.query_params.get(param))
+
+
+@lru_cache(maxsize=None)
+def _declared_fields(serializer_class):
+    return serializer_class().fields
+
+
+def _check(serializer_class, fields, path=''):
+    unknown = set(fields) - set(_declared_fields(serializer_class))
+    if unknown:
+        names = ', '.join(path + name for name in sorted(unknown))
+        raise ValidationError({'error': f'Unknown fields: {names}'})
+
+
+class SparseFieldsMixin:
+    """
+    Serializer accepting fields=<parse_fields() tree>
+
+    Subclasses describe where their fields come from:
+        projection: {field: model columns} for fields not backed by a column
+            of the same name (related sources, computed values)
+        nested_fields: {field: (relation, serializer class, back reference)}
+            for nested blocks; columns the nested serializer reads through
+            the back reference are taken from the parent row instead
+    """
+    projection = {}
+    nested_fields = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.selected_fields = fields
+        if fields is None:
+            return
+        _check(type(self), fields)
+        for name in list(self.fields):
+            if name not in fields:
+                self.fields.pop(name)
+                continue
+            nested = self.fields[name]
+            if fields[name] is not None and isinstance(nested, serializers.Serializer):
+                _check(type(nested), fields[name], f'{name}.')
+                for child in set(nested.fields) - set(fields[name]):
+                    nested.fields.pop(child)
+
+    def nested_selection(self, name):
+        """Selection for a nested block built by hand (e.g. a SerializerMethodField)"""
+        if self.selected_fields is None:
+            return None
+        return self.selected_fields.get(name)
+
+
+def projected_columns(serializer_class, fields, prefix='', back=None, path=''):
+    """Model columns, as only() lookups, read by the selected fields"""
+    _check(serializer_class, fields, path)
+    model = serializer_class.Meta.model
+    projection = getattr(serializer_class, 'projection', {})
+    nested_fields = getattr(serializer_class, 'nested_fields', {})
+    columns = []
+    for name, selection in fields.items():
+        if name in nested_fields:
+            relation, nested_class, nested_back = nested_fields[name]
+            if selection is None:
+                selection = dict.fromkeys(_declared_fields(nested_class))
+            columns.extend(projected_columns(
+                nested_class, selection, f'{prefix}{relation}__', nested_back, f'{path}{name}.'
+            ))
+            continue
+
+        if name in projection:
+            names = projection[name]
+        else:
+            try:
+                model._meta.get_field(name)
+                names = (name,)
+            except FieldDoesNotExist:
+                names = ()
+        for column in names:
+            if back and column.startswith(f'{back}__'):
+                # Read through the parent row, which is already loaded
+                parent_prefix = prefix[:-len('__')].rpartition('__')[0]
+                column = column[len(back) + 2:]
+                columns.append(f'{parent_prefix}__{column}' if parent_prefix else column)
+            else:
+                columns.append(prefix + column)
+    return columns
+
+
+def project_queryset(queryset, serializer_class, fields, always=()):
+    """
+    Restrict a queryset to what the selected fields read
+
+    Joins are rebuilt from the selected columns, so relations nobody asked
+    for are not joined at all. always lists columns needed regardless of the
+    selection (ordering and pagination keys).
+    """
+    if fields is None:
+        return queryset
+    columns = set(projected_columns(serializer_class, fields)) | set(always)
+    relations = set()
+    for column in columns:
+        path = column.split('__')[:-1]
+        for depth in range(1, len(path) + 1):
+            relations.add('__'.join(path[:depth]))
+    queryset = queryset.select_related(None)
+    if relations:
+        # select_related() without arguments would follow every relation
+        queryset = queryset.select_related(*relations)
+    return queryset.only(*columns)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import User, Farm, SystemStatus
+from .projection import SparseFieldsMixin
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -9,7 +10,28 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class FarmSerializer(serializers.ModelSerializer):
+class SystemStatusSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    farm_name = serializers.CharField(source='farm.name', read_only=True)
+    
+    class Meta:
+        model = SystemStatus
+        fields = [
+            'id', 'farm', 'farm_name', 'battery_level', 'battery_kwh',
+            'pv_output_kw', 'gti', 'irrigation_on', 'irrigation_reason',
+            'irrigation_priority', 'current_load_kw', 'current_soil_moisture',
+            'current_temperature', 'current_humidity', 'current_rain',
+            'current_clouds', 'last_updated'
+        ]
+        read_only_fields = ['id', 'last_updated']
+    
+    projection = {'farm_name': ('farm__name',)}
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('farm')
+
+
+class FarmSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     farmer = UserSerializer(read_only=True)
     farmer_id = serializers.IntegerField(write_only=True, required=False)
     status = serializers.SerializerMethodField()
@@ -24,30 +46,26 @@ class FarmSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    projection = {'farmer_id': ()}
+    nested_fields = {
+        'farmer': ('farmer', UserSerializer, None),
+        'status': ('status', SystemStatusSerializer, 'farm'),
+    }
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load the farmer and status this serializer reads in the same query"""
+        return queryset.select_related('farmer', 'status')
+    
     def get_status(self, obj):
         try:
             status = obj.status
-            return SystemStatusSerializer(status).data
+            return SystemStatusSerializer(status, fields=self.nested_selection('status')).data
         except SystemStatus.DoesNotExist:
             return None
 
 
-class SystemStatusSerializer(serializers.ModelSerializer):
-    farm_name = serializers.CharField(source='farm.name', read_only=True)
-    
-    class Meta:
-        model = SystemStatus
-        fields = [
-            'id', 'farm', 'farm_name', 'battery_level', 'battery_kwh',
-            'pv_output_kw', 'gti', 'irrigation_on', 'irrigation_reason',
-            'irrigation_priority', 'current_load_kw', 'current_soil_moisture',
-            'current_temperature', 'current_humidity', 'current_rain',
-            'current_clouds', 'last_updated'
-        ]
-        read_only_fields = ['id', 'last_updated']
-
-
-class FarmListSerializer(serializers.ModelSerializer):
+class FarmListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Lightweight serializer for list views"""
     farmer_name = serializers.CharField(source='farmer.username', read_only=True)
     battery_level = serializers.DecimalField(source='status.battery_level', read_only=True, max_digits=5, decimal_places=2)
@@ -59,4 +77,13 @@ class FarmListSerializer(serializers.ModelSerializer):
             'id', 'name', 'farmer_name', 'latitude', 'longitude',
             'is_active', 'battery_level', 'irrigation_on', 'created_at'
         ]
-
+    
+    projection = {
+        'farmer_name': ('farmer__username',),
+        'battery_level': ('status__battery_level',),
+        'irrigation_on': ('status__irrigation_on',),
+    }
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('farmer', 'status')
@@ -0,0 +1,94 @@
+"""
+Signal handlers keeping alerts and the fleet summary in step with system status
+"""
+from types import SimpleNamespace
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import fleet
+from .alerts import evaluate_status
+from .cache import bump_farm_versions
+from .events import publish
+from .models import Farm, SystemStatus
+
+FLEET_FIELDS = {'battery_level', 'irrigation_on', 'pv_output_kw', 'current_load_kw'}
+
+
+def _snapshot(status):
+    # Reading a deferred field would cost a query per instance
+    if FLEET_FIELDS & status.get_deferred_fields():
+        return None
+    return fleet.status_contribution(status)
+
+
+def _previous_contribution(status):
+    """Contribution as last saved or loaded; None if unknown (new, or loaded with deferred fields)"""
+    if hasattr(status, '_fleet_contribution'):
+        return status._fleet_contribution
+    loaded = getattr(status, '_loaded_values', None)
+    if loaded is None or not FLEET_FIELDS <= loaded.keys():
+        return None
+    return fleet.status_contribution(SimpleNamespace(**loaded))
+
+
+def _status_payload(status):
+    from .serializers import SystemStatusSerializer
+
+    return SystemStatusSerializer(status).data
+
+
+@receiver(post_save, sender=SystemStatus)
+def system_status_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    evaluate_status(instance)
+    bump_farm_versions([instance.farm_id])
+    publish(instance.farm_id, 'status', lambda: _status_payload(instance))
+
+    previous = None if created else _previous_contribution(instance)
+    current = _snapshot(instance)
+    if (previous is None and not created) or current is None:
+        # Loaded with deferred fields, so the old contribution is unknown
+        transaction.on_commit(fleet.rebuild_fleet_summary)
+    else:
+        fleet.apply_status_change(instance.farm_id, previous, current)
+    instance._fleet_contribution = current
+
+
+@receiver(post_delete, sender=SystemStatus)
+def system_status_deleted(sender, instance, **kwargs):
+    previous = _previous_contribution(instance)
+    if previous is None:
+        transaction.on_commit(fleet.rebuild_fleet_summary)
+    else:
+        fleet.apply_status_change(instance.farm_id, previous, None)
+
+
+@receiver(post_init, sender=Farm)
+def farm_loaded(sender, instance, **kwargs):
+    # None when unknown (new or loaded without is_active)
+    deferred = 'is_active' in instance.get_deferred_fields()
+    instance._was_active = None if deferred or not instance.pk else instance.is_active
+
+
+@receiver(post_save, sender=Farm)
+def farm_saved(sender, instance, created, raw=False, **kwargs):
+    bump_farm_versions([instance.id])
+    # Activation changes move a whole status in or out of the summary; a new
+    # farm has no status yet
+    if not created and not raw and instance._was_active != instance.is_active:
+        transaction.on_commit(fleet.rebuild_fleet_summary)
+    elif created:
+        # The active farm count changed
+        fleet.forget_fleet_summary()
+    instance._was_active = instance.is_active
+
+
+@receiver(post_delete, sender=Farm)
+def farm_deleted(sender, instance, **kwargs):
+    # The cascaded SystemStatus delete already took the farm out of the
+    # counters; the active farm count is re-read
+    bump_farm_versions([instance.id])
+    fleet.forget_fleet_summary()
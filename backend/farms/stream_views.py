@@ -0,0 +1,113 @@
+"""
+Server-Sent Events stream of live farm events
+Requires an ASGI server (see climexa/asgi.py): under WSGI a streaming
+response with an async iterator is buffered to completion, which never
+happens for an endless stream, so WSGI requests get a 501 and the dashboards
+keep polling. Django 4.2 does not stop a streaming response
+when the client disconnects, so each stream ends after
+LIVE_EVENTS_MAX_CONNECTION_SECONDS and EventSource reconnects with its resume
+token; that bounds how long an abandoned connection holds a subscription.
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+
+from .events import get_broker
+from .models import Farm
+
+
+def _authorize(request):
+    """(user, farm_ids) for the request; farm_ids is None for every farm"""
+    user = request.user
+    if not user.is_authenticated:
+        return None, None
+
+    requested = request.GET.get('farm_id')
+    if user.role == 'farmer':
+        farms = Farm.objects.filter(farmer=user)
+    elif requested:
+        farms = Farm.objects.all()
+    else:
+        return user, None
+
+    if requested:
+        farms = farms.filter(id=requested)
+    return user, set(farms.values_list('id', flat=True))
+
+
+async def _stream(subscription):
+    broker = get_broker()
+    deadline = time.monotonic() + settings.LIVE_EVENTS_MAX_CONNECTION_SECONDS
+    try:
+        yield f'retry: {settings.LIVE_EVENTS_RETRY_MS}\n\n'
+        if subscription.reset:
+            yield 'event: reset\ndata: {}\n\n'
+            subscription.reset = False
+        for event in subscription.backlog:
+            yield event.encode()
+        subscription.backlog = []
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    timeout=min(settings.LIVE_EVENTS_HEARTBEAT_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                # Comment lines keep proxies from closing an idle connection
+                yield ': heartbeat\n\n'
+                continue
+            if subscription.reset:
+                # The queue overflowed; the client reloads instead of seeing a gap
+                yield f'id: {event.id}\nevent: reset\ndata: {{}}\n\n'
+                subscription.reset = False
+                continue
+            yield event.encode()
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def farm_events(request):
+    """
+    Live status, reading and alert events for the farms the user can see
+
+    Optional query params:
+        farm_id: Only this farm
+        last_event_id: Resume token, for clients that cannot send the
+            Last-Event-ID header
+
+    Events: 'status', 'reading' and 'alert' carry JSON payloads; 'reset' means
+    the resume token could not be honoured and the client should reload.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Live events require an ASGI server'}, status=501)
+    if request.GET.get('farm_id') and not request.GET['farm_id'].isdigit():
+        return JsonResponse({'error': 'farm_id must be an integer'}, status=400)
+
+    user, farm_ids = await sync_to_async(_authorize)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if farm_ids is not None and not farm_ids and request.GET.get('farm_id'):
+        return JsonResponse({'error': 'Farm not found'}, status=404)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    # Subscribing may block on the broker (a Redis replay), so it runs in a
+    # worker thread and delivers to this loop
+    subscription = await sync_to_async(get_broker().subscribe, thread_sensitive=False)(
+        farm_ids, last_event_id, asyncio.get_running_loop()
+    )
+
+    response = StreamingHttpResponse(_stream(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
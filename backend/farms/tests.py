@@ -0,0 +1,97 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from farms.models import Farm, SystemStatus, User
+from sensors.models import Sensor, SensorReading, SensorType
+from sensors.topology import invalidate_sensor_types
+
+
+class FarmViewQueryBudgetTests(APITestCase):
+    """Farm list, detail and dashboard run a fixed number of queries, whatever the farm and sensor counts"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.farmer = User.objects.create_user(username='farmer', password='pass', role='farmer')
+        cls.staff = User.objects.create_user(username='staff', password='pass', role='climexa_staff')
+        cls.soil_type = SensorType.objects.create(name='Soil Moisture', category='soil', unit='%')
+        cls.temperature_type = SensorType.objects.create(name='Soil Temperature', category='soil', unit='°C')
+        cls.farm = cls.create_farm('Farm 1')
+
+    @classmethod
+    def create_farm(cls, name, sensors=2, readings=3):
+        farm = Farm.objects.create(
+            name=name, farmer=cls.farmer,
+            latitude=Decimal('-1.286389'), longitude=Decimal('36.817223')
+        )
+        SystemStatus.objects.create(farm=farm)
+        cls.add_sensors(farm, sensors, readings)
+        return farm
+
+    @classmethod
+    def add_sensors(cls, farm, sensors, readings):
+        now = timezone.now()
+        start = farm.sensors.count()
+        for i in range(start, start + sensors):
+            sensor_type = cls.soil_type if i % 2 == 0 else cls.temperature_type
+            sensor = Sensor.objects.create(farm=farm, sensor_type=sensor_type, name=f'{farm.name} sensor {i}')
+            for hour in range(readings):
+                SensorReading.objects.create(
+                    sensor=sensor, farm=farm, value=Decimal('40') + hour,
+                    timestamp=now - timedelta(hours=hour)
+                )
+
+    def setUp(self):
+        self.reset_caches()
+
+    def reset_caches(self):
+        # Dashboards are cached per farm version and sensor topology per
+        # process; budgets are for cold caches
+        cache.clear()
+        invalidate_sensor_types()
+
+    def count_queries(self, user, url):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assert_constant_queries(self, user, url, budget):
+        """url runs budget queries before and after the fleet and the farm's sensors grow"""
+        self.assertEqual(self.count_queries(user, url), budget)
+        for i in range(2, 6):
+            self.create_farm(f'Farm {i}', sensors=4, readings=5)
+        self.add_sensors(self.farm, sensors=4, readings=5)
+        self.reset_caches()
+        with self.assertNumQueries(budget):
+            self.client.get(url)
+
+    def test_farm_list_as_farmer(self):
+        # Paginated: COUNT plus one page query with farmer and status joined
+        self.assert_constant_queries(self.farmer, '/api/farmer/farms/', 2)
+
+    def test_farm_list_as_staff(self):
+        self.assert_constant_queries(self.staff, '/api/farmer/farms/', 2)
+
+    def test_farm_detail(self):
+        self.assert_constant_queries(self.farmer, f'/api/farmer/farms/{self.farm.id}/', 1)
+
+    def test_farm_dashboard(self):
+        # Validators, farm, sensor types, farm topology, latest soil moisture
+        # per sensor in one query, recent readings
+        self.assert_constant_queries(self.farmer, f'/api/farmer/farms/{self.farm.id}/dashboard/', 6)
+
+    @override_settings(FARM_RESPONSE_CACHE_SECONDS=300)
+    def test_cached_dashboard_runs_no_queries(self):
+        url = f'/api/farmer/farms/{self.farm.id}/dashboard/'
+        self.count_queries(self.farmer, url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
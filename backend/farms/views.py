@@ -2,8 +2,14 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Farm, SystemStatus
+from .models import Farm, get_farm_status
+from .cache import get_farm_response, get_farm_version, set_farm_response
+from .conditional import farm_validators
+from .overview import OVERVIEW_SECTIONS, aiter_lines, dashboard_data, stream_overview
+from .projection import project_queryset, requested_fields
 from .serializers import FarmSerializer, SystemStatusSerializer, FarmListSerializer
 
 
@@ -13,56 +19,145 @@ class FarmViewSet(viewsets.ModelViewSet):
     serializer_class = FarmSerializer
     
     def get_queryset(self):
-        """Farmers can only see their own farms"""
+        """Farmers can only see their own farms (?fields= limits the columns loaded)"""
+        queryset = Farm.objects.select_related('farmer', 'status')
+        fields = requested_fields(self.request)
+        if fields is not None:
+            if self.action == 'status':
+                queryset = project_queryset(queryset, FarmSerializer, {'status': fields})
+            elif self.action in ('list', 'retrieve'):
+                queryset = project_queryset(queryset, self.get_serializer_class(), fields)
         if self.request.user.role == 'farmer':
-            queryset = Farm.objects.filter(farmer=self.request.user)
-            # Debug logging
-            print(f"DEBUG: User {self.request.user.username} (ID: {self.request.user.id}) requesting farms")
-            print(f"DEBUG: Found {queryset.count()} farms")
-            return queryset
-        return Farm.objects.all()
+            return queryset.filter(farmer=self.request.user)
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'list':
             return FarmListSerializer
         return FarmSerializer
     
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', requested_fields(self.request))
+        return super().get_serializer(*args, **kwargs)
+    
     def perform_create(self, serializer):
         serializer.save(farmer=self.request.user)
     
+    def _can_view(self, farmer_id):
+        """Same visibility rule as get_queryset, for an already known owner"""
+        return self.request.user.role != 'farmer' or farmer_id == self.request.user.id
+    
+    def _validators(self, name, pk, **kwargs):
+        """Conditional GET validators if pk is a farm this user can see"""
+        try:
+            farm_id = int(pk)
+        except (TypeError, ValueError):
+            return None
+        validators = farm_validators(name, farm_id, **kwargs)
+        if validators is None or not self._can_view(validators.farmer_id):
+            return None
+        return validators
+    
     @action(detail=True, methods=['get'])
     def status(self, request, pk=None):
-        """Get current system status for a farm"""
+        """
+        Get current system status for a farm (supports ETag / If-Modified-Since)
+        
+        Optional query params:
+            fields: Comma-separated status fields to return
+        """
+        validators = self._validators('status', pk, include_readings=False)
+        if validators is not None:
+            not_modified = validators.not_modified(request)
+            if not_modified is not None:
+                return not_modified
+        
         farm = self.get_object()
-        status_obj, created = SystemStatus.objects.get_or_create(farm=farm)
-        serializer = SystemStatusSerializer(status_obj)
-        return Response(serializer.data)
+        status_obj = get_farm_status(farm)
+        serializer = SystemStatusSerializer(status_obj, fields=requested_fields(request))
+        response = Response(serializer.data)
+        return validators.apply(response) if validators is not None else response
     
     @action(detail=True, methods=['get'])
     def dashboard(self, request, pk=None):
-        """Get dashboard data for a farm"""
+        """
+        Get dashboard data for a farm
+        
+        Served from the versioned farm cache (farms.cache) until a status save,
+        new reading or sensor change bumps the farm's version. Supports ETag /
+        If-Modified-Since: a cached entry answers with its own validators
+        without a query, otherwise one indexed lookup decides on a 304.
+        """
+        try:
+            farm_id = int(pk)
+        except (TypeError, ValueError):
+            farm_id = None
+        
+        validators = None
+        if farm_id is not None:
+            cached = get_farm_response('dashboard', farm_id)
+            if cached is not None and self._can_view(cached['farmer_id']):
+                validators = cached['validators']
+                not_modified = validators.not_modified(request)
+                if not_modified is not None:
+                    return not_modified
+                return validators.apply(Response(cached['data']))
+            
+            version = get_farm_version(farm_id)
+            validators = self._validators('dashboard', farm_id, version=version)
+            if validators is not None:
+                not_modified = validators.not_modified(request)
+                if not_modified is not None:
+                    return not_modified
+        
         farm = self.get_object()
-        status_obj, created = SystemStatus.objects.get_or_create(farm=farm)
+        data = dashboard_data(farm)
+        
+        response = Response(data)
+        if validators is not None:
+            set_farm_response('dashboard', farm.id, version, {
+                'farmer_id': farm.farmer_id, 'data': data, 'validators': validators
+            })
+            validators.apply(response)
+        return response
+    
+    @action(detail=True, methods=['get'])
+    def overview(self, request, pk=None):
+        """
+        Dashboard, weather, AI suggestions and sensors of a farm in one request
         
-        # Import here to avoid circular imports
-        from sensors.models import SensorReading, Sensor, SensorType
-        from sensors.serializers import SensorReadingSerializer
-        from automation.services import get_current_soil_moisture
+        The farm is loaded and checked once and the sections are built
+        concurrently, sharing one weather fetch (see farms.overview).
         
-        # Get latest sensor readings
-        latest_readings = SensorReading.objects.filter(
-            sensor__farm=farm
-        ).order_by('-timestamp')[:10]
+        Optional query params:
+            sections: Comma-separated OVERVIEW_SECTIONS (default: all)
+            weather_fields / weather_vars: Weather selection, as fields / vars
+                on the weather endpoint
         
-        # Calculate average soil moisture from all soil moisture sensors
-        avg_soil_moisture = get_current_soil_moisture(farm)
+        Streams application/x-ndjson: one {"section", "data"} line per
+        section (or {"section", "error"}), in completion order.
+        """
+        from automation.services import parse_weather_selection
         
-        data = {
-            'farm': FarmSerializer(farm).data,
-            'status': SystemStatusSerializer(status_obj).data,
-            'recent_sensor_readings': SensorReadingSerializer(latest_readings, many=True).data,
-            'average_soil_moisture': float(avg_soil_moisture) if avg_soil_moisture is not None else None
-        }
+        requested = request.query_params.get('sections')
+        sections = [name.strip() for name in requested.split(',') if name.strip()] if requested else OVERVIEW_SECTIONS
+        unknown = set(sections) - set(OVERVIEW_SECTIONS)
+        if unknown:
+            return Response({'error': f'Unknown sections: {", ".join(sorted(unknown))}'}, status=400)
+        try:
+            weather_sections, weather_vars = parse_weather_selection(
+                request.query_params.get('weather_fields'), request.query_params.get('weather_vars')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
         
-        return Response(data)
-
+        farm = self.get_object()
+        get_farm_status(farm)
+        lines = stream_overview(farm, list(dict.fromkeys(sections)), weather_sections, weather_vars)
+        if isinstance(request._request, ASGIRequest):
+            lines = aiter_lines(lines)
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
@@ -4,20 +4,26 @@ from .models import SensorType, Sensor, SensorReading
 
 @admin.register(SensorType)
 class SensorTypeAdmin(admin.ModelAdmin):
-    list_display = ['name', 'category', 'unit']
+    list_display = ['name', 'category', 'unit', 'value_scale']
     list_filter = ['category']
+    
+    def get_readonly_fields(self, request, obj=None):
+        # Stored compact readings are decoded with the current scale
+        if obj is not None:
+            return ['value_scale']
+        return []
 
 
 @admin.register(Sensor)
 class SensorAdmin(admin.ModelAdmin):
-    list_display = ['name', 'farm', 'sensor_type', 'is_active', 'created_at']
-    list_filter = ['is_active', 'sensor_type', 'created_at']
+    list_display = ['name', 'farm', 'sensor_type', 'is_active', 'anomaly', 'created_at']
+    list_filter = ['is_active', 'anomaly', 'sensor_type', 'created_at']
     search_fields = ['name', 'farm__name']
 
 
 @admin.register(SensorReading)
 class SensorReadingAdmin(admin.ModelAdmin):
-    list_display = ['sensor', 'value', 'timestamp']
+    list_display = ['sensor', 'numeric_value', 'timestamp']
     list_filter = ['timestamp', 'sensor__sensor_type']
     search_fields = ['sensor__name']
     readonly_fields = ['timestamp']
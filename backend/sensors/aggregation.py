@@ -0,0 +1,138 @@
+"""
+Bucketed multi-sensor aggregation
+One date_trunc/GROUP BY query per request, cached per (farm, window, bucket).
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, FloatField, Max, Min
+from django.db.models.functions import Cast, Coalesce, Power, Trunc
+from django.utils import timezone
+
+from .models import SensorReading
+
+BUCKETS = ('minute', 'hour', 'day', 'week')
+GROUP_BY = ('sensor', 'type')
+
+
+def reading_value_expression():
+    """SQL expression for a reading's value, whichever column stores it"""
+    return Coalesce(
+        Cast('value', FloatField()),
+        Cast('value_scaled', FloatField()) / Power(10, F('sensor__sensor_type__value_scale')),
+        output_field=FloatField(),
+    )
+
+
+def bucket_start(moment, bucket):
+    """Truncate a datetime to the start of its bucket"""
+    moment = moment.replace(second=0, microsecond=0)
+    if bucket == 'minute':
+        return moment
+    moment = moment.replace(minute=0)
+    if bucket == 'hour':
+        return moment
+    moment = moment.replace(hour=0)
+    if bucket == 'day':
+        return moment
+    return moment - timedelta(days=moment.weekday())
+
+
+def aggregate_readings(farm, hours, bucket, sensor_types=None, categories=None, group_by='sensor'):
+    """
+    Per-bucket avg/min/max/count for every matching sensor on a farm
+
+    Args:
+        farm: Farm to aggregate
+        hours: Window length, ending now
+        bucket: One of BUCKETS
+        sensor_types: Optional list of SensorType names
+        categories: Optional list of SensorType categories
+        group_by: 'sensor' for a series per sensor, 'type' for one per sensor type
+
+    Returns:
+        Dict with the window bounds and a list of series
+    """
+    until = timezone.now()
+    # Align the window to bucket boundaries so the first bucket is complete
+    since = bucket_start(until - timedelta(hours=hours), bucket)
+
+    filters = '|'.join([','.join(sorted(sensor_types or [])), ','.join(sorted(categories or []))])
+    key = ':'.join([
+        'sensor-agg', str(farm.id), str(hours), bucket, group_by,
+        hashlib.md5(filters.encode()).hexdigest(),
+    ])
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    readings = SensorReading.objects.filter(
+        farm=farm,
+        timestamp__gte=since,
+        sensor__is_active=True,
+    )
+    if sensor_types:
+        readings = readings.filter(sensor__sensor_type__name__in=sensor_types)
+    if categories:
+        readings = readings.filter(sensor__sensor_type__category__in=categories)
+
+    if group_by == 'type':
+        keys = ['sensor__sensor_type__name', 'sensor__sensor_type__unit']
+    else:
+        keys = ['sensor_id', 'sensor__name', 'sensor__sensor_type__name', 'sensor__sensor_type__unit']
+
+    rows = (
+        readings
+        .annotate(bucket=Trunc('timestamp', bucket), reading_value=reading_value_expression())
+        .values('bucket', *keys)
+        .annotate(
+            avg=Avg('reading_value'),
+            min=Min('reading_value'),
+            max=Max('reading_value'),
+            count=Count('id'),
+        )
+        .order_by(*keys, 'bucket')
+    )
+
+    series = {}
+    for row in rows:
+        if group_by == 'type':
+            series_key = row['sensor__sensor_type__name']
+            entry = series.get(series_key)
+            if entry is None:
+                entry = series[series_key] = {
+                    'sensor_type': row['sensor__sensor_type__name'],
+                    'unit': row['sensor__sensor_type__unit'],
+                    'points': [],
+                }
+        else:
+            series_key = row['sensor_id']
+            entry = series.get(series_key)
+            if entry is None:
+                entry = series[series_key] = {
+                    'sensor_id': row['sensor_id'],
+                    'sensor_name': row['sensor__name'],
+                    'sensor_type': row['sensor__sensor_type__name'],
+                    'unit': row['sensor__sensor_type__unit'],
+                    'points': [],
+                }
+        entry['points'].append({
+            'bucket': row['bucket'],
+            'avg': round(row['avg'], 4) if row['avg'] is not None else None,
+            'min': row['min'],
+            'max': row['max'],
+            'count': row['count'],
+        })
+
+    result = {
+        'farm_id': farm.id,
+        'bucket': bucket,
+        'group_by': group_by,
+        'since': since,
+        'until': until,
+        'series': list(series.values()),
+    }
+    cache.set(key, result, settings.SENSOR_AGGREGATE_CACHE_SECONDS)
+    return result
@@ -0,0 +1,173 @@
+"""
+Streaming anomaly detection for sensor ingest
+Keeps per-sensor EWMA mean/variance and rate-of-change statistics in constant
+memory and flags stuck, spiking and out-of-range sensors.
+"""
+import math
+
+from django.utils import timezone
+
+# Physically plausible range per unit; readings outside are out_of_range
+VALUE_RANGES = {
+    '%': (0.0, 100.0),
+    '°C': (-40.0, 70.0),
+    'mS/cm': (0.0, 20.0),
+    'ppm': (0.0, 10000.0),
+    'L/min': (0.0, 2000.0),
+    'mm': (0.0, 500.0),
+    'W/m²': (0.0, 1500.0),
+    'µmol/m²/s': (0.0, 2500.0),
+}
+
+# Units whose sensors legitimately sit at zero for hours (night, no rain,
+# irrigation off), so repeated zeros are not a stuck probe
+ZERO_RESTING_UNITS = {'W/m²', 'µmol/m²/s', 'L/min', 'mm'}
+
+ANOMALY_STUCK = 'stuck'
+ANOMALY_SPIKE = 'spike'
+ANOMALY_OUT_OF_RANGE = 'out_of_range'
+
+
+class SensorState:
+    """Rolling statistics for one sensor"""
+    __slots__ = ('count', 'mean', 'var', 'delta_mean', 'last', 'repeats', 'normal_streak', 'flag')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.delta_mean = 0.0
+        self.last = None
+        self.repeats = 0
+        self.normal_streak = 0
+        self.flag = ''
+
+
+class AnomalyDetector:
+    """
+    Per-sensor anomaly detector with O(1) work and memory per reading
+
+    Args:
+        alpha: EWMA smoothing factor once warmed up (cumulative mean before that)
+        spike_sigma: Deviations from the mean, and jumps from the previous
+            reading, larger than this many sigmas count as spikes
+        stuck_repeats: Consecutive identical readings that mark a probe as stuck
+        warmup: Readings required before spike detection starts
+        clear_after: Consecutive normal readings before a flag is cleared, so
+            flags do not flap on borderline values
+    """
+
+    def __init__(self, alpha=0.05, spike_sigma=6.0, stuck_repeats=12, stuck_epsilon=1e-6,
+                 warmup=20, clear_after=3, ranges=VALUE_RANGES):
+        self.alpha = alpha
+        self.spike_sigma = spike_sigma
+        self.stuck_repeats = stuck_repeats
+        self.stuck_epsilon = stuck_epsilon
+        self.warmup = warmup
+        self.clear_after = clear_after
+        self.ranges = ranges
+        self.states = {}
+
+    def _classify(self, state, value, unit):
+        low, high = self.ranges.get(unit, (None, None))
+        if (low is not None and value < low) or (high is not None and value > high):
+            return ANOMALY_OUT_OF_RANGE
+
+        if state.last is None:
+            return ''
+
+        delta = abs(value - state.last)
+        if delta <= self.stuck_epsilon and not (value == 0 and unit in ZERO_RESTING_UNITS):
+            state.repeats += 1
+        else:
+            state.repeats = 0
+        if state.repeats >= self.stuck_repeats:
+            return ANOMALY_STUCK
+
+        if state.count >= self.warmup:
+            floor = max(1e-3 * abs(state.mean), self.stuck_epsilon)
+            deviation = abs(value - state.mean)
+            if (deviation > self.spike_sigma * math.sqrt(state.var) + floor
+                    and delta > self.spike_sigma * state.delta_mean + floor):
+                return ANOMALY_SPIKE
+        return ''
+
+    def _update(self, state, value):
+        alpha = max(self.alpha, 1.0 / (state.count + 1))
+        diff = value - state.mean
+        increment = alpha * diff
+        state.mean += increment
+        state.var = (1 - alpha) * (state.var + diff * increment)
+        if state.last is not None:
+            state.delta_mean += alpha * (abs(value - state.last) - state.delta_mean)
+        state.count += 1
+
+    def observe(self, sensor_id, value, unit=None, flag=''):
+        """
+        Feed one reading
+
+        flag is the sensor's persisted Sensor.anomaly. It seeds the state of
+        a sensor seen for the first time, so a flag raised before a restart
+        or by another process is still cleared here.
+
+        Returns:
+            The sensor's new flag ('' when cleared) if it changed, otherwise None
+        """
+        state = self.states.get(sensor_id)
+        if state is None:
+            state = self.states[sensor_id] = SensorState()
+            state.flag = flag or ''
+
+        reason = self._classify(state, value, unit)
+        # Spikes and impossible values must not drag the baseline with them
+        if reason not in (ANOMALY_SPIKE, ANOMALY_OUT_OF_RANGE):
+            self._update(state, value)
+        state.last = value
+
+        if reason:
+            state.normal_streak = 0
+            if state.flag != reason:
+                state.flag = reason
+                return reason
+            return None
+
+        if state.flag:
+            state.normal_streak += 1
+            if state.normal_streak >= self.clear_after:
+                state.flag = ''
+                state.normal_streak = 0
+                return ''
+        return None
+
+
+def apply_flag_changes(changes):
+    """Persist flag transitions ({sensor_id: flag}) onto Sensor rows"""
+    from farms.cache import bump_farm_versions
+    from .models import Sensor
+    from .topology import invalidate_sensors
+
+    now = timezone.now()
+    for sensor_id, flag in changes.items():
+        Sensor.objects.filter(id=sensor_id).update(
+            anomaly=flag,
+            anomaly_since=now if flag else None
+        )
+    # update() sends no signals, so drop cached topology and responses explicitly
+    bump_farm_versions(invalidate_sensors(changes))
+
+
+# Process-wide detector for readings created through the REST API
+detector = AnomalyDetector()
+
+
+def record_reading(reading):
+    """Run a single saved reading through the process-wide detector"""
+    flag = detector.observe(
+        reading.sensor_id,
+        reading.numeric_value,
+        reading.sensor.sensor_type.unit,
+        reading.sensor.anomaly
+    )
+    if flag is not None:
+        apply_flag_changes({reading.sensor_id: flag})
+    return flag
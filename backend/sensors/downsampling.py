@@ -0,0 +1,101 @@
+"""
+Downsampling helpers for chart endpoints
+Reduce a reading series to a fixed number of points while keeping its shape
+"""
+
+
+def lttb(xs, ys, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Args:
+        xs: Ascending x values (e.g. epoch seconds)
+        ys: Y values, same length as xs
+        threshold: Maximum number of points to keep
+
+    Returns:
+        Sorted list of indices into xs/ys of the points to keep.
+        The first and last points are always kept.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    # Buckets exclude the first and last point, which are always kept
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average point of the next bucket (the third triangle vertex)
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / next_count
+        avg_y = sum(ys[next_start:next_end]) / next_count
+
+        # Pick the point in this bucket forming the largest triangle
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = xs[a], ys[a]
+        dx = ax - avg_x
+        dy = avg_y - ay
+        best = start
+        best_area = -1.0
+        for j in range(start, end):
+            area = abs(dx * (ys[j] - ay) + dy * (xs[j] - ax))
+            if area > best_area:
+                best_area = area
+                best = j
+
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
+
+
+def min_max(ys, threshold):
+    """
+    Min/max-per-bucket downsampling
+
+    Splits the series into threshold // 2 buckets and keeps the minimum and
+    maximum of each, so every peak and trough survives.
+
+    Returns:
+        Sorted list of indices into ys of the points to keep.
+    """
+    n = len(ys)
+    if threshold >= n or threshold < 2:
+        return list(range(n))
+
+    buckets = threshold // 2
+    bucket_size = n / buckets
+    selected = []
+
+    for i in range(buckets):
+        start = int(i * bucket_size)
+        end = min(int((i + 1) * bucket_size), n)
+        if start >= end:
+            continue
+        bucket = ys[start:end]
+        lo = start + bucket.index(min(bucket))
+        hi = start + bucket.index(max(bucket))
+        if lo == hi:
+            selected.append(lo)
+        else:
+            selected.extend(sorted((lo, hi)))
+
+    return selected
+
+
+DOWNSAMPLERS = {
+    'lttb': lambda xs, ys, threshold: lttb(xs, ys, threshold),
+    'minmax': lambda xs, ys, threshold: min_max(ys, threshold),
+}
+
+# Smallest threshold each method can honour; below it they keep every point
+MIN_POINTS = {
+    'lttb': 3,
+    'minmax': 2,
+}
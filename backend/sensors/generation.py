@@ -0,0 +1,246 @@
+"""
+Synthetic sensor reading generation for generate_sensor_readings
+Readings are generated per sensor as whole columns and written in bulk
+(bulk_create or PostgreSQL COPY), skipping (sensor, timestamp) pairs that
+already exist.
+"""
+import io
+import random
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from farms.cache import bump_farm_versions
+from farms.models import Farm, SystemStatus
+from .models import Sensor, SensorReading, encode_value
+
+
+READING_COLUMNS = ('sensor_id', 'farm_id', 'value', 'value_scaled', 'timestamp')
+
+
+def _status_context(status):
+    """Plain-float snapshot of the farm status the generators react to"""
+    def number(value):
+        return float(value) if value else None
+
+    return {
+        'rain': number(status.current_rain) if status else None,
+        'temperature': number(status.current_temperature) if status else None,
+        'humidity': number(status.current_humidity) if status else None,
+        'clouds': number(status.current_clouds) if status else None,
+        'irrigation_on': bool(status and status.irrigation_on),
+    }
+
+
+def make_value_generator(type_name, context):
+    """
+    Build a function hour_of_day -> realistic reading for one sensor type
+
+    The type dispatch and status lookups happen once here, so generating a
+    column of values is a tight loop over hours.
+    """
+    sensor_name = type_name.lower()
+    uniform = random.uniform
+    rain = context['rain']
+    temperature = context['temperature']
+    humidity = context['humidity']
+    clouds = context['clouds']
+
+    # Soil Moisture (varies by depth, decreases during day, increases with rain)
+    if 'soil moisture' in sensor_name:
+        base = 45.0
+        if '30cm' in sensor_name:
+            base += 5.0  # Deeper soils retain more moisture
+        if rain and rain > 0:
+            base += min(20.0, rain * 3)
+
+        def generate(hour_of_day):
+            value = base - 2.0 if 10 <= hour_of_day <= 16 else base  # Evaporation
+            return max(20.0, min(85.0, value + uniform(-5, 5)))
+        return generate
+
+    # Soil Temperature (varies by depth, follows air temp with lag)
+    if 'soil temperature' in sensor_name:
+        base_temp = temperature - 2.0 if temperature else 18.0  # Soil is cooler
+        if '30cm' in sensor_name:
+            base_temp -= 1.0  # Deeper is cooler
+
+        def generate(hour_of_day):
+            # Varies less than air temperature
+            daily_variation = 3.0 * abs(hour_of_day - 12) / 12
+            return max(10.0, min(35.0, base_temp - daily_variation + uniform(-1, 1)))
+        return generate
+
+    # Soil Electrical Conductivity
+    if 'soil electrical conductivity' in sensor_name or 'soil ec' in sensor_name:
+        return lambda hour_of_day: round(uniform(0.1, 2.5), 2)
+
+    # Water Quality/Salinity
+    if 'water quality' in sensor_name or 'salinity' in sensor_name:
+        return lambda hour_of_day: round(uniform(200, 800), 1)  # ppm
+
+    # Water Flow (0 if no irrigation, active during irrigation periods)
+    if 'water flow' in sensor_name:
+        if not context['irrigation_on']:
+            return lambda hour_of_day: 0.0
+        if 'main line' in sensor_name:
+            return lambda hour_of_day: round(uniform(50, 100), 1)  # L/min
+        return lambda hour_of_day: round(uniform(20, 50), 1)  # L/min per zone
+
+    # Air Temperature (follows diurnal cycle)
+    if 'air temperature' in sensor_name:
+        def generate(hour_of_day):
+            if temperature:
+                base = temperature
+            elif 6 <= hour_of_day <= 18:
+                base = 20 + 10 * abs(hour_of_day - 12) / 6
+            else:
+                base = 15 + 5 * (1 - abs(hour_of_day - 3) / 12)
+            return round(max(10.0, min(40.0, base + uniform(-2, 2))), 1)
+        return generate
+
+    # Air Humidity (inverse of temperature)
+    if 'air humidity' in sensor_name:
+        rain_boost = 15.0 if rain and rain > 0 else 0.0
+
+        def generate(hour_of_day):
+            if humidity:
+                base = humidity
+            elif 6 <= hour_of_day <= 18:
+                # Higher at night, lower during day
+                base = 50 + 10 * abs(hour_of_day - 12) / 6
+            else:
+                base = 75 - 10 * abs(hour_of_day - 3) / 12
+            return round(max(30.0, min(95.0, base + rain_boost + uniform(-5, 5))), 1)
+        return generate
+
+    # Rain Gauge (cumulative, resets daily)
+    if 'rain gauge' in sensor_name:
+        if rain:
+            return lambda hour_of_day: round(rain, 1)
+
+        def generate(hour_of_day):
+            # Occasional rain
+            if random.random() < 0.05:  # 5% chance
+                return round(uniform(0.5, 5.0), 1)
+            return 0.0
+        return generate
+
+    # Solar Irradiance (follows solar curve) and Photosynthetic Active Radiation
+    # (PAR, same curve in different units)
+    if 'solar irradiance' in sensor_name:
+        peak, ceiling, noise, digits = 900.0, 1000.0, 50, 1
+    elif 'photosynthetic active radiation' in sensor_name or 'par' in sensor_name:
+        peak, ceiling, noise, digits = 1800.0, 2000.0, 100, 0  # µmol/m²/s
+    else:
+        # Default: random value based on unit
+        return lambda hour_of_day: round(uniform(0, 100), 2)
+
+    cloud_factor = 1 - clouds / 100 * 0.5 if clouds else 1.0
+
+    def generate(hour_of_day):
+        # Solar curve: 0 at night, peaks at noon
+        if not 6 <= hour_of_day <= 18:
+            return 0.0
+        intensity = peak * (1 - abs(hour_of_day - 12) / 6) * cloud_factor
+        return round(max(0.0, min(ceiling, intensity + uniform(-noise, noise))), digits)
+    return generate
+
+
+def generate_farm_columns(farm, sensors, timestamps):
+    """
+    Yield (sensor_id, farm_id, value, value_scaled, timestamp) rows for every
+    (sensor, timestamp) pair, one sensor column at a time
+    """
+    try:
+        status = farm.status
+    except SystemStatus.DoesNotExist:
+        status = None
+    context = _status_context(status)
+    compact = settings.SENSOR_READINGS_COMPACT
+    hours_of_day = [timestamp.hour for timestamp in timestamps]
+
+    for sensor in sensors:
+        generate = make_value_generator(sensor.sensor_type.name, context)
+        scale = sensor.sensor_type.value_scale
+        for timestamp, hour_of_day in zip(timestamps, hours_of_day):
+            value = generate(hour_of_day)
+            if compact:
+                decimal_value, value_scaled = encode_value(value, scale)
+                yield sensor.id, farm.id, decimal_value, value_scaled, timestamp
+            else:
+                yield sensor.id, farm.id, value, None, timestamp
+
+
+def _write_bulk(rows, batch_size):
+    """Insert through bulk_create, ignoring rows that already exist"""
+    readings = [
+        SensorReading(
+            sensor_id=sensor_id, farm_id=farm_id, value=value,
+            value_scaled=value_scaled, timestamp=timestamp
+        )
+        for sensor_id, farm_id, value, value_scaled, timestamp in rows
+    ]
+    SensorReading.objects.bulk_create(readings, batch_size=batch_size, ignore_conflicts=True)
+    return None  # Conflicts are skipped silently, so the inserted count is unknown
+
+
+def _write_copy(rows):
+    """
+    Stream rows through COPY into a temp table, then move them across with
+    INSERT ... ON CONFLICT DO NOTHING (PostgreSQL only)
+    """
+    def text(value):
+        return r'\N' if value is None else str(value)
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(text(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    table = SensorReading._meta.db_table
+    columns = ', '.join(READING_COLUMNS)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE readings_load ON COMMIT DROP AS "
+            f"SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        cursor.cursor.copy_expert(f"COPY readings_load ({columns}) FROM STDIN", buffer)
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM readings_load "
+            f"ON CONFLICT (sensor_id, timestamp) DO NOTHING"
+        )
+        return cursor.rowcount
+
+
+def generate_for_farm(farm_id, timestamps, method, batch_size, clear_existing):
+    """
+    Generate and write readings for one farm
+
+    Runs in the calling process or in a pool worker; returns a summary dict.
+    """
+    started = time.perf_counter()
+    farm = Farm.objects.get(id=farm_id)
+    sensors = list(
+        Sensor.objects.filter(farm=farm, is_active=True).select_related('sensor_type')
+    )
+    result = {
+        'farm_id': farm.id, 'farm_name': farm.name, 'sensors': len(sensors),
+        'removed': 0, 'generated': 0, 'inserted': None, 'seconds': 0.0,
+    }
+    if not sensors:
+        return result
+
+    if clear_existing:
+        result['removed'], _ = SensorReading.objects.filter(farm=farm).delete()
+
+    rows = list(generate_farm_columns(farm, sensors, timestamps))
+    result['generated'] = len(rows)
+    if method == 'copy':
+        result['inserted'] = _write_copy(rows)
+    else:
+        result['inserted'] = _write_bulk(rows, batch_size)
+    bump_farm_versions([farm.id])
+    result['seconds'] = time.perf_counter() - started
+    return result
@@ -0,0 +1,19 @@
+"""
+Pool worker functions for generate_sensor_readings
+Kept free of module-level model imports: spawned worker processes import this
+module to unpickle the functions before Django is set up.
+"""
+import django
+
+
+def init_worker():
+    """Pool initializer: runs once per worker process"""
+    # Spawned processes start without Django configured
+    django.setup()
+
+
+def generate_farm_readings(farm_id, timestamps, method, batch_size, clear_existing):
+    """generation.generate_for_farm() inside a worker process"""
+    from .generation import generate_for_farm
+
+    return generate_for_farm(farm_id, timestamps, method, batch_size, clear_existing)
@@ -0,0 +1,415 @@
+"""
+Line-protocol ingestion gateway for field devices
+Accepts `sensor_id value [timestamp]` lines over TCP/UDP and writes them into
+SensorReading through batched inserts.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from farms.cache import bump_farm_versions
+from farms.events import publish_many
+
+from .anomaly import AnomalyDetector, apply_flag_changes
+from .models import Sensor, SensorReading, encode_value
+
+logger = logging.getLogger(__name__)
+
+# SensorReading.value is max_digits=10, decimal_places=4
+MAX_VALUE = Decimal('1e6')
+# Columns the gateway writes
+READING_FIELDS = ('sensor', 'farm', 'value', 'value_scaled', 'timestamp')
+
+
+def parse_line(line):
+    """
+    Parse one `sensor_id value [timestamp]` line
+
+    The timestamp is optional and given as Unix epoch seconds; readings without
+    one are stamped with the arrival time.
+
+    Returns:
+        (sensor_id: int, value: Decimal, timestamp: datetime or None)
+
+    Raises:
+        ValueError: If the line is malformed
+    """
+    parts = line.split()
+    if len(parts) not in (2, 3):
+        raise ValueError(f"Expected 'sensor_id value [timestamp]', got {line!r}")
+    try:
+        sensor_id = int(parts[0])
+        value = Decimal(parts[1].decode() if isinstance(parts[1], bytes) else parts[1])
+        timestamp = None
+        if len(parts) == 3:
+            timestamp = datetime.fromtimestamp(float(parts[2]), tz=dt_timezone.utc)
+    except (InvalidOperation, OverflowError, OSError) as e:
+        raise ValueError(f"Invalid reading {line!r}: {e}")
+    if not value.is_finite() or abs(value) >= MAX_VALUE:
+        raise ValueError(f"Invalid reading {line!r}: value out of range")
+    return sensor_id, value, timestamp
+
+
+class IngestMetrics:
+    """Counters for the gateway, reported periodically"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.lines_received = 0
+        self.lines_rejected = 0
+        self.lines_dropped = 0
+        self.unknown_sensors = 0
+        self.readings_written = 0
+        self.duplicate_readings = 0
+        self.batches_written = 0
+        self.write_errors = 0
+        self.write_seconds = 0.0
+        self.anomaly_transitions = 0
+
+    def snapshot(self, queue_depth=0):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            'uptime_s': round(elapsed, 1),
+            'lines_received': self.lines_received,
+            'lines_rejected': self.lines_rejected,
+            'lines_dropped': self.lines_dropped,
+            'unknown_sensors': self.unknown_sensors,
+            'readings_written': self.readings_written,
+            'duplicate_readings': self.duplicate_readings,
+            'batches_written': self.batches_written,
+            'write_errors': self.write_errors,
+            'anomaly_transitions': self.anomaly_transitions,
+            'queue_depth': queue_depth,
+            'ingest_rate': round(self.readings_written / elapsed, 1),
+            'avg_batch_ms': round(
+                1000 * self.write_seconds / self.batches_written, 2
+            ) if self.batches_written else 0.0,
+        }
+
+
+class SensorCache:
+    """
+    In-memory map of active sensor id -> (farm id, value scale, unit, anomaly flag)
+
+    Unknown ids trigger a reload, but at most once per refresh_interval so a
+    device sending a bad id cannot turn every batch into a table scan. The map
+    is also reloaded every max_age seconds, so a long-running gateway picks up
+    sensors that moved farm, changed type or were deactivated.
+    """
+
+    def __init__(self, refresh_interval=30.0, max_age=300.0):
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.sensors = {}
+        self.loaded_at = None
+
+    def load(self):
+        self.sensors = {
+            sensor_id: (farm_id, scale, unit, anomaly)
+            for sensor_id, farm_id, scale, unit, anomaly in Sensor.objects.filter(
+                is_active=True
+            ).values_list('id', 'farm_id', 'sensor_type__value_scale', 'sensor_type__unit', 'anomaly')
+        }
+        self.loaded_at = time.monotonic()
+
+    def needs_reload(self):
+        return (
+            self.loaded_at is None
+            or time.monotonic() - self.loaded_at >= self.refresh_interval
+        )
+
+    def is_stale(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.max_age
+
+    def __contains__(self, sensor_id):
+        return sensor_id in self.sensors
+
+
+class IngestGateway:
+    """
+    Asyncio TCP/UDP server feeding a bounded queue drained by a batch writer
+
+    Backpressure: TCP readers await queue space, which stops reading from the
+    socket and lets TCP flow control slow the sender down. UDP has no flow
+    control, so datagrams arriving while the queue is full are dropped and
+    counted.
+    """
+
+    def __init__(self, batch_size=1000, flush_interval=1.0, queue_size=50000,
+                 stats_interval=10.0, report=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats_interval = stats_interval
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.sensors = SensorCache()
+        self.detector = AnomalyDetector()
+        self.metrics = IngestMetrics()
+        self.report = report or (lambda stats: logger.info("Ingest stats: %s", stats))
+        self._servers = []
+        self._tasks = []
+        self._writer = None
+
+    # Input side
+
+    def _parse(self, line):
+        self.metrics.lines_received += 1
+        try:
+            sensor_id, value, timestamp = parse_line(line)
+        except ValueError as e:
+            self.metrics.lines_rejected += 1
+            logger.debug(str(e))
+            return None
+        return sensor_id, value, timestamp or timezone.now()
+
+    async def handle_tcp(self, reader, writer):
+        """Read newline-delimited readings from one TCP connection"""
+        peer = writer.get_extra_info('peername')
+        logger.info("Ingest connection from %s", peer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                item = self._parse(line)
+                if item is not None:
+                    # Blocks while the queue is full (backpressure)
+                    await self.queue.put(item)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:
+            # readline() raises this for a line longer than the stream limit;
+            # the rest of the stream cannot be framed, so drop the connection
+            self.metrics.lines_rejected += 1
+            logger.warning("Dropping ingest connection from %s: line too long", peer)
+        finally:
+            writer.close()
+            logger.info("Ingest connection from %s closed", peer)
+
+    def handle_datagram(self, data):
+        """Queue every reading in one UDP datagram, dropping on overflow"""
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            item = self._parse(line)
+            if item is None:
+                continue
+            try:
+                self.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                self.metrics.lines_dropped += 1
+
+    # Output side
+
+    def _write_batch(self, items):
+        """Resolve sensors and bulk insert one batch (runs in a worker thread)"""
+        close_old_connections()
+        if self.sensors.is_stale() or (
+            self.sensors.needs_reload() and any(item[0] not in self.sensors for item in items)
+        ):
+            self.sensors.load()
+
+        compact = settings.SENSOR_READINGS_COMPACT
+        readings = {}
+        for sensor_id, value, timestamp in items:
+            sensor = self.sensors.sensors.get(sensor_id)
+            if sensor is None:
+                self.metrics.unknown_sensors += 1
+                continue
+            if (sensor_id, timestamp) in readings:
+                # Retransmitted within the batch
+                self.metrics.duplicate_readings += 1
+                continue
+            farm_id, scale, unit, anomaly = sensor
+            numeric = float(value)
+            value_scaled = None
+            if compact:
+                value, value_scaled = encode_value(value, scale)
+            readings[sensor_id, timestamp] = (SensorReading(
+                sensor_id=sensor_id,
+                farm_id=farm_id,
+                value=value,
+                value_scaled=value_scaled,
+                timestamp=timestamp,
+            ), numeric, unit, anomaly)
+
+        written = self._insert(list(readings.values()))
+        if not written:
+            return 0
+
+        # bulk_create sends no signals
+        bump_farm_versions({reading.farm_id for reading, *_ in written})
+        observe = self.detector.observe
+        flag_changes = {}
+        events = []
+        for reading, numeric, unit, anomaly in written:
+            flag = observe(reading.sensor_id, numeric, unit, anomaly)
+            if flag is not None:
+                flag_changes[reading.sensor_id] = flag
+            events.append((reading.farm_id, 'reading', lambda reading=reading, numeric=numeric: {
+                'id': reading.id,
+                'sensor': reading.sensor_id,
+                'value': numeric,
+                'timestamp': reading.timestamp,
+            }))
+        # One broker round trip per batch rather than per reading
+        publish_many(events)
+        if flag_changes:
+            # Only transitions are written, so steady state costs no queries
+            apply_flag_changes(flag_changes)
+            self.metrics.anomaly_transitions += len(flag_changes)
+        return len(written)
+
+    def _insert(self, rows):
+        """
+        Insert (reading, value, unit, anomaly) rows; returns the rows actually written
+
+        A reading already stored (a device retransmitting after a lost ack) is
+        skipped by INSERT ... ON CONFLICT DO NOTHING, and RETURNING tells which
+        rows went in, so duplicates cost nothing extra (PostgreSQL, SQLite 3.35+).
+        """
+        if not rows:
+            return []
+        fields = [SensorReading._meta.get_field(name) for name in READING_FIELDS]
+        by_key = {}
+        params = []
+        for row in rows:
+            params.extend(field.get_db_prep_save(getattr(row[0], field.attname), connection) for field in fields)
+            by_key[row[0].sensor_id, row[0].timestamp] = row
+
+        table = SensorReading._meta.db_table
+        columns = ', '.join(field.column for field in fields)
+        placeholders = ', '.join([f"({', '.join(['%s'] * len(fields))})"] * len(rows))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES {placeholders} "
+                f"ON CONFLICT (sensor_id, timestamp) DO NOTHING RETURNING id, sensor_id, timestamp",
+                params
+            )
+            returned = cursor.fetchall()
+
+        written = []
+        for reading_id, sensor_id, timestamp in returned:
+            # SQLite returns naive timestamps in the connection's time zone
+            if timezone.is_naive(timestamp):
+                timestamp = timezone.make_aware(timestamp, connection.timezone)
+            row = by_key[sensor_id, timestamp]
+            row[0].id = reading_id
+            written.append(row)
+        self.metrics.duplicate_readings += len(rows) - len(written)
+        return written
+
+    async def _drain(self, first):
+        """Collect a batch; returns (batch, stop) where stop means the sentinel was seen"""
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            # Take what is already queued without waiting
+            while len(batch) < self.batch_size and not self.queue.empty():
+                item = self.queue.get_nowait()
+                if item is None:
+                    return batch, True
+                batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _flush(self, batch):
+        started = time.monotonic()
+        try:
+            written = await sync_to_async(self._write_batch, thread_sensitive=True)(batch)
+        except Exception:
+            self.metrics.write_errors += 1
+            logger.exception("Failed to write batch of %d readings", len(batch))
+            return
+        self.metrics.write_seconds += time.monotonic() - started
+        self.metrics.readings_written += written
+        self.metrics.batches_written += 1
+
+    async def writer_loop(self):
+        """Drain the queue into batches of batch_size or flush_interval"""
+        while True:
+            first = await self.queue.get()
+            if first is None:
+                return
+            batch, stop = await self._drain(first)
+            await self._flush(batch)
+            if stop:
+                return
+
+    async def stats_loop(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            self.report(self.metrics.snapshot(self.queue.qsize()))
+
+    # Lifecycle
+
+    async def start(self, host='0.0.0.0', tcp_port=None, udp_port=None):
+        """Start listeners and background tasks; returns the bound addresses"""
+        await sync_to_async(self.sensors.load, thread_sensitive=True)()
+        loop = asyncio.get_running_loop()
+        addresses = {}
+
+        if tcp_port is not None:
+            server = await asyncio.start_server(self.handle_tcp, host, tcp_port)
+            self._servers.append(server)
+            addresses['tcp'] = server.sockets[0].getsockname()
+
+        if udp_port is not None:
+            gateway = self
+
+            class _DatagramProtocol(asyncio.DatagramProtocol):
+                def datagram_received(self, data, addr):
+                    gateway.handle_datagram(data)
+
+            transport, _ = await loop.create_datagram_endpoint(
+                _DatagramProtocol, local_addr=(host, udp_port)
+            )
+            self._servers.append(transport)
+            addresses['udp'] = transport.get_extra_info('sockname')
+
+        self._writer = asyncio.create_task(self.writer_loop())
+        if self.stats_interval:
+            self._tasks.append(asyncio.create_task(self.stats_loop()))
+        return addresses
+
+    async def stop(self):
+        """Close listeners, flush everything still queued and stop tasks"""
+        for server in self._servers:
+            server.close()
+        self._servers = []
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # The sentinel queues behind everything already received
+        if self._writer is not None:
+            await self.queue.put(None)
+            await self._writer
+            self._writer = None
+        self.report(self.metrics.snapshot(self.queue.qsize()))
+
+    async def serve_forever(self, **kwargs):
+        addresses = await self.start(**kwargs)
+        for proto, address in addresses.items():
+            logger.info("Ingest gateway listening on %s %s", proto, address)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
@@ -0,0 +1,92 @@
+"""
+Management command to send synthetic readings to a running ingestion gateway
+Useful for checking a local gateway and measuring its throughput
+Run with: python manage.py ingest_client --port 8094 --lines 100000
+"""
+import random
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sensors.models import Sensor
+
+
+class Command(BaseCommand):
+    help = 'Send synthetic line-protocol readings to the ingestion gateway'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host',
+            default='127.0.0.1',
+            help='Gateway host (default: 127.0.0.1)',
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            required=True,
+            help='Gateway port',
+        )
+        parser.add_argument(
+            '--udp',
+            action='store_true',
+            help='Send over UDP instead of TCP',
+        )
+        parser.add_argument(
+            '--lines',
+            type=int,
+            default=10000,
+            help='Number of readings to send (default: 10000)',
+        )
+        parser.add_argument(
+            '--farm-id',
+            type=int,
+            help='Only use sensors of this farm',
+        )
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=500,
+            help='Lines per send call / datagram (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        sensors = Sensor.objects.filter(is_active=True)
+        if options['farm_id']:
+            sensors = sensors.filter(farm_id=options['farm_id'])
+        sensor_ids = list(sensors.values_list('id', flat=True))
+        if not sensor_ids:
+            raise CommandError('No active sensors found.')
+
+        total = options['lines']
+        chunk = options['chunk']
+        now = time.time()
+
+        if options['udp']:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            send = lambda payload: sock.sendto(payload, (options['host'], options['port']))
+        else:
+            sock = socket.create_connection((options['host'], options['port']))
+            send = sock.sendall
+
+        started = time.perf_counter()
+        sent = 0
+        try:
+            while sent < total:
+                count = min(chunk, total - sent)
+                lines = [
+                    f"{random.choice(sensor_ids)} {random.uniform(0, 100):.4f} {now - (sent + i) * 0.001:.3f}\n"
+                    for i in range(count)
+                ]
+                send(''.join(lines).encode())
+                sent += count
+        finally:
+            sock.close()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Sent {sent} readings to {len(sensor_ids)} sensors in {elapsed:.2f}s '
+                f'({sent / elapsed:.0f} lines/s)'
+            )
+        )
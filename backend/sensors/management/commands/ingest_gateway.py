@@ -0,0 +1,95 @@
+"""
+Management command to run the line-protocol ingestion gateway
+Field loggers send `sensor_id value [timestamp]` lines over TCP or UDP
+Run with: python manage.py ingest_gateway --tcp-port 8094 --udp-port 8094
+"""
+import asyncio
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sensors.ingest import IngestGateway
+
+
+class Command(BaseCommand):
+    help = 'Run the asyncio TCP/UDP ingestion gateway for field devices'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host',
+            default='0.0.0.0',
+            help='Address to bind (default: 0.0.0.0)',
+        )
+        parser.add_argument(
+            '--tcp-port',
+            type=int,
+            help='TCP port to listen on',
+        )
+        parser.add_argument(
+            '--udp-port',
+            type=int,
+            help='UDP port to listen on',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Readings per bulk insert (default: 1000)',
+        )
+        parser.add_argument(
+            '--flush-interval',
+            type=float,
+            default=1.0,
+            help='Maximum seconds a reading waits before being written (default: 1.0)',
+        )
+        parser.add_argument(
+            '--queue-size',
+            type=int,
+            default=50000,
+            help='Readings buffered before TCP clients are throttled and UDP drops (default: 50000)',
+        )
+        parser.add_argument(
+            '--stats-interval',
+            type=float,
+            default=10.0,
+            help='Seconds between metrics reports, 0 to disable (default: 10)',
+        )
+
+    def handle(self, *args, **options):
+        if options['tcp_port'] is None and options['udp_port'] is None:
+            raise CommandError('Specify --tcp-port and/or --udp-port.')
+
+        logging.basicConfig(level=logging.INFO)
+
+        def report(stats):
+            self.stdout.write(
+                f"[ingest] written={stats['readings_written']} "
+                f"rate={stats['ingest_rate']}/s "
+                f"queue={stats['queue_depth']} "
+                f"rejected={stats['lines_rejected']} "
+                f"dropped={stats['lines_dropped']} "
+                f"duplicates={stats['duplicate_readings']} "
+                f"unknown={stats['unknown_sensors']} "
+                f"errors={stats['write_errors']} "
+                f"anomalies={stats['anomaly_transitions']} "
+                f"batch={stats['avg_batch_ms']}ms"
+            )
+
+        async def run():
+            gateway = IngestGateway(
+                batch_size=options['batch_size'],
+                flush_interval=options['flush_interval'],
+                queue_size=options['queue_size'],
+                stats_interval=options['stats_interval'],
+                report=report,
+            )
+            await gateway.serve_forever(
+                host=options['host'],
+                tcp_port=options['tcp_port'],
+                udp_port=options['udp_port'],
+            )
+
+        try:
+            asyncio.run(run())
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('\nIngest gateway stopped.'))
@@ -2,14 +2,196 @@
 Management command to install all sensors for farms
 This creates sensors for simulation purposes
 Run with: python manage.py install_farm_sensors
+Batch mode: python manage.py install_farm_sensors --farms 1-5000,7001
+
+Sensor types are loaded once and existing sensors are read with one query per
+batch of farms; only the missing (farm, type, name) sensors are bulk inserted.
 """
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from farms.models import Farm
 from sensors.models import SensorType, Sensor
+from sensors.topology import invalidate_farms
+from farms.cache import bump_farm_versions
+
+
+def get_sensor_configurations(farm):
+    """
+    Get sensor configurations for a farm
+    Returns list of dicts with sensor_type, name, and location
+    """
+    farm_name_short = farm.name.split()[0]  # First word of farm name
+
+    configs = [
+        # Soil Sensors - 300cm depth for comprehensive monitoring
+        {
+            'sensor_type': 'Soil Moisture',
+            'name': f'{farm_name_short} Soil Moisture - Plot A (300cm)',
+            'location': 'Plot A, 300cm depth'
+        },
+        {
+            'sensor_type': 'Soil Moisture',
+            'name': f'{farm_name_short} Soil Moisture - Plot B (300cm)',
+            'location': 'Plot B, 300cm depth'
+        },
+        {
+            'sensor_type': 'Soil Moisture',
+            'name': f'{farm_name_short} Soil Moisture - Plot C (300cm)',
+            'location': 'Plot C, 300cm depth'
+        },
+        {
+            'sensor_type': 'Soil Temperature',
+            'name': f'{farm_name_short} Soil Temperature - Plot A (300cm)',
+            'location': 'Plot A, 300cm depth'
+        },
+        {
+            'sensor_type': 'Soil Temperature',
+            'name': f'{farm_name_short} Soil Temperature - Plot B (300cm)',
+            'location': 'Plot B, 300cm depth'
+        },
+        {
+            'sensor_type': 'Soil Electrical Conductivity',
+            'name': f'{farm_name_short} Soil EC - Plot A',
+            'location': 'Plot A, root zone'
+        },
+        {
+            'sensor_type': 'Soil Electrical Conductivity',
+            'name': f'{farm_name_short} Soil EC - Plot B',
+            'location': 'Plot B, root zone'
+        },
+        
+        # Water Sensors - For irrigation system monitoring
+        {
+            'sensor_type': 'Water Quality/Salinity',
+            'name': f'{farm_name_short} Water Quality - Main Line',
+            'location': 'Irrigation main line, entry point'
+        },
+        {
+            'sensor_type': 'Water Flow',
+            'name': f'{farm_name_short} Water Flow - Main Line',
+            'location': 'Irrigation main line, flow meter'
+        },
+        {
+            'sensor_type': 'Water Flow',
+            'name': f'{farm_name_short} Water Flow - Plot A',
+            'location': 'Plot A irrigation zone'
+        },
+        {
+            'sensor_type': 'Water Flow',
+            'name': f'{farm_name_short} Water Flow - Plot B',
+            'location': 'Plot B irrigation zone'
+        },
+        
+        # Weather Sensors - Environmental monitoring
+        {
+            'sensor_type': 'Air Temperature',
+            'name': f'{farm_name_short} Air Temperature - Station 1',
+            'location': 'Weather station, 2m height'
+        },
+        {
+            'sensor_type': 'Air Humidity',
+            'name': f'{farm_name_short} Air Humidity - Station 1',
+            'location': 'Weather station, 2m height'
+        },
+        {
+            'sensor_type': 'Rain Gauge',
+            'name': f'{farm_name_short} Rain Gauge',
+            'location': 'Weather station, open area'
+        },
+        
+        # Solar Sensors - PV system monitoring
+        {
+            'sensor_type': 'Solar Irradiance',
+            'name': f'{farm_name_short} Solar Irradiance - Array 1',
+            'location': 'PV Array 1, panel surface'
+        },
+        {
+            'sensor_type': 'Solar Irradiance',
+            'name': f'{farm_name_short} Solar Irradiance - Array 2',
+            'location': 'PV Array 2, panel surface'
+        },
+        {
+            'sensor_type': 'Photosynthetic Active Radiation',
+            'name': f'{farm_name_short} PAR - Crop Canopy',
+            'location': 'Plot A, crop canopy level'
+        },
+        {
+            'sensor_type': 'Photosynthetic Active Radiation',
+            'name': f'{farm_name_short} PAR - Open Field',
+            'location': 'Weather station, reference level'
+        },
+    ]
+
+    return configs
+
+
+def parse_farm_ids(value):
+    """Parse a --farms value such as '1,4,10-20' into a sorted list of ids"""
+    farm_ids = set()
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                start, end = (int(bound) for bound in part.split('-', 1))
+                farm_ids.update(range(start, end + 1))
+            else:
+                farm_ids.add(int(part))
+        except ValueError:
+            raise CommandError(f'Invalid --farms entry: "{part}"')
+    return sorted(farm_ids)
+
+
+def install_sensors(farms, sensor_types, batch_size=2000):
+    """
+    Install the standard sensor set on many farms at once
+
+    Args:
+        farms: Farm instances (only id and name are used)
+        sensor_types: Dict of SensorType name -> SensorType
+        batch_size: Rows per INSERT
+
+    Returns:
+        (installed sensors, skipped count, missing type names)
+    """
+    farms = list(farms)
+    existing = set(
+        Sensor.objects.filter(farm__in=farms).values_list('farm_id', 'sensor_type_id', 'name')
+    )
+
+    to_create = []
+    skipped = 0
+    missing_types = set()
+    for farm in farms:
+        for config in get_sensor_configurations(farm):
+            sensor_type = sensor_types.get(config['sensor_type'])
+            if sensor_type is None:
+                missing_types.add(config['sensor_type'])
+                skipped += 1
+                continue
+            key = (farm.id, sensor_type.id, config['name'])
+            if key in existing:
+                skipped += 1
+                continue
+            existing.add(key)
+            to_create.append(Sensor(
+                farm_id=farm.id,
+                sensor_type=sensor_type,
+                name=config['name'],
+                location=config['location'],
+                is_active=True,
+            ))
+
+    installed = Sensor.objects.bulk_create(to_create, batch_size=batch_size)
+    # bulk_create sends no post_save signals
+    farm_ids = {sensor.farm_id for sensor in installed}
+    invalidate_farms(farm_ids)
+    bump_farm_versions(farm_ids)
+    return installed, skipped, missing_types
 
 
 class Command(BaseCommand):
-    help = 'Install all sensor types for all farms (or specific farm)'
+    help = 'Install all sensor types for all farms (or specific farms)'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -17,112 +199,92 @@ class Command(BaseCommand):
             type=int,
             help='Install sensors for a specific farm ID only',
         )
+        parser.add_argument(
+            '--farms',
+            help='Comma-separated farm IDs and ranges to install on, e.g. 1-5000,7001',
+        )
         parser.add_argument(
             '--clear-existing',
             action='store_true',
             help='Remove existing sensors before installing new ones',
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Farms processed per batch (default: 1000)',
+        )
 
     def handle(self, *args, **options):
         farm_id = options.get('farm_id')
         clear_existing = options.get('clear_existing', False)
+        batch_size = options['batch_size']
+        verbose = options['verbosity'] > 1
 
-        # Get all sensor types
-        sensor_types = SensorType.objects.all()
-        if not sensor_types.exists():
+        # Load all sensor types once
+        sensor_types = {sensor_type.name: sensor_type for sensor_type in SensorType.objects.all()}
+        if not sensor_types:
             self.stdout.write(
                 self.style.ERROR('No sensor types found. Please run: python manage.py create_sensor_types')
             )
             return
 
         # Get farms
+        farms = Farm.objects.order_by('id').only('id', 'name')
         if farm_id:
-            try:
-                farms = [Farm.objects.get(id=farm_id)]
-            except Farm.DoesNotExist:
+            farms = farms.filter(id=farm_id)
+        elif options.get('farms'):
+            farms = farms.filter(id__in=parse_farm_ids(options['farms']))
+
+        farm_ids = list(farms.values_list('id', flat=True))
+        if not farm_ids:
+            if farm_id:
                 self.stdout.write(
                     self.style.ERROR(f'Farm with ID {farm_id} not found.')
                 )
-                return
-        else:
-            farms = Farm.objects.all()
-
-        if not farms:
-            self.stdout.write(
-                self.style.ERROR('No farms found. Please create farms first.')
-            )
+            else:
+                self.stdout.write(
+                    self.style.ERROR('No farms found. Please create farms first.')
+                )
             return
 
         total_installed = 0
         total_skipped = 0
+        total_removed = 0
+        missing_types = set()
 
-        for farm in farms:
-            self.stdout.write(f'\n{"="*60}')
-            self.stdout.write(f'Processing: {farm.name} (ID: {farm.id})')
-            self.stdout.write(f'{"="*60}')
+        for start in range(0, len(farm_ids), batch_size):
+            batch = list(farms.filter(id__in=farm_ids[start:start + batch_size]))
 
             # Clear existing sensors if requested
             if clear_existing:
-                existing_count = farm.sensors.count()
-                farm.sensors.all().delete()
-                self.stdout.write(
-                    self.style.WARNING(f'Removed {existing_count} existing sensors.')
-                )
-
-            # Define sensor configurations with locations
-            sensor_configs = self._get_sensor_configurations(farm)
-
-            installed_count = 0
-            skipped_count = 0
+                removed, _ = Sensor.objects.filter(farm__in=batch).delete()
+                total_removed += removed
 
-            for config in sensor_configs:
-                sensor_type_name = config['sensor_type']
-                sensor_name = config['name']
-                location = config['location']
-
-                # Find sensor type
-                try:
-                    sensor_type = SensorType.objects.get(name=sensor_type_name)
-                except SensorType.DoesNotExist:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'  ⚠ Sensor type "{sensor_type_name}" not found. Skipping.'
-                        )
-                    )
-                    skipped_count += 1
-                    continue
-
-                # Create or get sensor
-                sensor, created = Sensor.objects.get_or_create(
-                    farm=farm,
-                    sensor_type=sensor_type,
-                    name=sensor_name,
-                    defaults={
-                        'location': location,
-                        'is_active': True,
-                    }
-                )
+            installed, skipped, missing = install_sensors(batch, sensor_types)
+            total_installed += len(installed)
+            total_skipped += skipped
+            missing_types |= missing
 
-                if created:
+            if verbose:
+                for sensor in installed:
                     self.stdout.write(
                         self.style.SUCCESS(
-                            f'  ✓ Installed: {sensor_name} ({sensor_type.name}) - {location}'
+                            f'  ✓ Installed: {sensor.name} ({sensor.sensor_type.name}) - {sensor.location}'
                         )
                     )
-                    installed_count += 1
-                else:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'  ○ Already exists: {sensor_name} ({sensor_type.name})'
-                        )
-                    )
-                    skipped_count += 1
-
-            total_installed += installed_count
-            total_skipped += skipped_count
+            self.stdout.write(
+                f'  Farms {start + 1}-{start + len(batch)} of {len(farm_ids)}: '
+                f'Installed: {len(installed)} | Skipped: {skipped}'
+            )
 
+        if total_removed:
+            self.stdout.write(
+                self.style.WARNING(f'Removed {total_removed} existing sensors (including their readings).')
+            )
+        for name in sorted(missing_types):
             self.stdout.write(
-                f'\n  Installed: {installed_count} | Skipped: {skipped_count}'
+                self.style.WARNING(f'  ⚠ Sensor type "{name}" not found. Skipped.')
             )
 
         self.stdout.write(f'\n{"="*60}')
@@ -131,113 +293,3 @@ class Command(BaseCommand):
                 f'\nComplete! Total installed: {total_installed} | Total skipped: {total_skipped}'
             )
         )
-
-    def _get_sensor_configurations(self, farm):
-        """
-        Get sensor configurations for a farm
-        Returns list of dicts with sensor_type, name, and location
-        """
-        farm_name_short = farm.name.split()[0]  # First word of farm name
-
-        configs = [
-            # Soil Sensors - 300cm depth for comprehensive monitoring
-            {
-                'sensor_type': 'Soil Moisture',
-                'name': f'{farm_name_short} Soil Moisture - Plot A (300cm)',
-                'location': 'Plot A, 300cm depth'
-            },
-            {
-                'sensor_type': 'Soil Moisture',
-                'name': f'{farm_name_short} Soil Moisture - Plot B (300cm)',
-                'location': 'Plot B, 300cm depth'
-            },
-            {
-                'sensor_type': 'Soil Moisture',
-                'name': f'{farm_name_short} Soil Moisture - Plot C (300cm)',
-                'location': 'Plot C, 300cm depth'
-            },
-            {
-                'sensor_type': 'Soil Temperature',
-                'name': f'{farm_name_short} Soil Temperature - Plot A (300cm)',
-                'location': 'Plot A, 300cm depth'
-            },
-            {
-                'sensor_type': 'Soil Temperature',
-                'name': f'{farm_name_short} Soil Temperature - Plot B (300cm)',
-                'location': 'Plot B, 300cm depth'
-            },
-            {
-                'sensor_type': 'Soil Electrical Conductivity',
-                'name': f'{farm_name_short} Soil EC - Plot A',
-                'location': 'Plot A, root zone'
-            },
-            {
-                'sensor_type': 'Soil Electrical Conductivity',
-                'name': f'{farm_name_short} Soil EC - Plot B',
-                'location': 'Plot B, root zone'
-            },
-            
-            # Water Sensors - For irrigation system monitoring
-            {
-                'sensor_type': 'Water Quality/Salinity',
-                'name': f'{farm_name_short} Water Quality - Main Line',
-                'location': 'Irrigation main line, entry point'
-            },
-            {
-                'sensor_type': 'Water Flow',
-                'name': f'{farm_name_short} Water Flow - Main Line',
-                'location': 'Irrigation main line, flow meter'
-            },
-            {
-                'sensor_type': 'Water Flow',
-                'name': f'{farm_name_short} Water Flow - Plot A',
-                'location': 'Plot A irrigation zone'
-            },
-            {
-                'sensor_type': 'Water Flow',
-                'name': f'{farm_name_short} Water Flow - Plot B',
-                'location': 'Plot B irrigation zone'
-            },
-            
-            # Weather Sensors - Environmental monitoring
-            {
-                'sensor_type': 'Air Temperature',
-                'name': f'{farm_name_short} Air Temperature - Station 1',
-                'location': 'Weather station, 2m height'
-            },
-            {
-                'sensor_type': 'Air Humidity',
-                'name': f'{farm_name_short} Air Humidity - Station 1',
-                'location': 'Weather station, 2m height'
-            },
-            {
-                'sensor_type': 'Rain Gauge',
-                'name': f'{farm_name_short} Rain Gauge',
-                'location': 'Weather station, open area'
-            },
-            
-            # Solar Sensors - PV system monitoring
-            {
-                'sensor_type': 'Solar Irradiance',
-                'name': f'{farm_name_short} Solar Irradiance - Array 1',
-                'location': 'PV Array 1, panel surface'
-            },
-            {
-                'sensor_type': 'Solar Irradiance',
-                'name': f'{farm_name_short} Solar Irradiance - Array 2',
-                'location': 'PV Array 2, panel surface'
-            },
-            {
-                'sensor_type': 'Photosynthetic Active Radiation',
-                'name': f'{farm_name_short} PAR - Crop Canopy',
-                'location': 'Plot A, crop canopy level'
-            },
-            {
-                'sensor_type': 'Photosynthetic Active Radiation',
-                'name': f'{farm_name_short} PAR - Open Field',
-                'location': 'Weather station, reference level'
-            },
-        ]
-
-        return configs
-
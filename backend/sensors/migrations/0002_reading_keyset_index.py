@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sensorreading',
+            index=models.Index(fields=['-timestamp', '-id'], name='sensors_sen_timesta_f8a0bc_idx'),
+        ),
+    ]
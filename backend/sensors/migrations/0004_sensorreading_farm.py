@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:20
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_reading_farm(apps, schema_editor):
+    """Copy sensor.farm_id onto every existing reading in one UPDATE"""
+    Sensor = apps.get_model('sensors', 'Sensor')
+    SensorReading = apps.get_model('sensors', 'SensorReading')
+    SensorReading.objects.filter(farm__isnull=True).update(
+        farm_id=Subquery(
+            Sensor.objects.filter(id=OuterRef('sensor_id')).values('farm_id')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farms', '0003_add_irrigation_priority_and_load'),
+        ('sensors', '0003_reading_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sensorreading',
+            name='farm',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sensor_readings', to='farms.farm'),
+        ),
+        migrations.RunPython(backfill_reading_farm, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='sensorreading',
+            name='farm',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sensor_readings', to='farms.farm'),
+        ),
+        migrations.AddIndex(
+            model_name='sensorreading',
+            index=models.Index(fields=['farm', '-timestamp'], name='sensors_sen_farm_id_30da8c_idx'),
+        ),
+    ]
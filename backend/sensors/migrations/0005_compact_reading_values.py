@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:12
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0004_sensorreading_farm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sensorreading',
+            name='value_scaled',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='sensortype',
+            name='value_scale',
+            field=models.PositiveSmallIntegerField(default=4, validators=[django.core.validators.MaxValueValidator(4)]),
+        ),
+        migrations.AlterField(
+            model_name='sensorreading',
+            name='value',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=10, null=True),
+        ),
+    ]
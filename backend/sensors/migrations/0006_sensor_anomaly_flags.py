@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0005_compact_reading_values'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sensor',
+            name='anomaly',
+            field=models.CharField(blank=True, choices=[('', 'None'), ('stuck', 'Stuck'), ('spike', 'Spike'), ('out_of_range', 'Out of range')], default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='sensor',
+            name='anomaly_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:40
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_readings(apps, schema_editor):
+    """Keep the oldest row of every (sensor, timestamp) pair"""
+    SensorReading = apps.get_model('sensors', 'SensorReading')
+    duplicates = (
+        SensorReading.objects.values('sensor_id', 'timestamp')
+        .annotate(keep_id=Min('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for duplicate in duplicates.iterator():
+        SensorReading.objects.filter(
+            sensor_id=duplicate['sensor_id'],
+            timestamp=duplicate['timestamp'],
+        ).exclude(id=duplicate['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0006_sensor_anomaly_flags'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_readings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='sensorreading',
+            constraint=models.UniqueConstraint(fields=('sensor', 'timestamp'), name='unique_sensor_reading_timestamp'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:19
+
+from django.db import migrations, models
+
+
+def repair_value_columns(apps, schema_editor):
+    """
+    Drop the stale scaled value of readings whose decimal column was
+    rewritten with compact storage off, and readings with no value at all
+    """
+    SensorReading = apps.get_model('sensors', 'SensorReading')
+    SensorReading.objects.filter(value__isnull=False, value_scaled__isnull=False).update(value_scaled=None)
+    SensorReading.objects.filter(value__isnull=True, value_scaled__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0007_unique_sensor_reading_timestamp'),
+    ]
+
+    operations = [
+        migrations.RunPython(repair_value_columns, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='sensorreading',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('value__isnull', False), ('value_scaled__isnull', True)), models.Q(('value__isnull', True), ('value_scaled__isnull', False)), _connector='OR'), name='sensor_reading_one_value_column'),
+        ),
+    ]
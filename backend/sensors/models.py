@@ -1,7 +1,54 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from django.core.validators import MaxValueValidator
 from django.db import models
+from django.utils import timezone
 from farms.models import Farm
 
 
+# Compact storage keeps readings as a 32-bit integer scaled by 10**value_scale
+VALUE_DECIMAL_PLACES = 4
+SCALED_VALUE_MAX = 2 ** 31 - 1
+
+
+def encode_value(value, scale):
+    """
+    Split a reading value into its storage columns
+    
+    Returns:
+        (value, value_scaled) - exactly one is set. Values that do not fit the
+        scaled integer column stay in the decimal column.
+    """
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    scaled = int(value.scaleb(scale).to_integral_value(ROUND_HALF_UP))
+    if abs(scaled) > SCALED_VALUE_MAX:
+        return value, None
+    return None, scaled
+
+
+def decode_value(value, value_scaled, scale):
+    """Reading value as a float, whichever column it is stored in"""
+    if value_scaled is not None:
+        return value_scaled / 10 ** scale
+    if value is not None:
+        return float(value)
+    return None
+
+
+def format_value(value, value_scaled, scale):
+    """
+    Reading value as the API string (4 decimal places), matching what the
+    DecimalField serializer produced before compact storage
+    """
+    if value_scaled is None:
+        return f"{value:.{VALUE_DECIMAL_PLACES}f}"
+    shifted = value_scaled * 10 ** (VALUE_DECIMAL_PLACES - scale)
+    whole, frac = divmod(abs(shifted), 10 ** VALUE_DECIMAL_PLACES)
+    sign = '-' if shifted < 0 else ''
+    return f"{sign}{whole}.{frac:0{VALUE_DECIMAL_PLACES}d}"
+
+
 class SensorType(models.Model):
     """Sensor type definitions"""
     SENSOR_CATEGORIES = [
@@ -15,6 +62,12 @@ class SensorType(models.Model):
     category = models.CharField(max_length=20, choices=SENSOR_CATEGORIES)
     unit = models.CharField(max_length=20)
     description = models.TextField(blank=True)
+    # Decimal places kept when readings use compact (scaled integer) storage;
+    # fixed after creation, since stored readings are decoded with it
+    value_scale = models.PositiveSmallIntegerField(
+        default=VALUE_DECIMAL_PLACES,
+        validators=[MaxValueValidator(VALUE_DECIMAL_PLACES)]
+    )
     
     def __str__(self):
         return f"{self.name} ({self.category})"
@@ -22,6 +75,13 @@ class SensorType(models.Model):
 
 class Sensor(models.Model):
     """Sensor device installed on a farm"""
+    ANOMALY_CHOICES = [
+        ('', 'None'),
+        ('stuck', 'Stuck'),
+        ('spike', 'Spike'),
+        ('out_of_range', 'Out of range'),
+    ]
+    
     farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='sensors')
     sensor_type = models.ForeignKey(SensorType, on_delete=models.CASCADE)
     name = models.CharField(max_length=200)
@@ -29,6 +89,10 @@ class Sensor(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Set by streaming anomaly detection on ingest (see sensors.anomaly)
+    anomaly = models.CharField(max_length=20, choices=ANOMALY_CHOICES, blank=True, default='')
+    anomaly_since = models.DateTimeField(null=True, blank=True)
+    
     class Meta:
         ordering = ['farm', 'sensor_type', 'name']
     
@@ -39,15 +103,51 @@ class Sensor(models.Model):
 class SensorReading(models.Model):
     """Individual sensor reading"""
     sensor = models.ForeignKey(Sensor, on_delete=models.CASCADE, related_name='readings')
-    value = models.DecimalField(max_digits=10, decimal_places=4)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Denormalized from sensor.farm so farm-scoped queries skip the sensor join
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='sensor_readings')
+    # Exactly one of value / value_scaled is set, see SENSOR_READINGS_COMPACT
+    value = models.DecimalField(max_digits=10, decimal_places=4, null=True, blank=True)
+    value_scaled = models.IntegerField(null=True, blank=True)
+    # Not auto_now_add: devices and generators supply their own timestamps
+    timestamp = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['-timestamp', 'sensor']),
+            models.Index(fields=['-timestamp', '-id']),
+            models.Index(fields=['farm', '-timestamp']),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['sensor', 'timestamp'], name='unique_sensor_reading_timestamp'),
+            models.CheckConstraint(
+                check=(
+                    models.Q(value__isnull=False, value_scaled__isnull=True)
+                    | models.Q(value__isnull=True, value_scaled__isnull=False)
+                ),
+                name='sensor_reading_one_value_column',
+            ),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if self.farm_id is None and self.sensor_id is not None:
+            self.farm_id = self.sensor.farm_id
+        # A new value replaces whichever column held the old one
+        if settings.SENSOR_READINGS_COMPACT and self.value is not None:
+            self.value, self.value_scaled = encode_value(
+                self.value, self.sensor.sensor_type.value_scale
+            )
+        elif self.value is not None:
+            self.value_scaled = None
+        super().save(*args, **kwargs)
+    
+    @property
+    def numeric_value(self):
+        """Reading value as a float, whichever column it is stored in"""
+        if self.value_scaled is None:
+            return decode_value(self.value, None, 0)
+        return decode_value(None, self.value_scaled, self.sensor.sensor_type.value_scale)
     
     def __str__(self):
-        return f"{self.sensor.name}: {self.value} {self.sensor.sensor_type.unit} at {self.timestamp}"
+        return f"{self.sensor.name}: {self.numeric_value} {self.sensor.sensor_type.unit} at {self.timestamp}"
 
@@ -0,0 +1,158 @@
+"""
+Pagination for sensor readings
+Keyset (cursor) pagination on (timestamp, id) with estimated totals, so every
+page costs one index range scan no matter how deep it is.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimated_count(queryset):
+    """
+    Estimate the number of rows a queryset returns without running COUNT(*)
+
+    Unfiltered querysets read pg_class.reltuples for the table. Filtered ones
+    use the planner's row estimate for the query. Other databases fall back to
+    an exact count.
+    """
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    queryset = queryset.order_by()
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+            # reltuples is -1 for tables that were never analyzed
+            if row and row[0] >= 0:
+                return row[0]
+            return queryset.count()
+
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class ReadingCursorPagination(BasePagination):
+    """
+    Keyset pagination ordered by (-timestamp, -id)
+
+    The cursor encodes the (timestamp, id) of the last row seen, so the next
+    page is a `WHERE (timestamp, id) < cursor` range scan instead of an OFFSET.
+    """
+    page_size = 20
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        self.count = estimated_count(queryset)
+
+        if cursor is None:
+            reverse = False
+            rows = list(queryset.order_by('-timestamp', '-id')[:self.page_size + 1])
+        else:
+            timestamp, pk, reverse = cursor
+            if reverse:
+                # Walking backwards: rows newer than the cursor, oldest first
+                rows = list(
+                    queryset.filter(
+                        Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk)
+                    ).order_by('timestamp', 'id')[:self.page_size + 1]
+                )
+            else:
+                rows = list(
+                    queryset.filter(
+                        Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk)
+                    ).order_by('-timestamp', '-id')[:self.page_size + 1]
+                )
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            timestamp, pk, reverse = raw.rsplit('|', 2)
+            timestamp = parse_datetime(timestamp)
+            if timestamp is None:
+                raise ValueError
+            return timestamp, int(pk), reverse == '1'
+        except (ValueError, UnicodeError):
+            raise NotFound('Invalid cursor')
+
+    def encode_cursor(self, reading, reverse):
+        raw = f"{reading.timestamp.isoformat()}|{reading.id}|{int(reverse)}"
+        encoded = urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
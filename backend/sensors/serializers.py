@@ -1,11 +1,39 @@
+from django.db.models import OuterRef, Subquery
 from rest_framework import serializers
-from .models import SensorType, Sensor, SensorReading
+from farms.projection import SparseFieldsMixin
+from .models import SensorType, Sensor, SensorReading, decode_value, format_value
+
+
+class ReadingValueField(serializers.DecimalField):
+    """
+    Reading value from whichever column stores it
+
+    Compact (scaled integer) readings are formatted straight from the integer,
+    so they render exactly like the decimal column without building a Decimal.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(max_digits=10, decimal_places=4, source='*', **kwargs)
+
+    def to_representation(self, reading):
+        if reading.value_scaled is None:
+            return super().to_representation(reading.value)
+        return format_value(None, reading.value_scaled, reading.sensor.sensor_type.value_scale)
+
+    def to_internal_value(self, data):
+        return {'value': super().to_internal_value(data)}
 
 
 class SensorTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = SensorType
-        fields = ['id', 'name', 'category', 'unit', 'description']
+        fields = ['id', 'name', 'category', 'unit', 'description', 'value_scale']
+    
+    def validate_value_scale(self, value):
+        """Stored compact readings are decoded with the current scale, so it cannot change"""
+        if self.instance is not None and value != self.instance.value_scale:
+            raise serializers.ValidationError('value_scale cannot be changed after creation')
+        return value
 
 
 class SensorSerializer(serializers.ModelSerializer):
@@ -17,25 +45,50 @@ class SensorSerializer(serializers.ModelSerializer):
         model = Sensor
         fields = [
             'id', 'farm', 'farm_name', 'sensor_type', 'name',
-            'location', 'is_active', 'created_at', 'latest_reading'
+            'location', 'is_active', 'created_at', 'latest_reading',
+            'anomaly', 'anomaly_since'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'created_at', 'anomaly', 'anomaly_since']
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Join farm and sensor type, and annotate each sensor's latest reading
+        with correlated subqueries on the (sensor, timestamp) index
+        """
+        latest = SensorReading.objects.filter(sensor=OuterRef('pk')).order_by('-timestamp')
+        return queryset.select_related('farm', 'sensor_type').annotate(
+            latest_value=Subquery(latest.values('value')[:1]),
+            latest_value_scaled=Subquery(latest.values('value_scaled')[:1]),
+            latest_timestamp=Subquery(latest.values('timestamp')[:1]),
+        )
     
     def get_latest_reading(self, obj):
+        if hasattr(obj, 'latest_timestamp'):
+            if obj.latest_timestamp is None:
+                return None
+            return {
+                'value': decode_value(obj.latest_value, obj.latest_value_scaled, obj.sensor_type.value_scale),
+                'timestamp': obj.latest_timestamp
+            }
+        
         latest = obj.readings.first()
         if latest:
+            # Attach the already-loaded sensor so decoding needs no extra query
+            latest.sensor = obj
             return {
-                'value': float(latest.value),
+                'value': latest.numeric_value,
                 'timestamp': latest.timestamp
             }
         return None
 
 
-class SensorReadingSerializer(serializers.ModelSerializer):
+class SensorReadingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     sensor_name = serializers.CharField(source='sensor.name', read_only=True)
     sensor_type = serializers.CharField(source='sensor.sensor_type.name', read_only=True)
     unit = serializers.CharField(source='sensor.sensor_type.unit', read_only=True)
-    farm_name = serializers.CharField(source='sensor.farm.name', read_only=True)
+    farm_name = serializers.CharField(source='farm.name', read_only=True)
+    value = ReadingValueField()
     
     class Meta:
         model = SensorReading
@@ -44,4 +97,12 @@ class SensorReadingSerializer(serializers.ModelSerializer):
             'farm_name', 'value', 'timestamp'
         ]
         read_only_fields = ['id', 'timestamp']
+    
+    projection = {
+        'sensor_name': ('sensor__name',),
+        'sensor_type': ('sensor__sensor_type__name',),
+        'unit': ('sensor__sensor_type__unit',),
+        'farm_name': ('farm__name',),
+        'value': ('value', 'value_scaled', 'sensor__sensor_type__value_scale'),
+    }
 
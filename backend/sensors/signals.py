@@ -0,0 +1,49 @@
+"""
+Signal handlers keeping the sensor topology cache in step with the database
+"""
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from farms.cache import bump_farm_versions
+from farms.events import publish
+
+from . import topology
+from .models import Sensor, SensorReading, SensorType
+
+
+@receiver(post_save, sender=SensorType)
+@receiver(post_delete, sender=SensorType)
+def sensor_type_changed(sender, instance, **kwargs):
+    topology.invalidate_sensor_types()
+
+
+@receiver(post_init, sender=Sensor)
+def sensor_loaded(sender, instance, **kwargs):
+    # The farm the row was loaded with, so a move invalidates the old farm too
+    instance._loaded_farm_id = instance.__dict__.get('farm_id')
+
+
+@receiver(post_save, sender=Sensor)
+@receiver(post_delete, sender=Sensor)
+def sensor_changed(sender, instance, **kwargs):
+    farm_ids = {instance.farm_id, instance._loaded_farm_id} - {None}
+    topology.invalidate_farms(farm_ids)
+    bump_farm_versions(farm_ids)
+    instance._loaded_farm_id = instance.farm_id
+
+
+@receiver(post_save, sender=SensorReading)
+def sensor_reading_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_farm_versions([instance.farm_id])
+        publish(instance.farm_id, 'reading', lambda: reading_payload(instance))
+
+
+def reading_payload(reading):
+    """Live event payload of a new reading"""
+    return {
+        'id': reading.id,
+        'sensor': reading.sensor_id,
+        'value': reading.numeric_value,
+        'timestamp': reading.timestamp,
+    }
@@ -0,0 +1,168 @@
+"""
+Process-wide cache of sensor types and per-farm sensor topology
+Hot paths (soil moisture, dashboards) look sensors up here instead of querying.
+Every entry is stored with the generation it was loaded under. Generations
+live in the Django cache and are bumped by post_save/post_delete signals (see
+sensors.signals) and by anomaly flag changes, so with a shared cache a bump in
+any process (the ingest gateway, a worker) retires the entry everywhere.
+Entries also expire after SENSOR_TOPOLOGY_TTL seconds as a backstop for
+writes that bypass both, or when the cache is per process.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+SensorTypeInfo = namedtuple('SensorTypeInfo', ['id', 'name', 'category', 'unit', 'value_scale'])
+SensorInfo = namedtuple('SensorInfo', ['id', 'sensor_type_id', 'name', 'anomaly'])
+
+
+class FarmTopology:
+    """Active sensors of one farm, indexed by type and category"""
+
+    def __init__(self, sensors, sensor_types):
+        self.sensors = sensors
+        self.by_type = {}
+        self.by_category = {}
+        for sensor in sensors:
+            self.by_type.setdefault(sensor.sensor_type_id, []).append(sensor)
+            sensor_type = sensor_types.get(sensor.sensor_type_id)
+            if sensor_type is not None:
+                self.by_category.setdefault(sensor_type.category, []).append(sensor)
+
+    def sensors_of_type(self, sensor_type_id, exclude_flagged=False):
+        sensors = self.by_type.get(sensor_type_id, [])
+        if exclude_flagged:
+            return [sensor for sensor in sensors if not sensor.anomaly]
+        return list(sensors)
+
+
+_lock = threading.Lock()
+# (loaded at, generation, value)
+_sensor_types = None
+_farms = {}
+
+SENSOR_TYPES_KEY = 'sensor-types-generation'
+
+
+def _farm_key(farm_id):
+    return f'sensor-topology-generation:{farm_id}'
+
+
+def _generations(keys):
+    """Current generation of each cache key, starting missing ones from the clock"""
+    found = cache.get_many(keys)
+    generations = []
+    for key in keys:
+        generation = found.get(key)
+        if generation is None:
+            generation = int(time.time() * 1000)
+            # add() so two processes starting a generation at once agree on it
+            if not cache.add(key, generation, None):
+                generation = cache.get(key, generation)
+        generations.append(generation)
+    return tuple(generations)
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), None)
+
+
+def _fresh(entry, generation):
+    return (
+        entry is not None
+        and entry[1] == generation
+        and time.monotonic() - entry[0] <= settings.SENSOR_TOPOLOGY_TTL
+    )
+
+
+def get_sensor_types():
+    """All sensor types as {id: SensorTypeInfo}"""
+    global _sensor_types
+    # Read before loading: an invalidation during the load leaves the result
+    # stored under an already retired generation
+    generation = _generations([SENSOR_TYPES_KEY])
+    entry = _sensor_types
+    if _fresh(entry, generation):
+        return entry[2]
+
+    from .models import SensorType
+
+    sensor_types = {
+        row[0]: SensorTypeInfo(*row)
+        for row in SensorType.objects.order_by('id').values_list(
+            'id', 'name', 'category', 'unit', 'value_scale'
+        )
+    }
+    with _lock:
+        _sensor_types = (time.monotonic(), generation, sensor_types)
+    return sensor_types
+
+
+def find_sensor_type(name_contains=None, category=None):
+    """First sensor type (by id) whose name contains name_contains, case-insensitively"""
+    needle = name_contains.lower() if name_contains else None
+    for sensor_type in get_sensor_types().values():
+        if category is not None and sensor_type.category != category:
+            continue
+        if needle is not None and needle not in sensor_type.name.lower():
+            continue
+        return sensor_type
+    return None
+
+
+def get_farm_topology(farm_id):
+    """Active sensors of a farm as a FarmTopology"""
+    # Topologies are built from the sensor types too, so both generations count
+    generation = _generations([SENSOR_TYPES_KEY, _farm_key(farm_id)])
+    entry = _farms.get(farm_id)
+    if _fresh(entry, generation):
+        return entry[2]
+
+    from .models import Sensor
+
+    sensors = [
+        SensorInfo(*row)
+        for row in Sensor.objects.filter(farm_id=farm_id, is_active=True).order_by('id').values_list(
+            'id', 'sensor_type_id', 'name', 'anomaly'
+        )
+    ]
+    topology = FarmTopology(sensors, get_sensor_types())
+    with _lock:
+        _farms[farm_id] = (time.monotonic(), generation, topology)
+    return topology
+
+
+def invalidate_sensor_types():
+    """Retire cached sensor types and every farm topology built from them"""
+    global _sensor_types
+    _bump([SENSOR_TYPES_KEY])
+    with _lock:
+        _sensor_types = None
+        _farms.clear()
+
+
+def invalidate_farms(farm_ids):
+    """Retire the cached topology of these farms in every process"""
+    farm_ids = set(farm_ids)
+    _bump([_farm_key(farm_id) for farm_id in farm_ids])
+    with _lock:
+        for farm_id in farm_ids:
+            _farms.pop(farm_id, None)
+
+
+def invalidate_sensors(sensor_ids):
+    """Drop the topology of every farm owning one of these sensors; returns those farm ids"""
+    from .models import Sensor
+
+    farm_ids = set(
+        Sensor.objects.filter(id__in=list(sensor_ids)).values_list('farm_id', flat=True)
+    )
+    invalidate_farms(farm_ids)
+    return farm_ids
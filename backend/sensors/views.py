@@ -2,11 +2,18 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from datetime import timedelta
-from .models import SensorType, Sensor, SensorReading
+from .models import SensorType, Sensor, SensorReading, decode_value
 from .serializers import SensorTypeSerializer, SensorSerializer, SensorReadingSerializer
+from .downsampling import DOWNSAMPLERS, MIN_POINTS
+from .pagination import ReadingCursorPagination
+from .anomaly import record_reading
+from .aggregation import BUCKETS, GROUP_BY, aggregate_readings
 from farms.models import Farm
+from farms.projection import project_queryset, requested_fields
 
 
 class SensorTypeViewSet(viewsets.ReadOnlyModelViewSet):
@@ -23,13 +30,21 @@ class SensorViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Farmers see only their farm's sensors"""
+        queryset = SensorSerializer.setup_eager_loading(Sensor.objects.all())
         if self.request.user.role == 'farmer':
-            return Sensor.objects.filter(farm__farmer=self.request.user)
-        return Sensor.objects.all()
+            return queryset.filter(farm__farmer=self.request.user)
+        return queryset
     
     @action(detail=True, methods=['get'])
     def readings(self, request, pk=None):
-        """Get readings for a sensor"""
+        """
+        Get readings for a sensor
+        
+        Optional query params:
+            max_points: Downsample the window to at most this many readings
+            method: 'lttb' (default) or 'minmax'
+            fields: Comma-separated reading fields to return
+        """
         sensor = self.get_object()
         hours = int(request.query_params.get('hours', 24))
         since = timezone.now() - timedelta(hours=hours)
@@ -37,9 +52,40 @@ class SensorViewSet(viewsets.ModelViewSet):
         readings = SensorReading.objects.filter(
             sensor=sensor,
             timestamp__gte=since
-        ).order_by('-timestamp')
+        ).select_related('sensor__sensor_type', 'farm')
+        
+        max_points = request.query_params.get('max_points')
+        if max_points:
+            method = request.query_params.get('method', 'lttb')
+            if method not in DOWNSAMPLERS:
+                return Response({'error': f'Unknown method: {method}'}, status=400)
+            try:
+                max_points = int(max_points)
+            except ValueError:
+                return Response({'error': 'max_points must be an integer'}, status=400)
+            if max_points < MIN_POINTS[method]:
+                return Response(
+                    {'error': f'max_points must be at least {MIN_POINTS[method]} for {method}'},
+                    status=400
+                )
+            
+            # Downsample over bare (id, timestamp, value) tuples, then hydrate
+            # only the selected rows
+            rows = list(
+                readings.order_by('timestamp', 'id').values_list(
+                    'id', 'timestamp', 'value', 'value_scaled'
+                )
+            )
+            if len(rows) > max_points:
+                scale = sensor.sensor_type.value_scale
+                xs = [row[1].timestamp() for row in rows]
+                ys = [decode_value(row[2], row[3], scale) for row in rows]
+                keep = DOWNSAMPLERS[method](xs, ys, max_points)
+                readings = readings.filter(id__in=[rows[i][0] for i in keep])
         
-        serializer = SensorReadingSerializer(readings, many=True)
+        fields = requested_fields(request)
+        readings = project_queryset(readings, SensorReadingSerializer, fields).order_by('-timestamp')
+        serializer = SensorReadingSerializer(readings, many=True, fields=fields)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
@@ -53,7 +99,9 @@ class SensorViewSet(viewsets.ModelViewSet):
         if request.user.role == 'farmer' and farm.farmer != request.user:
             return Response({'error': 'Unauthorized'}, status=403)
         
-        sensors = Sensor.objects.filter(farm=farm, is_active=True)
+        sensors = SensorSerializer.setup_eager_loading(
+            Sensor.objects.filter(farm=farm, is_active=True)
+        )
         serializer = self.get_serializer(sensors, many=True)
         return Response(serializer.data)
 
@@ -62,14 +110,78 @@ class SensorReadingViewSet(viewsets.ModelViewSet):
     """ViewSet for sensor readings"""
     permission_classes = [IsAuthenticated]
     serializer_class = SensorReadingSerializer
+    pagination_class = ReadingCursorPagination
     
     def get_queryset(self):
-        """Farmers see only their farm's readings"""
+        """Farmers see only their farm's readings (?fields= limits the columns loaded)"""
+        queryset = project_queryset(
+            SensorReading.objects.select_related('sensor__sensor_type', 'farm'),
+            SensorReadingSerializer,
+            requested_fields(self.request),
+            # Cursor pagination reads the timestamp of every row
+            always=('timestamp',)
+        )
         if self.request.user.role == 'farmer':
-            return SensorReading.objects.filter(sensor__farm__farmer=self.request.user)
-        return SensorReading.objects.all()
+            return queryset.filter(farm__farmer=self.request.user)
+        return queryset
+    
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', requested_fields(self.request))
+        return super().get_serializer(*args, **kwargs)
     
     def perform_create(self, serializer):
-        """Create a new reading"""
-        serializer.save()
+        """Create a new reading and run it through anomaly detection"""
+        reading = serializer.save()
+        record_reading(reading)
+    
+    @action(detail=False, methods=['get'])
+    def aggregate(self, request):
+        """
+        Bucketed aggregates for all matching sensors on a farm in one query
+        
+        Query params:
+            farm_id: Farm to aggregate (required)
+            sensor_types: Comma-separated SensorType names
+            categories: Comma-separated SensorType categories
+            hours: Window length ending now (default: 168, at most SENSOR_AGGREGATE_MAX_HOURS)
+            bucket: minute, hour, day or week (default: hour)
+            group_by: sensor or type (default: sensor)
+        """
+        farm_id = request.query_params.get('farm_id')
+        if not farm_id:
+            return Response({'error': 'farm_id required'}, status=400)
+        if not farm_id.isdigit():
+            return Response({'error': 'farm_id must be an integer'}, status=400)
+        
+        farm = get_object_or_404(Farm, id=farm_id)
+        if request.user.role == 'farmer' and farm.farmer_id != request.user.id:
+            return Response({'error': 'Unauthorized'}, status=403)
+        
+        bucket = request.query_params.get('bucket', 'hour')
+        if bucket not in BUCKETS:
+            return Response({'error': f'bucket must be one of {", ".join(BUCKETS)}'}, status=400)
+        group_by = request.query_params.get('group_by', 'sensor')
+        if group_by not in GROUP_BY:
+            return Response({'error': f'group_by must be one of {", ".join(GROUP_BY)}'}, status=400)
+        try:
+            hours = int(request.query_params.get('hours', 168))
+        except ValueError:
+            return Response({'error': 'hours must be an integer'}, status=400)
+        if not 1 <= hours <= settings.SENSOR_AGGREGATE_MAX_HOURS:
+            return Response(
+                {'error': f'hours must be between 1 and {settings.SENSOR_AGGREGATE_MAX_HOURS}'}, status=400
+            )
+        
+        def split(param):
+            value = request.query_params.get(param)
+            return [item.strip() for item in value.split(',') if item.strip()] if value else None
+        
+        return Response(aggregate_readings(
+            farm,
+            hours,
+            bucket,
+            sensor_types=split('sensor_types'),
+            categories=split('categories'),
+            group_by=group_by,
+        ))
 
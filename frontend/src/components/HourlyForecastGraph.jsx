@@ -103,7 +103,10 @@ export default function HourlyForecastGraph({ farmId }) {
   const loadForecast = async () => {
     try {
       setLoading(true)
-      const response = await automationAPI.getWeatherForecast(farmId)
+      const response = await automationAPI.getWeatherForecastColumnar(farmId, {
+        fields: 'hourly',
+        vars: 'temperature_2m,global_tilted_irradiance,precipitation,cloud_cover',
+      })
       setForecast(response.data.forecast)
     } catch (error) {
       console.error('Error loading forecast:', error)
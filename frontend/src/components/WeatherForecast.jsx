@@ -56,7 +56,7 @@ export default function WeatherForecast({ farmId }) {
   const loadForecast = async () => {
     try {
       setLoading(true)
-      const response = await automationAPI.getWeatherForecast(farmId)
+      const response = await automationAPI.getWeatherForecast(farmId, { fields: 'current,daily' })
       setForecast(response.data.forecast)
       setCurrentWeather(response.data.current)
     } catch (error) {
@@ -1,7 +1,7 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { useAuth } from '../contexts/AuthContext'
-import { climexaAPI, automationAPI } from '../services/api'
+import { climexaAPI, automationAPI, subscribeFarmEvents } from '../services/api'
 import { 
   Battery, 
   Droplet, 
@@ -9,18 +9,25 @@ import {
   AlertTriangle,
   RefreshCw,
   TrendingUp,
+  ChevronUp,
+  ChevronDown,
   Sprout as FarmIcon
 } from 'lucide-react'
 
+const FARMS_PAGE_SIZE = 50
+
 export default function ClimexaDashboard() {
   const { user, logout } = useAuth()
   const navigate = useNavigate()
   const [dashboardData, setDashboardData] = useState(null)
+  const [farmPage, setFarmPage] = useState({ count: 0, results: [] })
+  const [farmQuery, setFarmQuery] = useState({ page: 1, search: '', irrigation: '', ordering: 'name' })
   const [alerts, setAlerts] = useState([])
   const [selectedFarm, setSelectedFarm] = useState(null)
   const [farmDetail, setFarmDetail] = useState(null)
   const [loading, setLoading] = useState(true)
   const [refreshing, setRefreshing] = useState(false)
+  const reloadTimer = useRef(null)
 
   const handleLogout = async () => {
     await logout()
@@ -30,13 +37,31 @@ export default function ClimexaDashboard() {
   useEffect(() => {
     loadDashboard()
     loadAlerts()
-    const interval = setInterval(() => {
+    const reloadAll = () => {
       loadDashboard()
       loadAlerts()
-    }, 60000) // Refresh every minute
-    return () => clearInterval(interval)
+      setFarmQuery((query) => ({ ...query }))
+    }
+    // Status changes and alerts are pushed; coalesce bursts into one reload
+    const closeEvents = subscribeFarmEvents({}, (type) => {
+      if (type === 'reading') return
+      clearTimeout(reloadTimer.current)
+      reloadTimer.current = setTimeout(reloadAll, 2000)
+    })
+    // Events from other processes only arrive through a shared broker, so
+    // everything is also polled slowly as a fallback
+    const poll = setInterval(reloadAll, 120000) // Every 2 minutes
+    return () => {
+      closeEvents()
+      clearTimeout(reloadTimer.current)
+      clearInterval(poll)
+    }
   }, [])
 
+  useEffect(() => {
+    loadFarms(farmQuery)
+  }, [farmQuery])
+
   useEffect(() => {
     if (selectedFarm) {
       loadFarmDetail(selectedFarm.id)
@@ -54,6 +79,33 @@ export default function ClimexaDashboard() {
     }
   }
 
+  const loadFarms = async (query) => {
+    try {
+      const params = { page: query.page, page_size: FARMS_PAGE_SIZE, ordering: query.ordering }
+      if (query.search) params.search = query.search
+      if (query.irrigation) params.irrigation = query.irrigation
+      const response = await climexaAPI.getFarms(params)
+      setFarmPage(response.data)
+    } catch (error) {
+      console.error('Error loading farms:', error)
+    }
+  }
+
+  const updateFarmQuery = (changes) => {
+    // Any filter or sort change starts again from the first page
+    setFarmQuery((query) => ({ ...query, page: 1, ...changes }))
+  }
+
+  const toggleOrdering = (field) => {
+    updateFarmQuery({ ordering: farmQuery.ordering === field ? `-${field}` : field })
+  }
+
+  const sortIcon = (field) => {
+    if (farmQuery.ordering === field) return <ChevronUp className="inline w-4 h-4" />
+    if (farmQuery.ordering === `-${field}`) return <ChevronDown className="inline w-4 h-4" />
+    return null
+  }
+
   const loadAlerts = async () => {
     try {
       const response = await climexaAPI.getAlerts()
@@ -77,6 +129,7 @@ export default function ClimexaDashboard() {
     try {
       await automationAPI.updateAllStatuses()
       await loadDashboard()
+      await loadFarms(farmQuery)
       await loadAlerts()
     } catch (error) {
       console.error('Error refreshing:', error)
@@ -94,7 +147,10 @@ export default function ClimexaDashboard() {
   }
 
   const summary = dashboardData?.summary || {}
-  const farms = dashboardData?.farms || []
+  const farms = farmPage.results || []
+  const pageCount = Math.max(1, Math.ceil((farmPage.count || 0) / FARMS_PAGE_SIZE))
+  const histogram = summary.battery_histogram || []
+  const histogramMax = Math.max(1, ...histogram.map((bucket) => bucket.count))
 
   return (
     <div className="min-h-screen bg-climexa-background">
@@ -129,7 +185,7 @@ export default function ClimexaDashboard() {
       {/* Main Content */}
       <main className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-8">
         {/* Summary Cards */}
-        <div className="grid grid-cols-1 md:grid-cols-3 gap-6 mb-8">
+        <div className="grid grid-cols-1 md:grid-cols-4 gap-6 mb-8">
           <div className="bg-white rounded-lg shadow p-6">
             <div className="flex items-center justify-between mb-4">
               <h3 className="text-sm font-medium text-climexa-text">Total Farms</h3>
@@ -165,8 +221,44 @@ export default function ClimexaDashboard() {
               </span>
             </div>
           </div>
+
+          <div className="bg-white rounded-lg shadow p-6">
+            <div className="flex items-center justify-between mb-4">
+              <h3 className="text-sm font-medium text-climexa-text">Fleet PV Output</h3>
+              <Sun className="w-5 h-5 text-yellow-500" />
+            </div>
+            <div className="flex items-baseline">
+              <span className="text-3xl font-bold text-climexa-primary">
+                {summary.total_pv_output_kw || 0} kW
+              </span>
+            </div>
+          </div>
         </div>
 
+        {/* Battery Distribution */}
+        {histogram.length > 0 && (
+          <div className="bg-white rounded-lg shadow p-6 mb-8">
+            <div className="flex items-center gap-2 mb-4">
+              <TrendingUp className="w-5 h-5 text-climexa-accent" />
+              <h2 className="text-xl font-bold text-climexa-primary">Battery Distribution</h2>
+            </div>
+            <div className="flex items-end gap-2 h-32">
+              {histogram.map((bucket) => (
+                <div key={bucket.min} className="flex-1 flex flex-col items-center justify-end h-full">
+                  <span className="text-xs text-gray-600 mb-1">{bucket.count}</span>
+                  <div
+                    className={`w-full rounded-t ${
+                      bucket.max <= 20 ? 'bg-red-500' : bucket.max <= 50 ? 'bg-yellow-500' : 'bg-green-500'
+                    }`}
+                    style={{ height: `${(bucket.count / histogramMax) * 100}%` }}
+                  />
+                  <span className="text-xs text-gray-500 mt-1">{bucket.min}-{bucket.max}%</span>
+                </div>
+              ))}
+            </div>
+          </div>
+        )}
+
         {/* Alerts */}
         {alerts.length > 0 && (
           <div className="bg-white rounded-lg shadow p-6 mb-8">
@@ -191,10 +283,7 @@ export default function ClimexaDashboard() {
                       ))}
                     </div>
                     <button
-                      onClick={() => {
-                        const farm = farms.find(f => f.id === alert.farm_id)
-                        if (farm) setSelectedFarm(farm)
-                      }}
+                      onClick={() => setSelectedFarm({ id: alert.farm_id })}
                       className="text-climexa-primary hover:underline text-sm"
                     >
                       View Farm
@@ -208,16 +297,49 @@ export default function ClimexaDashboard() {
 
         {/* Farms List */}
         <div className="bg-white rounded-lg shadow">
-          <div className="p-6 border-b">
+          <div className="p-6 border-b flex flex-wrap justify-between items-center gap-4">
             <h2 className="text-xl font-bold text-climexa-primary">All Farms</h2>
+            <div className="flex gap-2">
+              <input
+                type="search"
+                placeholder="Search farm or farmer"
+                value={farmQuery.search}
+                onChange={(e) => updateFarmQuery({ search: e.target.value })}
+                className="border rounded-lg px-3 py-2 text-sm"
+              />
+              <select
+                value={farmQuery.irrigation}
+                onChange={(e) => updateFarmQuery({ irrigation: e.target.value })}
+                className="border rounded-lg px-3 py-2 text-sm"
+              >
+                <option value="">All irrigation</option>
+                <option value="on">Irrigation ON</option>
+                <option value="off">Irrigation OFF</option>
+              </select>
+            </div>
           </div>
           <div className="overflow-x-auto">
             <table className="w-full">
               <thead className="bg-gray-50">
                 <tr>
-                  <th className="text-left py-3 px-6 text-sm font-medium text-climexa-text">Farm Name</th>
-                  <th className="text-left py-3 px-6 text-sm font-medium text-climexa-text">Farmer</th>
-                  <th className="text-left py-3 px-6 text-sm font-medium text-climexa-text">Battery</th>
+                  <th
+                    className="text-left py-3 px-6 text-sm font-medium text-climexa-text cursor-pointer"
+                    onClick={() => toggleOrdering('name')}
+                  >
+                    Farm Name {sortIcon('name')}
+                  </th>
+                  <th
+                    className="text-left py-3 px-6 text-sm font-medium text-climexa-text cursor-pointer"
+                    onClick={() => toggleOrdering('farmer')}
+                  >
+                    Farmer {sortIcon('farmer')}
+                  </th>
+                  <th
+                    className="text-left py-3 px-6 text-sm font-medium text-climexa-text cursor-pointer"
+                    onClick={() => toggleOrdering('battery_level')}
+                  >
+                    Battery {sortIcon('battery_level')}
+                  </th>
                   <th className="text-left py-3 px-6 text-sm font-medium text-climexa-text">Irrigation</th>
                   <th className="text-left py-3 px-6 text-sm font-medium text-climexa-text">Status</th>
                   <th className="text-left py-3 px-6 text-sm font-medium text-climexa-text">Actions</th>
@@ -280,6 +402,26 @@ export default function ClimexaDashboard() {
               </tbody>
             </table>
           </div>
+          <div className="p-4 border-t flex justify-between items-center text-sm text-gray-600">
+            <span>{farmPage.count || 0} farms</span>
+            <div className="flex items-center gap-2">
+              <button
+                onClick={() => setFarmQuery((query) => ({ ...query, page: query.page - 1 }))}
+                disabled={!farmPage.previous}
+                className="px-3 py-1 rounded border disabled:opacity-50"
+              >
+                Previous
+              </button>
+              <span>Page {farmQuery.page} of {pageCount}</span>
+              <button
+                onClick={() => setFarmQuery((query) => ({ ...query, page: query.page + 1 }))}
+                disabled={!farmPage.next}
+                className="px-3 py-1 rounded border disabled:opacity-50"
+              >
+                Next
+              </button>
+            </div>
+          </div>
         </div>
 
         {/* Farm Detail Modal */}
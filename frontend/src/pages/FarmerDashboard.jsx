@@ -1,7 +1,7 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { useAuth } from '../contexts/AuthContext'
-import { farmerAPI, automationAPI } from '../services/api'
+import { farmerAPI, automationAPI, subscribeFarmEvents, streamFarmOverview } from '../services/api'
 import { 
   Droplet, 
   Battery, 
@@ -26,6 +26,7 @@ export default function FarmerDashboard() {
   const [loading, setLoading] = useState(true)
   const [refreshing, setRefreshing] = useState(false)
   const [weatherForecast, setWeatherForecast] = useState(null)
+  const reloadTimer = useRef(null)
 
   const handleLogout = async () => {
     await logout()
@@ -38,19 +39,52 @@ export default function FarmerDashboard() {
 
   useEffect(() => {
     if (selectedFarm) {
-      loadDashboard(selectedFarm.id)
-      loadWeatherForecast(selectedFarm.id)
+      loadOverview(selectedFarm.id)
+      // Status and readings are pushed; reload once per burst of events
+      const closeEvents = subscribeFarmEvents({ farm_id: selectedFarm.id }, () => {
+        clearTimeout(reloadTimer.current)
+        reloadTimer.current = setTimeout(() => loadDashboard(selectedFarm.id), 1000)
+      })
+      // Events from other processes only arrive through a shared broker, so
+      // the dashboard is also polled slowly as a fallback
+      const poll = setInterval(() => loadDashboard(selectedFarm.id), 60000) // Every minute
+      // Weather is not pushed, so it is still refreshed on a timer
       const interval = setInterval(() => {
-        loadDashboard(selectedFarm.id)
         loadWeatherForecast(selectedFarm.id)
-      }, 30000) // Refresh every 30s
-      return () => clearInterval(interval)
+      }, 300000) // Refresh every 5 minutes
+      return () => {
+        closeEvents()
+        clearTimeout(reloadTimer.current)
+        clearInterval(poll)
+        clearInterval(interval)
+      }
     }
   }, [selectedFarm])
 
+  // Dashboard and current weather in one request
+  const loadOverview = async (farmId) => {
+    try {
+      await streamFarmOverview(
+        farmId,
+        { sections: 'dashboard,weather', weather_fields: 'current,forecast_tomorrow' },
+        (section, data, error) => {
+          if (error) {
+            console.error(`Error loading ${section}:`, error)
+          } else if (section === 'dashboard') {
+            setDashboardData(data)
+          } else if (section === 'weather') {
+            setWeatherForecast(data)
+          }
+        }
+      )
+    } catch (error) {
+      console.error('Error loading farm overview:', error)
+    }
+  }
+
   const loadWeatherForecast = async (farmId) => {
     try {
-      const response = await automationAPI.getWeatherForecast(farmId)
+      const response = await automationAPI.getWeatherForecast(farmId, { fields: 'current,forecast_tomorrow' })
       setWeatherForecast(response.data)
     } catch (error) {
       console.error('Error loading weather forecast:', error)
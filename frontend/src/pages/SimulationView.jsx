@@ -447,7 +447,11 @@ export default function SimulationView() {
       // Fetch weather forecast from Open-Meteo
       let forecast = null
       try {
-        const weatherResponse = await automationAPI.getWeatherForecast(selectedFarm.id)
+        const weatherResponse = await automationAPI.getWeatherForecast(selectedFarm.id, {
+          fields: 'hourly',
+          vars: 'temperature_2m,precipitation,cloud_cover,global_tilted_irradiance,' +
+            'soil_moisture_0_1cm,soil_moisture_1_3cm,soil_moisture_3_9cm,soil_temperature_6cm',
+        })
         console.log('Weather forecast response:', weatherResponse.data)
         
         if (weatherResponse.data && weatherResponse.data.forecast) {
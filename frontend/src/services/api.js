@@ -55,13 +55,18 @@ export const farmerAPI = {
   getFarmStatus: (id) => api.get(`/farmer/farms/${id}/status/`),
   getFarmDashboard: (id) => api.get(`/farmer/farms/${id}/dashboard/`),
   getSensors: (farmId) => api.get(`/sensors/sensors/by_farm/?farm_id=${farmId}`),
-  getSensorReadings: (sensorId, hours = 24) => 
-    api.get(`/sensors/sensors/${sensorId}/readings/?hours=${hours}`),
+  getSensorReadings: (sensorId, hours = 24, maxPoints) => 
+    api.get(`/sensors/sensors/${sensorId}/readings/`, {
+      params: { hours, max_points: maxPoints }
+    }),
+  getReadingAggregates: (farmId, params = {}) =>
+    api.get('/sensors/readings/aggregate/', { params: { farm_id: farmId, ...params } }),
 }
 
 // Climexa API endpoints
 export const climexaAPI = {
   getDashboard: () => api.get('/climexa/dashboard/'),
+  getFarms: (params = {}) => api.get('/climexa/farms/', { params }),
   getFarmDetail: (farmId) => api.get(`/climexa/farms/${farmId}/`),
   getAlerts: () => api.get('/climexa/alerts/'),
 }
@@ -70,9 +75,82 @@ export const climexaAPI = {
 export const automationAPI = {
   updateStatus: (farmId) => api.post(`/automation/update/${farmId}/`),
   updateAllStatuses: () => api.post('/automation/update-all/'),
-  getWeatherForecast: (farmId) => api.get(`/automation/weather/${farmId}/`),
+  // params.fields: sections (current, forecast_tomorrow, hourly, daily);
+  // params.vars: hourly variables. Only what is selected is fetched upstream.
+  getWeatherForecast: (farmId, params = {}) => api.get(`/automation/weather/${farmId}/`, { params }),
+  // Same response shape as getWeatherForecast, fetched as float32 columns
+  getWeatherForecastColumnar: (farmId, params = {}) =>
+    api
+      .get(`/automation/weather/${farmId}/`, { params: { ...params, format: 'columnar' }, responseType: 'arraybuffer' })
+      .then((response) => ({ ...response, data: decodeColumnarForecast(response.data) })),
   getAISuggestions: (farmId) => api.get(`/automation/suggestions/${farmId}/`),
 }
 
+// Decode the columnar forecast layout (see backend automation/renderers.py)
+// back into the JSON shape: hourly times as local 'YYYY-MM-DDTHH:MM' strings
+// and missing values as null
+export function decodeColumnarForecast(buffer) {
+  const view = new DataView(buffer)
+  const headerLength = view.getUint32(8, true)
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 12, headerLength)))
+  if (header.columns === undefined) {
+    return header
+  }
+
+  const { current, forecast_tomorrow, start, step, count, columns, times, ...forecast } = header
+  const offset = forecast.utc_offset_seconds || 0
+  const epochs = times || Array.from({ length: count }, (_, i) => start + i * step)
+  const hourly = {
+    time: epochs.map((epoch) => new Date((epoch + offset) * 1000).toISOString().slice(0, 16)),
+  }
+  columns.forEach((name, index) => {
+    const values = new Float32Array(buffer, 12 + headerLength + index * count * 4, count)
+    hourly[name] = Array.from(values, (value) => (Number.isNaN(value) ? null : value))
+  })
+  return { current, forecast_tomorrow, forecast: { ...forecast, hourly } }
+}
+
+// Farm overview: dashboard, weather, suggestions and sensors in one request.
+// Sections arrive as newline-delimited JSON in completion order; onSection is
+// called with (name, data, error) for each. Resolves when the stream ends.
+export async function streamFarmOverview(farmId, params, onSection) {
+  const query = new URLSearchParams(params).toString()
+  const response = await fetch(`/api/farmer/farms/${farmId}/overview/${query ? `?${query}` : ''}`, {
+    credentials: 'include',
+  })
+  if (!response.ok) {
+    throw new Error(`Overview request failed: ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffered = ''
+  for (;;) {
+    const { done, value } = await reader.read()
+    buffered += decoder.decode(value || new Uint8Array(), { stream: !done })
+    const lines = buffered.split('\n')
+    buffered = lines.pop()
+    lines.filter(Boolean).forEach((line) => {
+      const { section, data, error } = JSON.parse(line)
+      onSection(section, data, error)
+    })
+    if (done) return
+  }
+}
+
+// Live farm events over Server-Sent Events ('status', 'reading', 'alert' and
+// 'reset'). EventSource reconnects by itself and resumes with Last-Event-ID.
+// Under WSGI the server answers 501, which closes the EventSource for good
+// and leaves the dashboards on their polling. Returns a function that
+// closes the stream.
+export function subscribeFarmEvents(params, onEvent) {
+  const query = new URLSearchParams(params).toString()
+  const source = new EventSource(`/api/stream/${query ? `?${query}` : ''}`, { withCredentials: true })
+  ;['status', 'reading', 'alert', 'reset'].forEach((type) => {
+    source.addEventListener(type, (event) => onEvent(type, JSON.parse(event.data)))
+  })
+  return () => source.close()
+}
+
 export default api
 